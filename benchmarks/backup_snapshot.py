@@ -0,0 +1,107 @@
+"""Do snapshots stall reruns?
+
+Builds a large throwaway profile, then measures the queries a Loans page
+rerun makes (plus an EMI-paid write) with and without a snapshot running
+on a background thread.
+
+    python benchmarks/backup_snapshot.py --loans 500000
+"""
+import argparse
+import shutil
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lifeos.utils import backup, db  # noqa: E402
+from lifeos.utils.calculations import load_active_emi_columns  # noqa: E402
+from lifeos.utils.expenses import expense_totals  # noqa: E402
+
+PROFILE = "bench-backup"
+
+
+def build(n_loans):
+    db.init_db(PROFILE)
+    with db.write_transaction(PROFILE) as conn:
+        conn.execute("DELETE FROM loans")
+        conn.executemany(
+            "INSERT INTO loans (id, lender, type, status, principal, emi, total_months,"
+            " months_paid, interest_rate, loan_no) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (f"B{i}", f"Lender {i % 50}", "EMI" if i % 4 else "SETTLEMENT",
+                 "ACTIVE" if i % 10 else "CLOSED", 500_000, 12_000, 60, i % 60,
+                 9 + i % 8, f"B{i}")
+                for i in range(n_loans)
+            ),
+        )
+
+
+def rerun():
+    # what a Loans page rerun reads, plus one small write
+    start = time.perf_counter()
+    load_active_emi_columns(PROFILE)
+    expense_totals(profile=PROFILE)
+    with db.write_transaction(PROFILE) as conn:
+        conn.execute("UPDATE loans SET version = version + 1 WHERE id = 'B1'")
+    return time.perf_counter() - start
+
+
+def measure(runs, during_snapshot):
+    times = []
+    done = threading.Event()
+    if during_snapshot:
+        def snap():
+            backup.create_snapshot(PROFILE)
+            done.set()
+        threading.Thread(target=snap, daemon=True).start()
+
+    while len(times) < runs or (during_snapshot and not done.is_set()):
+        times.append(rerun())
+    return times
+
+
+def report(label, times):
+    q = statistics.quantiles(times, n=100)
+    print(
+        f"{label:<18} runs={len(times):<5} p50={q[49] * 1000:7.1f}ms "
+        f"p95={q[94] * 1000:7.1f}ms max={max(times) * 1000:7.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--loans", type=int, default=200_000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    try:
+        start = time.perf_counter()
+        build(args.loans)
+        size = db.db_path(PROFILE).stat().st_size / 1e6
+        print(f"built {args.loans:,} loans ({size:.0f} MB) in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        path = backup.create_snapshot(PROFILE)
+        print(
+            f"snapshot alone: {time.perf_counter() - start:.2f}s, "
+            f"{path.stat().st_size / 1e6:.1f} MB compressed"
+        )
+
+        report("idle", measure(args.runs, during_snapshot=False))
+        report("during snapshot", measure(args.runs, during_snapshot=True))
+
+        start = time.perf_counter()
+        backup.restore_snapshot(path, PROFILE)
+        print(f"restore: {time.perf_counter() - start:.2f}s (includes a safety snapshot)")
+    finally:
+        db.db_path(PROFILE).unlink(missing_ok=True)
+        for suffix in ("-wal", "-shm"):
+            Path(str(db.db_path(PROFILE)) + suffix).unlink(missing_ok=True)
+        shutil.rmtree(backup.snapshot_dir(PROFILE), ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
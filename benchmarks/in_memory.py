@@ -0,0 +1,115 @@
+"""Disk vs in-memory (write-behind) database: read and write latency.
+
+Builds a throwaway profile on disk, then times the same reads and writes
+against the file and against its RAM copy (VIVEKA_IN_MEMORY mode):
+
+  load_loans       every live loan
+  load_cashflow    income and expenses
+  update_loan      one compare-and-swap update (a committed transaction)
+  add_rate_change  one upsert (a committed transaction)
+
+and the time a background flush takes to write the RAM copy back.
+
+    python benchmarks/in_memory.py --loans 20000 --expenses 5000
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lifeos.utils import db  # noqa: E402
+from lifeos.utils.calculations import load_cashflow, load_loans, update_loan  # noqa: E402
+from lifeos.utils.rates import add_rate_change  # noqa: E402
+
+PROFILE = "bench-memory"
+
+
+def build(n_loans, n_expenses):
+    db.init_db(PROFILE)
+    with db.write_transaction(PROFILE) as conn:
+        conn.execute("DELETE FROM loans")
+        conn.execute("DELETE FROM expenses")
+        conn.executemany(
+            "INSERT INTO loans (id, loan_no, lender, type, status, principal, emi,"
+            " total_months, months_paid, interest_rate) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (f"LN{i:07d}", f"LN{i:07d}", f"Lender {i % 40}", "EMI", "ACTIVE",
+                 500_000, 12_000, 60, i % 60, 9 + i % 7)
+                for i in range(n_loans)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO expenses (type, name, amount, category) VALUES (?, ?, ?, ?)",
+            (("variable", f"Expense {i}", 100 + i % 50, "Home") for i in range(n_expenses)),
+        )
+
+
+def timed(fn, runs):
+    times = []
+    for i in range(runs):
+        start = time.perf_counter()
+        fn(i)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), max(times)
+
+
+def measure(runs):
+    loan = load_loans(PROFILE)[0]
+
+    def write(i):
+        loan.months_paid = i % 60
+        update_loan(loan, "months_paid", profile=PROFILE)
+
+    def rate(i):
+        add_rate_change(loan.id, i % 60 + 1, 9 + i % 3, profile=PROFILE)
+
+    return {
+        "load_loans": timed(lambda i: load_loans(PROFILE), max(runs // 10, 3)),
+        "load_cashflow": timed(lambda i: load_cashflow(PROFILE), max(runs // 10, 3)),
+        "update_loan": timed(write, runs),
+        "add_rate_change": timed(rate, runs),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--loans", type=int, default=20_000)
+    parser.add_argument("--expenses", type=int, default=5_000)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    try:
+        build(args.loans, args.expenses)
+        print(f"built {args.loans:,} loans, {args.expenses:,} expenses")
+
+        db.IN_MEMORY = False
+        disk = measure(args.runs)
+
+        db.IN_MEMORY = True
+        start = time.perf_counter()
+        db.init_db(PROFILE, force=True)  # first open copies the file into RAM
+        loaded = time.perf_counter() - start
+        memory = measure(args.runs)
+        start = time.perf_counter()
+        db.flush_memory(PROFILE)
+        flushed = time.perf_counter() - start
+
+        print(f"\n{'operation':<17}{'disk ms':>10}{'memory ms':>12}{'speedup':>10}"
+              f"{'disk max':>11}{'mem max':>10}")
+        for name in disk:
+            (d, d_max), (m, m_max) = disk[name], memory[name]
+            print(f"{name:<17}{d * 1000:>10.3f}{m * 1000:>12.3f}{d / m:>9.1f}x"
+                  f"{d_max * 1000:>11.2f}{m_max * 1000:>10.2f}")
+        print(f"\nload into RAM {loaded * 1000:.0f}ms, flush to disk {flushed * 1000:.0f}ms")
+    finally:
+        db.IN_MEMORY = False
+        path = db.db_path(PROFILE)
+        for p in (path, Path(f"{path}-wal"), Path(f"{path}-shm")):
+            p.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
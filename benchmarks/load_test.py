@@ -0,0 +1,206 @@
+"""Many simultaneous sessions against one database.
+
+Every session is a headless copy of dashboard/app.py (Streamlit AppTest)
+that clicks through a realistic script: navigation, Mark EMI Paid, Edit
+Extra Paid and Save Cashflow. All sessions hit one synthetic profile at
+the same time. Reports rerun latency percentiles per action, write-lock
+waits and throughput.
+
+Each session gets its own process: AppTest drives a process-wide
+Streamlit runtime, so two AppTests can't run on threads of one process.
+
+    python benchmarks/load_test.py --sessions 8 --loops 3 --loans 20000
+"""
+import argparse
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from lifeos.utils import db  # noqa: E402
+from lifeos.utils.calculations import (  # noqa: E402
+    LoanConflictError, archive_cold_loans, load_active_emi_columns, update_extra_paid,
+)
+
+APP = str(ROOT / "dashboard" / "app.py")
+PROFILE = "loadtest"
+TIMEOUT = 120
+
+
+# -------------------------------------------------
+# SYNTHETIC DATABASE
+# -------------------------------------------------
+def build(n_loans, n_active, n_expenses):
+    db.init_db(PROFILE)
+    with db.write_transaction(PROFILE) as conn:
+        conn.execute("DELETE FROM loans")
+        conn.execute("DELETE FROM expenses")
+        conn.execute("DELETE FROM cashflow")
+        conn.execute("DELETE FROM income_streams")
+        conn.executemany(
+            "INSERT INTO loans (id, loan_no, lender, type, status, principal, emi,"
+            " total_months, months_paid, interest_rate, latest_offer, archived)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    f"LT{i}", f"LT{i}", f"Lender {i % 40}",
+                    "EMI" if i < n_active else "SETTLEMENT",
+                    "ACTIVE" if i < n_active or i % 20 == 0 else "CLOSED",
+                    300_000 + i % 7 * 50_000, 9_000 + i % 11 * 500,
+                    60, 0 if i < n_active else i % 60,
+                    8 + i % 9, 90_000 + i % 13 * 1_000,
+                    int(i >= n_active and i % 20 != 0),
+                )
+                for i in range(n_loans)
+            ),
+        )
+        # income is read from income_streams; cashflow keeps the legacy total
+        conn.execute(
+            "INSERT INTO income_streams (name, kind, amount, frequency) "
+            "VALUES ('Salary', 'salary', 400000, 'monthly')"
+        )
+        conn.execute("INSERT INTO cashflow (id, monthly_income) VALUES (1, 400000)")
+        conn.executemany(
+            "INSERT INTO expenses (type, name, amount, category) VALUES (?, ?, ?, ?)",
+            (
+                ("fixed" if i % 3 == 0 else "variable", f"Expense {i}", 500 + i % 40 * 100,
+                 ("Rent", "Food", "Travel", "Bills")[i % 4])
+                for i in range(n_expenses)
+            ),
+        )
+    # closed and archived rows go to loans_archive, as the app keeps them
+    archive_cold_loans(PROFILE)
+
+
+# -------------------------------------------------
+# SESSION SCRIPT
+# -------------------------------------------------
+def _timed(samples, action, fn):
+    start = time.perf_counter()
+    fn()
+    samples.append((action, time.perf_counter() - start))
+
+
+def _button(at, label):
+    return next(b for b in at.button if b.label == label)
+
+
+def run_session(index, loops):
+    """One browser tab: returns ([(action, seconds)], conflicts, errors,
+    this process's write-lock waits)."""
+    samples, conflicts = [], 0
+    at = AppTest.from_file(APP, default_timeout=TIMEOUT)
+    at.session_state["profile"] = PROFILE
+
+    _timed(samples, "open", at.run)
+    for _ in range(loops):
+        _timed(samples, "nav dashboard", at.button(key="nav_dashboard").click().run)
+        _timed(samples, "nav loans", at.button(key="nav_loans").click().run)
+
+        # every session works on its own loan, like different people would
+        pay = [b for b in at.button if b.label in ("Mark EMI Paid", "Undo EMI Paid")]
+        if pay:
+            _timed(samples, "mark emi paid", pay[index % len(pay)].click().run)
+
+        _timed(samples, "edit extra toggle", at.toggle[0].set_value(True).run)
+        # AppTest can't type into data_editor cells, so write through the
+        # same call the page makes when a cell changes
+        cols = load_active_emi_columns(PROFILE)
+        if len(cols["id"]):
+            i = index % len(cols["id"])
+            loan_id = str(cols["id"][i])
+            start = time.perf_counter()
+            try:
+                update_extra_paid(
+                    {loan_id: int(cols["extra_paid"][i]) + 100},
+                    {loan_id: int(cols["version"][i])},
+                    PROFILE,
+                )
+            except LoanConflictError:
+                conflicts += 1
+            samples.append(("edit extra paid (write)", time.perf_counter() - start))
+        _timed(samples, "edit extra toggle", at.toggle[0].set_value(False).run)
+
+        _timed(samples, "nav cashflow", at.button(key="nav_cashflow").click().run)
+        _timed(samples, "save cashflow", _button(at, "💾 Save Cashflow").click().run)
+        _timed(samples, "nav settlements", at.button(key="nav_settlements").click().run)
+
+    errors = [e.value for e in at.exception]
+    return samples, conflicts, errors, db.lock_wait_stats()
+
+
+# -------------------------------------------------
+# REPORT
+# -------------------------------------------------
+def percentiles(values):
+    if len(values) < 2:
+        return values * 3 if values else [0.0] * 3
+    q = statistics.quantiles(values, n=100, method="inclusive")
+    return q[49], q[94], q[98]
+
+
+def report(results, elapsed, sessions):
+    waits = [r[3] for r in results]
+    samples = [s for r in results for s in r[0]]
+    conflicts = sum(r[1] for r in results)
+    errors = [e for r in results for e in r[2]]
+
+    by_action = {}
+    for action, seconds in samples:
+        by_action.setdefault(action, []).append(seconds)
+
+    print(f"\n{'action':<24}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for action, values in [*by_action.items(), ("ALL", [s for _, s in samples])]:
+        p50, p95, p99 = percentiles(values)
+        print(f"{action:<24}{len(values):>6}{p50 * 1000:>10.1f}{p95 * 1000:>10.1f}{p99 * 1000:>10.1f}")
+
+    lock_count = sum(w["count"] for w in waits)
+    lock_time = sum(w["waited"] for w in waits)
+    lock_max = max((w["max"] for w in waits), default=0.0)
+
+    print(f"\nsessions {sessions}, reruns {len(samples)}, wall {elapsed:.1f}s, "
+          f"throughput {len(samples) / elapsed:.1f} reruns/s")
+    print(f"write-lock waits {lock_count} (total {lock_time:.2f}s, max {lock_max * 1000:.0f}ms), "
+          f"CAS conflicts {conflicts}, script errors {len(errors)}")
+    for e in errors[:5]:
+        print("  error:", e)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--loops", type=int, default=3, help="script repetitions per session")
+    parser.add_argument("--loans", type=int, default=20_000)
+    parser.add_argument("--active", type=int, default=40, help="active EMI loans")
+    parser.add_argument("--expenses", type=int, default=300)
+    parser.add_argument("--keep", action="store_true", help="keep the loadtest profile")
+    args = parser.parse_args()
+
+    build(args.loans, args.active, args.expenses)
+    db.lock_wait_stats(reset=True)
+    print(f"profile '{PROFILE}': {args.loans:,} loans ({args.active} active EMI), "
+          f"{args.expenses} expenses; {args.sessions} sessions x {args.loops} loops")
+
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=args.sessions) as executor:
+            results = list(executor.map(
+                run_session, range(args.sessions), [args.loops] * args.sessions
+            ))
+        elapsed = time.perf_counter() - start
+        report(results, elapsed, args.sessions)
+    finally:
+        if not args.keep:
+            path = db.db_path(PROFILE)
+            for p in (path, Path(f"{path}-wal"), Path(f"{path}-shm")):
+                p.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""What-if scenarios on a large book: overlay resolution and parallel
+evaluation.
+
+Builds a throwaway profile with a large loan book and many scenarios,
+each a small sparse overlay (a few loans changed, one removed, one added,
+one expense changed), then times:
+
+  resolve     reading one scenario's loans through its overlay
+  sequential  every scenario's dashboard metrics, one after another
+  pool        the same spread over a process pool
+  auto        evaluate_scenarios, which picks one of the two by the
+              estimated work (scenarios x loans vs PARALLEL_MIN_WORK)
+
+The result cache is cleared before each timed evaluation. Where pool
+beats sequential on your machine is where PARALLEL_MIN_WORK belongs.
+
+    python benchmarks/scenarios.py --loans 50000 --scenarios 16
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lifeos.utils import db, scenarios  # noqa: E402
+from lifeos.utils.cache import clear_cache  # noqa: E402
+from lifeos.utils.models import Loan  # noqa: E402
+
+PROFILE = "bench-scenarios"
+
+
+def build(n_loans, n_scenarios):
+    db.init_db(PROFILE)
+    with db.write_transaction(PROFILE) as conn:
+        conn.execute("DELETE FROM scenarios")
+        conn.execute("DELETE FROM loans")
+        conn.execute("DELETE FROM expenses")
+        conn.executemany(
+            "INSERT INTO loans (id, loan_no, lender, type, status, principal, emi,"
+            " total_months, months_paid, interest_rate) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (f"LN{i:07d}", f"LN{i:07d}", f"Lender {i % 40}", "EMI", "ACTIVE",
+                 500_000, 12_000, 60, i % 60, 9 + i % 7)
+                for i in range(n_loans)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO expenses (type, name, amount, category) VALUES (?, ?, ?, ?)",
+            [("fixed", f"Expense {i}", 1_000 + i, "Home") for i in range(50)],
+        )
+
+    rng = random.Random(7)
+    ids = []
+    for s in range(n_scenarios):
+        sid = scenarios.create_scenario(f"Scenario {s}", PROFILE)
+        picked = rng.sample(range(n_loans), 6)
+        loan_rows = [(f"LN{i:07d}", "set", {"emi": 10_000, "months_paid": 30}) for i in picked[:5]]
+        loan_rows.append((f"LN{picked[5]:07d}", "remove", {}))
+        new = Loan(id=f"NEW{s}", lender="New", principal=800_000, emi=17_000, total_months=60)
+        loan_rows.append((new.id, "add", {
+            f: getattr(new, f) for f in scenarios.LOAN_OVERLAY_FIELDS
+        }))
+        expense_rows = [("fixed", "Expense 0", "set", 5_000 + s, "Home")]
+        scenarios.save_overlay(sid, loan_rows, expense_rows, PROFILE)
+        ids.append(sid)
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--loans", type=int, default=50_000)
+    parser.add_argument("--scenarios", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=scenarios.MAX_WORKERS)
+    args = parser.parse_args()
+
+    try:
+        ids = build(args.loans, args.scenarios)
+        print(f"built {args.loans:,} loans, {len(ids)} scenarios")
+
+        start = time.perf_counter()
+        scenarios.scenario_loans(ids[0], PROFILE)
+        print(f"resolve one scenario  {(time.perf_counter() - start) * 1000:8.0f}ms")
+
+        clear_cache()
+        start = time.perf_counter()
+        sequential = {i: scenarios.scenario_metrics(i, PROFILE) for i in [None, *ids]}
+        seq = time.perf_counter() - start
+        print(f"sequential            {seq * 1000:8.0f}ms")
+
+        clear_cache()
+        everything = [None, *ids]
+        params = {i: scenarios._params(i, PROFILE) for i in everything}
+        start = time.perf_counter()
+        pooled = scenarios._evaluate_in_pool(everything, PROFILE, params, args.workers)
+        pool = time.perf_counter() - start
+        print(f"pool ({args.workers} workers)      {pool * 1000:8.0f}ms  ({seq / pool:.1f}x)")
+
+        clear_cache()
+        workers = scenarios._pool_workers(everything, PROFILE, args.workers)
+        start = time.perf_counter()
+        auto = scenarios.evaluate_scenarios(ids, PROFILE, max_workers=args.workers)
+        took = time.perf_counter() - start
+        label = f"auto ({f'pool of {workers}' if workers else 'sequential'})"
+        print(f"{label:<22}{took * 1000:8.0f}ms"
+              f"  ({len(everything) * args.loans:,} loan evaluations)")
+
+        assert dict(zip(everything, pooled)) == sequential, "pool and sequential results differ"
+        assert auto == sequential, "evaluate_scenarios and sequential results differ"
+    finally:
+        path = db.db_path(PROFILE)
+        for p in (path, Path(f"{path}-wal"), Path(f"{path}-shm")):
+            p.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Sidebar search and Loan No checks on a large book.
+
+Builds a throwaway profile, then times full-text search for a mix of
+queries (exact loan numbers, short and common prefixes, expense names)
+and the indexed duplicate Loan No check.
+
+    python benchmarks/search.py --loans 300000 --expenses 100000
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lifeos.utils import db  # noqa: E402
+from lifeos.utils.calculations import loan_no_exists  # noqa: E402
+from lifeos.utils.search import search  # noqa: E402
+
+PROFILE = "bench-search"
+LENDERS = ["HDFC Bank", "ICICI - PL", "Bajaj Finserv", "Axis Bank", "Kotak", "Mama", "SBI Card"]
+EXPENSES = ["Rent", "Groceries", "Electricity bill", "School fees", "Fuel", "Internet", "Gym"]
+QUERIES = ["LN0123456", "LN01234", "hdfc", "ic", "bank", "axis ln00", "school", "grocer", "zzz"]
+
+
+def build(n_loans, n_expenses):
+    db.init_db(PROFILE)
+    with db.write_transaction(PROFILE) as conn:
+        conn.execute("DELETE FROM loans")
+        conn.execute("DELETE FROM expenses")
+        conn.executemany(
+            "INSERT INTO loans (id, loan_no, lender, type, status, principal, emi, total_months)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (f"LN{i:07d}", f"LN{i:07d}", LENDERS[i % len(LENDERS)],
+                 "EMI" if i % 4 else "SETTLEMENT", "ACTIVE", 500_000, 12_000, 60)
+                for i in range(n_loans)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO expenses (type, name, amount, category) VALUES (?, ?, ?, ?)",
+            (
+                ("variable", f"{EXPENSES[i % len(EXPENSES)]} {i}", 100 + i % 50, "Home")
+                for i in range(n_expenses)
+            ),
+        )
+
+
+def timed(fn, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), max(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--loans", type=int, default=300_000)
+    parser.add_argument("--expenses", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    try:
+        start = time.perf_counter()
+        build(args.loans, args.expenses)
+        print(f"built {args.loans:,} loans, {args.expenses:,} expenses "
+              f"in {time.perf_counter() - start:.1f}s")
+
+        print(f"\n{'query':<14}{'hits':>6}{'median ms':>12}{'max ms':>10}")
+        for query in QUERIES:
+            median, worst, hits = timed(lambda: search(query, profile=PROFILE), args.runs)
+            print(f"{query!r:<14}{len(hits):>6}{median * 1000:>12.2f}{worst * 1000:>10.2f}")
+
+        for loan_no in ("ln0123456", "missing"):
+            median, worst, found = timed(lambda: loan_no_exists(loan_no, profile=PROFILE), args.runs)
+            print(f"loan_no_exists({loan_no!r}) = {found}: "
+                  f"median {median * 1000:.2f}ms, max {worst * 1000:.2f}ms")
+    finally:
+        path = db.db_path(PROFILE)
+        for p in (path, Path(f"{path}-wal"), Path(f"{path}-shm")):
+            p.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
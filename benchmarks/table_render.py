@@ -0,0 +1,93 @@
+"""Styler vs column_config rendering of the EMI loans table.
+
+Renders the Loans page's EMI table both ways in a headless Streamlit run
+(AppTest) and reports the time of the script run and the size of the
+dataframe message sent to the browser:
+
+  styler   df.style.format(...) – the old path; Streamlit ships per-cell
+           display values and CSS next to the Arrow data
+  config   the raw frame plus st.column_config – the browser formats cells
+
+    python benchmarks/table_render.py --rows 1000 50000
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+TIMEOUT = 300
+
+
+def render_table(rows, path):
+    # runs inside AppTest, so it imports what it needs
+    import numpy as np
+    import pandas as pd
+    import streamlit as st
+
+    from lifeos.pages.loans import EMI_COLUMN_CONFIG, emi_amounts, emi_table
+
+    i = np.arange(rows)
+    total_months = np.full(rows, 60, dtype=np.int64)
+    cols = {
+        "id": np.array([f"LN{n:07d}" for n in i], dtype=object),
+        "lender": np.array([f"Lender {n % 40}" for n in i], dtype=object),
+        "interest_rate": 8 + i % 9 * 1.25,
+        "principal": 300_000 + i % 7 * 50_000,
+        "emi": 9_000 + i % 11 * 500,
+        "total_months": total_months,
+        "months_paid": i % 61,
+        "extra_paid": i % 5 * 1_000,
+        "interest_only": i % 17 == 0,
+    }
+    df = emi_table(cols, emi_amounts(cols))
+
+    if path == "styler":
+        # the old rendering: Styler plus a per-cell style callback. Past
+        # 262,144 cells (~18k rows here) Styler refuses to render at all
+        # unless its limit is raised
+        pd.set_option("styler.render.max_elements", df.size)
+        status = lambda v: "color:#166534;" if v >= 30 else "color:#991B1B;"  # noqa: E731
+        st.dataframe(
+            df.style.format({"Interest Rate (%)": "{:.2f}"}).map(status, subset=["Pending EMIs"]),
+            use_container_width=True,
+        )
+    else:
+        st.dataframe(df, use_container_width=True, column_config=EMI_COLUMN_CONFIG)
+
+
+def measure(rows, path, runs):
+    times, size = [], 0
+    for _ in range(runs):
+        at = AppTest.from_function(render_table, args=(rows, path), default_timeout=TIMEOUT)
+        start = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - start)
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+        size = at.dataframe[0].proto.ByteSize()
+    return statistics.median(times), size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 50_000])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8}  {'path':<8}{'run ms':>10}{'payload KB':>13}")
+    for rows in args.rows:
+        results = {path: measure(rows, path, args.runs) for path in ("styler", "config")}
+        for path, (seconds, size) in results.items():
+            print(f"{rows:>8,}  {path:<8}{seconds * 1000:>10.0f}{size / 1024:>13,.0f}")
+        (styler_s, styler_b), (config_s, config_b) = results["styler"], results["config"]
+        print(f"{'':>8}  {'':<8}{styler_s / config_s:>9.1f}x{styler_b / config_b:>12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
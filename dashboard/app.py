@@ -1,4 +1,5 @@
 import streamlit as st
+import pandas as pd
 import sys
 from pathlib import Path
 
@@ -7,14 +8,32 @@ ROOT_DIR = Path(__file__).resolve().parents[1]
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
-from lifeos.utils.db import init_db
+from lifeos.utils.db import (
+    DEFAULT_PROFILE, create_profile, init_db, list_profiles, set_active_profile,
+)
 
 init_db()
 
-from lifeos.pages.loans import render_loans
+from lifeos.pages.loans import metric_graph, render_loans
 from lifeos.pages.cashflow import render_cashflow
-from lifeos.utils.calculations import load_cashflow, load_loans
+from lifeos.utils.calculations import (
+    active_emis, load_loans, load_monthly_income,
+)
+from lifeos.utils.expenses import expense_totals
+from lifeos.utils.forecast import pressure_timeline
+from lifeos.utils.income import income_projection
+from lifeos.utils.installments import dues_summary, upcoming_dues
+from lifeos.utils.metrics import sync_metrics
 from lifeos.pages.manage_loans import render_manage_loans
+from lifeos.pages.settlements import render_settlements
+from lifeos.pages.household import render_household
+from lifeos.pages.export import render_export
+from lifeos.pages.statements import render_statements
+from lifeos.pages.backups import render_backups
+from lifeos.pages.refinance import render_refinance
+from lifeos.pages.scenarios import render_scenarios
+from lifeos.utils.backup import snapshot_in_background
+from lifeos.utils.search import search
 
 
 # =====================================================
@@ -28,6 +47,16 @@ st.set_page_config(page_title="Viveka", layout="wide")
 if "page" not in st.session_state:
     st.session_state.page = "dashboard"
 
+if "profile" not in st.session_state:
+    st.session_state.profile = DEFAULT_PROFILE
+
+# search hit kind -> (icon, page that shows it)
+SEARCH_TARGETS = {
+    "EMI": ("💳", "manage_loans"),
+    "SETTLEMENT": ("🤝", "settlements"),
+    "expense": ("💰", "cashflow"),
+}
+
 # =====================================================
 # 🎨 GLOBAL STYLES (SIDEBAR + THEME + TABLE READABILITY)
 # =====================================================
@@ -205,14 +234,20 @@ def render_dashboard():
     st.caption("Overall financial health at a glance")
 
     # 💰 CASHFLOW SNAPSHOT
-    cashflow = load_cashflow()
-    income = cashflow.get("monthly_income", 0)
-    fixed_expenses = sum(e.get("amount", 0) for e in cashflow.get("fixed_expenses", []))
-    variable_expenses = sum(e.get("amount", 0) for e in cashflow.get("variable_expenses", []))
-    total_expenses = fixed_expenses + variable_expenses
-    surplus = income - total_expenses
+    income = load_monthly_income()
+    totals = expense_totals()
+    total_expenses = totals["fixed"] + totals["variable"]
+    emi_loans = active_emis(load_loans())
+
+    # derived metrics only recompute when one of their inputs changed
+    graph = sync_metrics(metric_graph(), income, total_expenses, emi_loans)
+    surplus = graph.get("surplus")
 
     st.markdown("## Cashflow Snapshot")
+    st.caption(
+        f"Income projected for this month from your income streams; "
+        f"next 12 months average ₹{income_projection()[:12].mean():,.0f}"
+    )
     c1, c2, c3, c4 = st.columns(4)
     c1.metric("Income", f"₹{income:,}")
     c2.metric("Expenses", f"₹{total_expenses:,}")
@@ -220,7 +255,7 @@ def render_dashboard():
     c4.metric("Status", "Healthy" if surplus >= 0 else "Deficit")
 
     # 📊 LIVING COST RATIO
-    living_cost_ratio = (total_expenses / income) if income else 0
+    living_cost_ratio = graph.get("living_cost_ratio")
     living_cost_pct = round(living_cost_ratio * 100, 1)
 
     st.markdown("## Living Cost Ratio")
@@ -235,10 +270,8 @@ def render_dashboard():
         r2.error("High lifestyle cost risk")
 
     # 💳 EMI SNAPSHOT
-    loans = load_loans()
-    emi_loans = [l for l in loans if l["type"] == "EMI" and l["status"] == "ACTIVE"]
-    total_emi = sum(l.get("emi", 0) for l in emi_loans)
-    free_cash_after_emi = surplus - total_emi
+    total_emi = graph.get("total_emi")
+    free_cash_after_emi = graph.get("free_cash_after_emi")
 
     st.markdown("## EMI Snapshot")
     e1, e2, e3 = st.columns(3)
@@ -247,7 +280,7 @@ def render_dashboard():
     e3.metric("Free Cash After EMI", f"₹{free_cash_after_emi:,}")
 
     # 📉 DEBT PRESSURE RATIO
-    debt_pressure_ratio = (total_emi / income) if income else 0
+    debt_pressure_ratio = graph.get("debt_pressure_ratio")
     debt_pressure_pct = round(debt_pressure_ratio * 100, 1)
 
     st.markdown("## Debt Pressure Ratio")
@@ -262,7 +295,7 @@ def render_dashboard():
         d2.error("Dangerous debt pressure")
 
     # 💾 SAVINGS CAPACITY
-    savings_capacity_ratio = (surplus / income) if income else 0
+    savings_capacity_ratio = graph.get("savings_capacity_ratio")
     savings_capacity_pct = round(savings_capacity_ratio * 100, 1)
 
     st.markdown("## Savings Capacity")
@@ -276,6 +309,49 @@ def render_dashboard():
     else:
         s2.error("No real savings capacity")
 
+    # 🗓️ UPCOMING DUES
+    if emi_loans:
+        dues = dues_summary()
+        st.markdown("## Upcoming Dues")
+        u1, u2, u3 = st.columns(3)
+        u1.metric(
+            "Due in Next 30 Days", f"₹{dues['upcoming'][1]:,.0f}",
+            delta=f"{dues['upcoming'][0]} installments", delta_color="off",
+        )
+        u2.metric("Left This Month", f"₹{dues['month_end'][1]:,.0f}")
+        u3.metric(
+            "Overdue", f"₹{dues['overdue'][1]:,.0f}",
+            delta=f"{dues['overdue'][0]} not marked paid", delta_color="off",
+        )
+
+        upcoming = upcoming_dues(30)
+        if upcoming:
+            st.dataframe(
+                pd.DataFrame(upcoming, columns=[
+                    "Due Date", "Loan No", "Lender", "EMI (₹)", "Principal (₹)", "Interest (₹)",
+                ]),
+                use_container_width=True,
+                hide_index=True,
+            )
+
+    # 📅 PRESSURE FORECAST
+    timeline = pressure_timeline(total_expenses)
+    if not timeline.empty:
+        st.markdown("## Pressure Forecast")
+        st.caption(
+            f"EMI load month by month until debt-free "
+            f"({timeline['Month'].iloc[-1]})"
+        )
+        st.line_chart(
+            timeline.set_index("Month")[["Income (₹)", "Total EMI (₹)", "Free Cash (₹)"]],
+            use_container_width=True,
+        )
+        st.dataframe(
+            timeline[timeline["Loans Closing"] > 0],
+            use_container_width=True,
+            hide_index=True,
+        )
+
     # 🚨 OVERALL SIGNAL
     if free_cash_after_emi < 0:
         st.error(
@@ -305,26 +381,100 @@ st.sidebar.markdown(
     unsafe_allow_html=True,
 )
 
+# 👤 PROFILE (one SQLite file per household member)
+st.sidebar.markdown("---")
+st.sidebar.markdown("### Profile")
+
+if "pending_profile" in st.session_state:
+    st.session_state.profile = st.session_state.pop("pending_profile")
+
+profiles = list_profiles()
+if st.session_state.profile not in profiles:
+    st.session_state.profile = DEFAULT_PROFILE
+
+profile = st.sidebar.selectbox(
+    "Profile", profiles, key="profile", label_visibility="collapsed"
+)
+set_active_profile(profile)
+# periodic snapshot on a worker thread; a no-op until the interval passes
+snapshot_in_background(profile)
+
+with st.sidebar.expander("➕ New profile"):
+    new_profile = st.text_input("Profile name", key="new_profile_name")
+    if st.button("Create profile", key="create_profile"):
+        try:
+            st.session_state.pending_profile = create_profile(new_profile)
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            st.rerun()
+
+# 🔎 SEARCH (lenders, loan numbers, expense names)
+query = st.sidebar.text_input(
+    "Search", key="search", placeholder="🔎 Lender, loan no, expense…",
+    label_visibility="collapsed",
+)
+if query.strip():
+    hits = search(query)
+    if not hits:
+        st.sidebar.caption("No matches")
+    for hit in hits:
+        icon, target = SEARCH_TARGETS[hit["kind"]]
+        if st.sidebar.button(
+            f"{icon} {hit['title']}",
+            key=f"search_{hit['kind']}_{hit['id']}",
+            help=hit["detail"],
+            use_container_width=True,
+        ):
+            st.session_state.page = target
+            if hit["kind"] == "EMI":
+                st.session_state.edit_id = hit["id"]
+
 st.sidebar.markdown("---")
 st.sidebar.markdown("### Overview")
 nav_button("📊 Dashboard", "dashboard")
+nav_button("🏠 Household", "household")
 
 st.sidebar.markdown("---")
 st.sidebar.markdown("### LifeOS")
 nav_button("💳 Loans", "loans")
 nav_button("✏️ Manage Loans", "manage_loans")
+nav_button("🤝 Settlements", "settlements")
+nav_button("🔁 Refinance", "refinance")
+nav_button("🧪 Scenarios", "scenarios")
 nav_button("💰 Cashflow", "cashflow")
 
+st.sidebar.markdown("---")
+st.sidebar.markdown("### Data")
+nav_button("🏦 Statements", "statements")
+nav_button("📤 Export", "export")
+nav_button("🗄️ Backups", "backups")
+
 # =====================================================
 # 🧭 PAGE ROUTING
 # =====================================================
 if st.session_state.page == "dashboard":
     render_dashboard()
+elif st.session_state.page == "household":
+    render_household()
 elif st.session_state.page == "loans":
     render_loans()
 elif st.session_state.page == "manage_loans":
     render_manage_loans()
+elif st.session_state.page == "settlements":
+    render_settlements()
+
+elif st.session_state.page == "refinance":
+    render_refinance()
+elif st.session_state.page == "scenarios":
+    render_scenarios()
 
 elif st.session_state.page == "cashflow":
     render_cashflow()
+elif st.session_state.page == "statements":
+    render_statements()
+elif st.session_state.page == "export":
+    render_export()
+elif st.session_state.page == "backups":
+    render_backups()
 st.caption("Viveka • Personal Financial Clarity System")
@@ -0,0 +1,68 @@
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+
+from lifeos.utils.backup import (
+    KEEP_DAILY, KEEP_LATEST, SNAPSHOT_INTERVAL, list_snapshots, restore_snapshot,
+    snapshot_at, snapshot_in_background, snapshot_running,
+)
+
+
+# =====================================================
+# 🗄️ BACKUPS
+# =====================================================
+
+def render_backups():
+    st.subheader("🗄️ Backups – Snapshots & Restore")
+    st.caption(
+        f"A compressed snapshot is taken in the background every "
+        f"{SNAPSHOT_INTERVAL // 60} minutes while the app is in use. "
+        f"The latest {KEEP_LATEST} and one per day for {KEEP_DAILY} days are kept."
+    )
+
+    if st.button("📸 Snapshot now", disabled=snapshot_running()):
+        snapshot_in_background(force=True)
+        st.toast("Snapshot started")
+
+    if snapshot_running():
+        st.info("A snapshot is being taken…")
+
+    snapshots = list_snapshots()
+    if not snapshots:
+        st.info("No snapshots yet")
+        return
+
+    st.markdown("## 🕒 Snapshots")
+    st.dataframe(
+        pd.DataFrame({
+            "Taken": [taken.strftime("%d %b %Y %H:%M:%S") for taken, _ in reversed(snapshots)],
+            "Size (KB)": [round(path.stat().st_size / 1024, 1) for _, path in reversed(snapshots)],
+        }),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+    # =====================================================
+    # ⏪ RESTORE TO A POINT IN TIME
+    # =====================================================
+
+    st.markdown("## ⏪ Restore")
+    now = datetime.now()
+    c1, c2 = st.columns(2)
+    day = c1.date_input("As of date", value=now.date(), max_value=now.date())
+    moment = c2.time_input("As of time", value=now.time(), step=60)
+
+    # the picker has minute resolution; include that whole minute
+    found = snapshot_at(datetime.combine(day, moment.replace(second=59, microsecond=999999)))
+    if found is None:
+        st.warning("No snapshot was taken before that time")
+        return
+
+    taken, path = found
+    st.markdown(f"Restores the snapshot from **{taken:%d %b %Y %H:%M:%S}**.")
+    confirm = st.checkbox(
+        "I understand the current data will be replaced (it is snapshotted first)"
+    )
+    if st.button("⏪ Restore", disabled=not confirm):
+        restore_snapshot(path)
+        st.success(f"Restored the snapshot from {taken:%d %b %Y %H:%M:%S} ✅")
@@ -1,61 +1,83 @@
+import re
 import streamlit as st
-import json
-from pathlib import Path
 
-DATA_FILE = Path(__file__).parents[1] / "data" / "cashflow.json"
-
-
-# =====================================================
-# 📦 DATA HELPERS
-# =====================================================
-
-from lifeos.utils.db import get_connection
-
-def load_cashflow():
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("SELECT monthly_income FROM cashflow WHERE id=1")
-    row = cur.fetchone()
-    income = row[0] if row else 0
-
-    cur.execute("SELECT name, amount FROM expenses WHERE type='fixed'")
-    fixed = [{"name": r[0], "amount": r[1]} for r in cur.fetchall()]
-
-    cur.execute("SELECT name, amount FROM expenses WHERE type='variable'")
-    variable = [{"name": r[0], "amount": r[1]} for r in cur.fetchall()]
-
-    conn.close()
+import pandas as pd
+from datetime import date
+
+from lifeos.utils.calculations import load_cashflow, save_cashflow
+from lifeos.utils.expenses import current_month, expense_totals
+from lifeos.utils.income import FREQUENCY_MONTHS, INCOME_FIELDS, INCOME_KINDS, project_income
+from lifeos.utils.models import Expense, IncomeStream, total_amount
+
+EXPENSE_COLUMNS = {
+    "name": st.column_config.TextColumn("Expense"),
+    "amount": st.column_config.NumberColumn("Amount (₹)", min_value=0),
+    "category": st.column_config.TextColumn("Category"),
+    "spent_on": st.column_config.DateColumn("Date", format="YYYY-MM-DD"),
+    "tags": st.column_config.TextColumn("Tags"),
+}
+
+MONTH_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+INCOME_COLUMNS = {
+    "name": st.column_config.TextColumn("Stream"),
+    "kind": st.column_config.SelectboxColumn("Kind", options=INCOME_KINDS, default="salary"),
+    "amount": st.column_config.NumberColumn("Amount (₹)", min_value=0, step=1000),
+    "frequency": st.column_config.SelectboxColumn(
+        "Paid", options=list(FREQUENCY_MONTHS), default="monthly"
+    ),
+    "start_month": st.column_config.TextColumn(
+        "First Payout (YYYY-MM)", validate=MONTH_PATTERN
+    ),
+    "end_month": st.column_config.TextColumn(
+        "Last Payout (YYYY-MM)", validate=MONTH_PATTERN
+    ),
+    "growth_pct": st.column_config.NumberColumn("Growth (%/yr)", step=0.5, format="%.1f"),
+}
+
+
+def income_rows(streams):
+    # typed columns, so the editor can add rows even with no streams yet
+    df = pd.DataFrame([s.to_row() for s in streams], columns=INCOME_FIELDS)
+    return df.astype({"amount": float, "growth_pct": float})
+
+
+def edited_streams(df):
+    streams = []
+    for row in df.astype(object).where(df.notna(), None).to_dict("records"):
+        if not row.get("amount"):
+            continue
+        for month in ("start_month", "end_month"):
+            if not re.match(MONTH_PATTERN, str(row.get(month) or "")):
+                row[month] = ""
+        row["amount"] = int(row["amount"])
+        streams.append(IncomeStream.from_row(row))
+    return streams
+
+
+def editor_rows(expenses):
+    return [
+        {
+            "name": e.name,
+            "amount": e.amount,
+            "category": e.category,
+            "spent_on": date.fromisoformat(e.spent_on) if e.spent_on else None,
+            "tags": e.tags,
+        }
+        for e in expenses
+    ]
 
-    return {
-        "monthly_income": income,
-        "fixed_expenses": fixed,
-        "variable_expenses": variable
-    }
-def save_cashflow(data):
-    conn = get_connection()
-    cur = conn.cursor()
 
-    cur.execute("DELETE FROM cashflow")
-    cur.execute("INSERT INTO cashflow (id, monthly_income) VALUES (1, ?)",
-                (data["monthly_income"],))
+def edited_expenses(rows, kind):
+    return [
+        Expense.from_row({
+            **row,
+            "type": kind,
+            "spent_on": row.get("spent_on").isoformat() if row.get("spent_on") else "",
+        })
+        for row in rows
+    ]
 
-    cur.execute("DELETE FROM expenses")
-
-    for e in data["fixed_expenses"]:
-        cur.execute(
-            "INSERT INTO expenses (type, name, amount) VALUES (?, ?, ?)",
-            ("fixed", e["name"], e["amount"])
-        )
-
-    for e in data["variable_expenses"]:
-        cur.execute(
-            "INSERT INTO expenses (type, name, amount) VALUES (?, ?, ?)",
-            ("variable", e["name"], e["amount"])
-        )
-
-    conn.commit()
-    conn.close()
 
 # =====================================================
 # 💰 CASHFLOW PAGE
@@ -70,13 +92,31 @@ def render_cashflow():
     # 💼 INCOME
     # ================================
 
-    st.markdown("## 💼 Monthly Income")
+    st.markdown("## 💼 Income Streams")
 
-    income = st.number_input(
-        "Total Monthly Income (₹)",
-        min_value=0,
-        step=1000,
-        value=int(data.get("monthly_income", 0))
+    st.caption(
+        "Amounts are per payout at today's level. Leave the first payout empty "
+        "for streams already paying (quarterly ones then fall in Jan/Apr/Jul/Oct, "
+        "annual ones in January)."
+    )
+
+    income_df = st.data_editor(
+        income_rows(data["income_streams"]),
+        num_rows="dynamic",
+        key="income_streams",
+        use_container_width=True,
+        hide_index=True,
+        column_config=INCOME_COLUMNS,
+    )
+
+    income_streams = edited_streams(income_df)
+    projection = project_income(income_streams, 24)
+    income = int(projection[0])
+
+    months = pd.period_range(pd.Period(date.today(), freq="M"), periods=len(projection), freq="M")
+    st.bar_chart(
+        pd.DataFrame({"Month": months.strftime("%Y-%m"), "Income (₹)": projection}).set_index("Month"),
+        use_container_width=True,
     )
 
     # ================================
@@ -85,22 +125,16 @@ def render_cashflow():
 
     st.markdown("## 🧾 Fixed Expenses")
 
-    fixed_rows = []
-    for item in data.get("fixed_expenses", []):
-        fixed_rows.append(item)
-
     fixed_df = st.data_editor(
-        fixed_rows,
+        editor_rows(data["fixed_expenses"]),
         num_rows="dynamic",
         key="fixed_expenses",
         use_container_width=True,
-        column_config={
-            "name": st.column_config.TextColumn("Expense"),
-            "amount": st.column_config.NumberColumn("Amount (₹)", min_value=0)
-        }
+        column_config=EXPENSE_COLUMNS,
     )
 
-    fixed_total = sum(row.get("amount", 0) for row in fixed_df)
+    fixed_expenses = edited_expenses(fixed_df, "fixed")
+    fixed_total = total_amount(fixed_expenses)
 
     # ================================
     # 🛒 VARIABLE EXPENSES
@@ -108,22 +142,21 @@ def render_cashflow():
 
     st.markdown("## 🛒 Variable Expenses")
 
-    variable_rows = []
-    for item in data.get("variable_expenses", []):
-        variable_rows.append(item)
+    st.caption("Leave the date empty for amounts that recur every month")
 
     variable_df = st.data_editor(
-        variable_rows,
+        editor_rows(data["variable_expenses"]),
         num_rows="dynamic",
         key="variable_expenses",
         use_container_width=True,
-        column_config={
-            "name": st.column_config.TextColumn("Expense"),
-            "amount": st.column_config.NumberColumn("Amount (₹)", min_value=0)
-        }
+        column_config=EXPENSE_COLUMNS,
     )
 
-    variable_total = sum(row.get("amount", 0) for row in variable_df)
+    variable_expenses = edited_expenses(variable_df, "variable")
+    month = current_month()
+    variable_total = total_amount(
+        e for e in variable_expenses if e.month in (None, month)
+    )
 
     # ================================
     # 📊 SUMMARY
@@ -141,7 +174,7 @@ def render_cashflow():
 
     c1, c2, c3, c4, c5, c6 = st.columns(6)
 
-    c1.metric("Income", f"₹{income:,}")
+    c1.metric("Income (this month)", f"₹{income:,}")
     c2.metric("Fixed Expenses", f"₹{fixed_total:,}")
     c3.metric("Variable Expenses", f"₹{variable_total:,}")
     c4.metric("Expense Ratio", f"{expense_pct}%")
@@ -152,14 +185,33 @@ def render_cashflow():
         c6.metric("Deficit", f"₹{surplus:,}", delta="Risk ⚠️")
 
 
+    # ================================
+    # 🏷️ BY CATEGORY
+    # ================================
+
+    st.markdown("## 🏷️ By Category (this month)")
+
+    by_category = expense_totals(month)["by_category"]
+    if by_category:
+        st.dataframe(
+            pd.DataFrame(
+                sorted(by_category.items(), key=lambda c: c[1], reverse=True),
+                columns=["Category", "Amount (₹)"],
+            ),
+            hide_index=True,
+            use_container_width=True,
+        )
+    else:
+        st.info("No saved expenses yet")
+
     # ================================
     # 💾 SAVE
     # ================================
 
     if st.button("💾 Save Cashflow"):
-        data["monthly_income"] = income
-        data["fixed_expenses"] = fixed_df
-        data["variable_expenses"] = variable_df
+        data["income_streams"] = income_streams
+        data["fixed_expenses"] = fixed_expenses
+        data["variable_expenses"] = variable_expenses
         save_cashflow(data)
         st.success("Cashflow saved successfully ✅")
     st.caption(
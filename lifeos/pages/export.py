@@ -0,0 +1,44 @@
+import streamlit as st
+from datetime import date
+
+from lifeos.utils.db import active_profile
+from lifeos.utils.export import FORMATS, excel_available, export_file
+
+
+EXPORTS = [
+    ("loans", "💳 Loan Book", "Every loan with its current terms"),
+    ("schedules", "📅 Amortization Schedules", "Month-by-month schedule for every EMI loan, including rate changes"),
+    ("cashflow", "💰 Current Cashflow", "Income streams and every expense as stored now, with categories and months"),
+]
+
+
+# =====================================================
+# 📤 EXPORT PAGE
+# =====================================================
+
+def render_export():
+    st.subheader("📤 Export Data")
+    st.caption("Files are generated when you click download, streamed from the database in chunks")
+
+    formats = [f for f in FORMATS if f != "Excel" or excel_available()]
+    fmt = st.radio("Format", formats, horizontal=True)
+    if not excel_available():
+        st.caption("Install `openpyxl` to enable Excel exports")
+
+    _, extension, mime = FORMATS[fmt]
+    # the download callable runs on another thread, so pin the profile now
+    profile = active_profile()
+    stamp = date.today().isoformat()
+
+    for dataset, label, description in EXPORTS:
+        with st.container(border=True):
+            c1, c2 = st.columns([7, 3])
+            c1.markdown(f"**{label}**  \n{description}")
+            c2.download_button(
+                "⬇️ Download",
+                data=lambda dataset=dataset: export_file(dataset, fmt, profile),
+                file_name=f"viveka_{profile}_{dataset}_{stamp}.{extension}",
+                mime=mime,
+                key=f"export_{dataset}",
+                use_container_width=True,
+            )
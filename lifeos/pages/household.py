@@ -0,0 +1,39 @@
+import streamlit as st
+import pandas as pd
+
+from lifeos.utils.household import household_summary
+
+
+# =====================================================
+# 🏠 HOUSEHOLD DASHBOARD
+# =====================================================
+
+def render_household():
+    st.title("Household Dashboard")
+    st.caption("All profiles combined")
+
+    rows, totals = household_summary()
+
+    income = totals["income"]
+    debt_pressure_pct = round(totals["monthly_emi"] / income * 100, 1) if income else 0
+
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Household Income", f"₹{income:,}")
+    c2.metric("Monthly EMI", f"₹{totals['monthly_emi']:,}")
+    c3.metric("EMI / Income", f"{debt_pressure_pct}%")
+    c4.metric("Free Cash After EMI", f"₹{totals['free_cash']:,}")
+
+    st.markdown("## 👥 By Profile")
+    df = pd.DataFrame(rows).rename(columns={
+        "profile": "Profile",
+        "income": "Income (₹)",
+        "expenses": "Expenses (₹)",
+        "active_emis": "Active EMIs",
+        "monthly_emi": "Monthly EMI (₹)",
+        "balance": "EMI Balance (₹)",
+        "free_cash": "Free Cash (₹)",
+    })
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+    if totals["free_cash"] < 0:
+        st.error("Household cashflow cannot cover expenses and EMIs.")
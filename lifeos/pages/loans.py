@@ -1,49 +1,56 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 from datetime import date, datetime
 from dateutil.relativedelta import relativedelta
 
-from lifeos.utils.calculations import load_loans, save_loans, load_cashflow
+from lifeos.utils.cache import cached
+from lifeos.utils.calculations import (
+    LoanConflictError, active_emis, load_loans, load_monthly_income,
+    load_active_emi_columns, update_extra_paid, update_loan,
+)
+from lifeos.utils.db import active_profile
+from lifeos.utils.expenses import expense_totals
+from lifeos.utils.graph import MetricGraph
+from lifeos.utils.metrics import loan_node, sync_metrics
+from lifeos.utils.payoff import (
+    STRATEGIES, goal_plan, payoff_book, payoff_order,
+)
+from lifeos.utils.rates import apply_rate_shock, load_rate_changes
 
 
 # =====================================================
 # 🔁 HELPERS
 # =====================================================
 
-def calculate_new_emi(principal, annual_rate, months):
-    if principal <= 0 or months <= 0:
-        return 0
-    r = annual_rate / 12 / 100
-    emi = principal * r * (1 + r) ** months / ((1 + r) ** months - 1)
-    return round(emi)
+def flash_conflict(error):
+    # shown after the rerun that reloads the latest loan data
+    st.session_state.loan_conflict = str(error)
+    st.rerun()
 
 
-def current_month_key():
-    return datetime.now().strftime("%Y-%m")
+def show_conflict():
+    message = st.session_state.pop("loan_conflict", None)
+    if message:
+        st.error(f"⚠️ {message}")
+
 
+def metric_graph():
+    # one graph per profile, kept across reruns
+    key = f"metric_graph_{active_profile()}"
+    if key not in st.session_state:
+        st.session_state[key] = MetricGraph()
+    return st.session_state[key]
 
-def diff_31_style(val):
-    try:
-        val = float(val)
-        if val < 0:
-            return "background-color:#DCFCE7; color:#166534;"
-        elif val > 0:
-            return "background-color:#FEE2E2; color:#991B1B;"
-        return ""
-    except Exception:
-        return ""
+
+def current_month_key():
+    return datetime.now().strftime("%Y-%m")
 
 
 # =====================================================
 # 📊 EMI PROGRESS HELPERS
 # =====================================================
 
-def emi_progress(months_paid, total_months):
-    if total_months <= 0:
-        return 0.0
-    return min(months_paid / total_months, 1.0)
-
-
 def progress_color(progress):
     if progress >= 0.7:
         return "🟢"
@@ -52,16 +59,9 @@ def progress_color(progress):
     return "🔴"
 
 
-def remaining_balance_estimate(loan):
-    emi = loan.get("emi", 0)
-    total_months = loan.get("total_months", 0)
-    months_paid = loan.get("months_paid", 0)
-    extra_paid = loan.get("extra_paid", 0)
-
-    total_payable = emi * total_months
-    paid = (emi * months_paid) + extra_paid
-
-    return max(total_payable - paid, 0)
+def progress_colors(progress):
+    """progress_color for a whole column at once."""
+    return np.select([progress >= 0.7, progress >= 0.4], ["🟢", "🟡"], "🔴")
 
 
 def projected_close_date(months_left):
@@ -71,6 +71,81 @@ def projected_close_date(months_left):
     return close_date.strftime("%b %Y")
 
 
+# =====================================================
+# 🧮 EMI TABLE (COLUMNAR)
+# =====================================================
+
+# Cells are formatted by the browser from the Arrow data; no per-cell
+# Styler pass (which ships HTML/CSS for every cell)
+RUPEE_COLUMNS = [
+    "Principal (₹)", "Interest (₹)", "Total Payable (₹)", "EMI (₹)",
+    "Extra Paid (₹)", "Paid (₹)", "Balance (₹)",
+]
+EMI_COLUMN_CONFIG = {
+    "Status": st.column_config.TextColumn("", width="small"),
+    "Interest Rate (%)": st.column_config.NumberColumn(format="%.2f"),
+    "Progress": st.column_config.ProgressColumn(min_value=0, max_value=1, format="percent"),
+    **{c: st.column_config.NumberColumn(format="localized") for c in RUPEE_COLUMNS},
+}
+
+def emi_amounts(cols):
+    principal = cols["principal"]
+    emi = cols["emi"]
+    total_m = cols["total_months"]
+    interest_only = cols["interest_only"]
+
+    full_term = emi * total_m
+    payable = np.where(interest_only, principal + full_term, full_term)
+    interest = np.where(interest_only, full_term, full_term - principal)
+    paid = emi * cols["months_paid"] + cols["extra_paid"]
+    balance = np.where(interest_only, principal, np.maximum(payable - paid, 0))
+
+    return {
+        "interest": interest,
+        "payable": payable,
+        "paid": paid,
+        "balance": balance,
+    }
+
+
+def emi_table(cols, amounts):
+    total_m = cols["total_months"]
+    paid_m = cols["months_paid"]
+    progress = np.divide(paid_m, total_m, out=np.zeros(len(total_m)), where=total_m > 0)
+
+    return pd.DataFrame({
+        "Status": progress_colors(progress),
+        "Loan No": cols["id"],
+        "Lender": cols["lender"],
+        "Interest Rate (%)": cols["interest_rate"].round(2),
+        "Principal (₹)": cols["principal"],
+        "Interest (₹)": amounts["interest"],
+        "Total Payable (₹)": amounts["payable"],
+        "EMI (₹)": cols["emi"],
+        "Paid EMIs": pd.Series(paid_m).astype(str) + "/" + pd.Series(total_m).astype(str),
+        "Pending EMIs": total_m - paid_m,
+        "Progress": progress,
+        "Extra Paid (₹)": cols["extra_paid"],
+        "Paid (₹)": amounts["paid"],
+        "Balance (₹)": amounts["balance"],
+    })
+
+
+def changed_values(before, after, column, key="Loan No"):
+    """Return {key: new value} for rows whose column differs."""
+    old = before[column].to_numpy()
+    new = (
+        pd.to_numeric(after[column], errors="coerce")
+        .fillna(0)
+        .astype(np.int64)
+        .to_numpy()
+    )
+    keys = after[key].astype(str).str.strip().to_numpy()
+
+    mask = (old != new) & (keys != "")
+    return dict(zip(keys[mask], new[mask]))
+
+
 # =====================================================
 # 🚨 EMI RISK SCORE
 # =====================================================
@@ -90,7 +165,7 @@ def calculate_emi_risk_score(emi_loans, income, expenses):
     if not emi_loans or income <= 0:
         return 0
 
-    total_emi = sum(l.get("emi", 0) for l in emi_loans)
+    total_emi = sum(l.emi for l in emi_loans)
     surplus = income - expenses
     free_cash = surplus - total_emi
 
@@ -111,7 +186,7 @@ def calculate_emi_risk_score(emi_loans, income, expenses):
     elif free_cash < 25_000:
         score += 5
 
-    if any(l.get("interest_only") for l in emi_loans):
+    if any(l.interest_only for l in emi_loans):
         score += 15
 
     if len(emi_loans) >= 5:
@@ -120,7 +195,7 @@ def calculate_emi_risk_score(emi_loans, income, expenses):
         score += 5
 
     for l in emi_loans:
-        if (l["total_months"] - l["months_paid"]) > 36:
+        if l.months_left > 36:
             score += 10
             break
 
@@ -133,18 +208,19 @@ def calculate_emi_risk_score(emi_loans, income, expenses):
 
 def render_loans(loans=None):
     st.subheader("🧠 LifeOS – Financial Clarity System")
+    show_conflict()
 
     if loans is None:
         loans = load_loans()
 
-    cashflow = load_cashflow()
-
-    for l in loans:
-        l.setdefault("extra_paid", 0)
-        l.setdefault("latest_offer", 0)
-        l.setdefault("last_paid_month", "")
+    income = load_monthly_income()
+    totals = expense_totals()
 
-    emi_loans = [l for l in loans if l["type"] == "EMI" and l["status"] == "ACTIVE"]
+    emi_loans = active_emis(loans)
+    graph = sync_metrics(
+        metric_graph(), income, totals["fixed"] + totals["variable"], emi_loans
+    )
+    graph.rule("risk_score", ["emi_loans", "income", "expenses"], calculate_emi_risk_score)
 
     # =====================================================
     # 🔢 SORT EMI LOANS (closest to completion first)
@@ -152,27 +228,21 @@ def render_loans(loans=None):
 
     emi_loans = sorted(
         emi_loans,
-        key=lambda l: (l["total_months"] - l["months_paid"])
+        key=lambda l: l.months_left
     )
 
     # =====================================================
     # 💳 EMI SNAPSHOT
     # =====================================================
 
-    income = cashflow.get("monthly_income", 0)
-    fixed = sum(e.get("amount", 0) for e in cashflow.get("fixed_expenses", []))
-    variable = sum(e.get("amount", 0) for e in cashflow.get("variable_expenses", []))
-    expenses = fixed + variable
-
-    total_emi = sum(l.get("emi", 0) for l in emi_loans)
+    total_emi = graph.get("total_emi")
 
     st.markdown("## 💳 EMI Snapshot")
     c1, c2 = st.columns(2)
     c1.metric("Active EMIs", len(emi_loans))
     c2.metric("Monthly EMI", f"₹{total_emi:,}")
 
-    risk = calculate_emi_risk_score(emi_loans, income, expenses)
-    render_risk_badge(risk)
+    render_risk_badge(graph.get("risk_score"))
 
     # =====================================================
     # 🧠 AI INSIGHT
@@ -180,11 +250,11 @@ def render_loans(loans=None):
 
     if emi_loans:
         next_close = emi_loans[0]
-        months_left = next_close["total_months"] - next_close["months_paid"]
+        months_left = next_close.months_left
 
         st.info(
-            f"💡 **Insight:** Closing **{next_close['lender']}** next "
-            f"({months_left} EMIs left) can free **₹{next_close['emi']:,}/month** "
+            f"💡 **Insight:** Closing **{next_close.lender}** next "
+            f"({months_left} EMIs left) can free **₹{next_close.emi:,}/month** "
             f"and improve cashflow."
         )
 
@@ -196,55 +266,35 @@ def render_loans(loans=None):
         st.markdown("## 📈 EMI Progress Overview")
 
         for l in emi_loans:
-            months_left = l["total_months"] - l["months_paid"]
-            progress = emi_progress(l["months_paid"], l["total_months"])
+            metrics = graph.get(f"{loan_node(l.id)}:metrics")
+            months_left = metrics["months_left"]
+            progress = metrics["progress"]
             percent = int(progress * 100)
-            balance = remaining_balance_estimate(l)
             badge = progress_color(progress)
             close_by = projected_close_date(months_left)
 
-            st.markdown(f"**{l['lender']}**  \nLoan No: `{l['id']}`")
+            st.markdown(f"**{l.lender}**  \nLoan No: `{l.id}`")
             st.progress(progress)
             st.caption(
                 f"{badge} **{percent}% complete** · "
                 f"**{months_left} EMIs left** · "
                 f"Close by **{close_by}**"
             )
-            #st.markdown(f"Remaining balance (est.): **₹{balance:,}**")
             st.markdown("---")
 
     # =====================================================
     # 📊 EMI LOANS SUMMARY
     # =====================================================
 
-    total_principal = total_interest = total_payable = 0
-    total_paid = total_balance = total_pending = 0
+    cols = load_active_emi_columns()
+    amounts = emi_amounts(cols)
 
-    for l in emi_loans:
-        principal = l["principal"]
-        emi = l["emi"]
-        total_m = l["total_months"]
-        paid_m = l["months_paid"]
-        extra = l["extra_paid"]
-        interest_only = l.get("interest_only", False)
-
-        if interest_only:
-            interest = emi * total_m
-            payable = principal + interest
-            paid = emi * paid_m + extra
-            balance = principal
-        else:
-            payable = emi * total_m
-            interest = payable - principal
-            paid = emi * paid_m + extra
-            balance = max(payable - paid, 0)
-
-        total_principal += principal
-        total_interest += interest
-        total_payable += payable
-        total_paid += paid
-        total_balance += balance
-        total_pending += (total_m - paid_m)
+    total_principal = int(cols["principal"].sum())
+    total_interest = int(amounts["interest"].sum())
+    total_payable = int(amounts["payable"].sum())
+    total_paid = int(amounts["paid"].sum())
+    total_balance = int(amounts["balance"].sum())
+    total_pending = int((cols["total_months"] - cols["months_paid"]).sum())
 
     st.markdown("### 📊 EMI Loans Summary")
     s1, s2, s3, s4, s5, s6 = st.columns(6)
@@ -262,43 +312,7 @@ def render_loans(loans=None):
     st.markdown("## 💳 EMI Loans")
     edit_emi = st.toggle("Edit EMI Extra Payments", value=False)
 
-    rows = []
-    for l in emi_loans:
-        principal = l["principal"]
-        emi = l["emi"]
-        total_m = l["total_months"]
-        paid_m = l["months_paid"]
-        extra = l["extra_paid"]
-        rate = float(l.get("interest_rate", 0))
-        interest_only = l.get("interest_only", False)
-
-        if interest_only:
-            interest = emi * total_m
-            payable = principal + interest
-            paid = emi * paid_m + extra
-            balance = principal
-        else:
-            payable = emi * total_m
-            interest = payable - principal
-            paid = emi * paid_m + extra
-            balance = max(payable - paid, 0)
-
-        rows.append({
-            "Loan No": l["id"],
-            "Lender": l["lender"],
-            "Interest Rate (%)": round(rate, 2),
-            "Principal (₹)": principal,
-            "Interest (₹)": interest,
-            "Total Payable (₹)": payable,
-            "EMI (₹)": emi,
-            "Paid EMIs": f"{paid_m}/{total_m}",
-            "Pending EMIs": total_m - paid_m,
-            "Extra Paid (₹)": extra,
-            "Paid (₹)": paid,
-            "Balance (₹)": balance,
-        })
-
-    df_emi = pd.DataFrame(rows)
+    df_emi = emi_table(cols, amounts)
 
     if edit_emi:
         st.caption("Edit Extra Paid amounts in the table. TOTAL row is not displayed while editing.")
@@ -306,35 +320,120 @@ def render_loans(loans=None):
             df_emi,
             hide_index=True,
             use_container_width=True,
-            disabled=[
-                "Loan No", "Lender", "Interest Rate (%)",
-                "Principal (₹)", "Interest (₹)", "Total Payable (₹)",
-                "EMI (₹)", "Paid EMIs", "Pending EMIs",
-                "Paid (₹)", "Balance (₹)"
-            ],
+            column_config=EMI_COLUMN_CONFIG,
+            disabled=[c for c in df_emi.columns if c != "Extra Paid (₹)"],
         )
 
-        if not edited.equals(df_emi):
-            # filter out blank Loan No rows (safety) and create updates
-            clean = edited[edited["Loan No"].astype(str).str.strip() != ""]
-            for _, row in clean.iterrows():
-                loan_id = row["Loan No"]
-                for loan in loans:
-                    if loan["id"] == loan_id:
-                        # protect against non-int / NaN
-                        try:
-                            loan["extra_paid"] = int(row.get("Extra Paid (₹)") or 0)
-                        except Exception:
-                            loan["extra_paid"] = 0
-                        break
-            save_loans(loans)
+        changes = changed_values(df_emi, edited, "Extra Paid (₹)")
+        if changes:
+            versions = dict(zip(df_emi["Loan No"].astype(str).str.strip(), cols["version"]))
+            try:
+                update_extra_paid(changes, versions)
+            except LoanConflictError as e:
+                flash_conflict(e)
             st.rerun()
     else:
         st.dataframe(
-            df_emi.style.format({"Interest Rate (%)": "{:.2f}"}),
+            df_emi,
             use_container_width=True,
+            column_config=EMI_COLUMN_CONFIG,
+        )
+
+    # =====================================================
+    # 📈 RATE SHOCK
+    # =====================================================
+
+    if emi_loans:
+        st.markdown("## 📈 Rate Shock")
+        shock = st.slider(
+            "Rate change for all EMI loans (%)",
+            min_value=-3.0, max_value=3.0, value=0.0, step=0.25,
         )
 
+        if shock:
+            results = apply_rate_shock(emi_loans, load_rate_changes(), shock)
+            # anchor on the EMI actually being paid, shift by the re-derived change
+            df_shock = pd.DataFrame([
+                {
+                    "Loan No": l.id,
+                    "Lender": l.lender,
+                    "Rate (%)": r["before"]["rate"],
+                    "New Rate (%)": r["after"]["rate"],
+                    "EMI (₹)": l.emi,
+                    "New EMI (₹)": l.emi + r["after"]["emi"] - r["before"]["emi"],
+                    "Change (₹)": r["after"]["emi"] - r["before"]["emi"],
+                }
+                for l in emi_loans
+                for r in (results[l.id],)
+            ])
+            st.metric(
+                "Monthly EMI after shock",
+                f"₹{int(df_shock['New EMI (₹)'].sum()):,}",
+                delta=f"₹{int(df_shock['Change (₹)'].sum()):,}",
+                delta_color="inverse",
+            )
+            st.dataframe(df_shock, use_container_width=True, hide_index=True)
+
+    # =====================================================
+    # 🎯 DEBT-FREE GOAL
+    # =====================================================
+
+    if emi_loans:
+        st.markdown("## 🎯 Debt-Free Goal")
+        book = payoff_book(emi_loans, load_rate_changes())
+        lenders = {l.id: l.lender for l in emi_loans}
+        today = date.today()
+        latest_close = today + relativedelta(months=max(l.months_left for l in emi_loans))
+
+        g1, g2 = st.columns(2)
+        goal = g1.date_input(
+            "Debt-free by",
+            value=latest_close,
+            min_value=today + relativedelta(months=1),
+            max_value=latest_close,
+        )
+        strategy = g2.radio(
+            "Strategy", list(STRATEGIES), horizontal=True,
+            help=" · ".join(f"{k}: {v}" for k, v in STRATEGIES.items()),
+        )
+
+        target_months = (goal.year - today.year) * 12 + goal.month - today.month
+        # the bisection runs dozens of simulations; reuse it across reruns,
+        # sessions and restarts until the loan book changes
+        extra, month, close_month, allocation = cached(
+            "payoff.goal_plan", (target_months, strategy),
+            lambda: goal_plan(book, target_months, strategy),
+        )
+
+        if extra is None:
+            st.warning("No extra payment clears every loan by then – each loan needs at least a month")
+        elif extra == 0:
+            st.success("Your current EMIs already clear every loan by then ✅")
+        else:
+            st.metric(
+                "Minimum extra payment",
+                f"₹{extra:,}/month",
+                delta=f"debt-free {projected_close_date(int(month))}",
+                delta_color="off",
+            )
+            order = payoff_order(book, strategy)
+            st.dataframe(
+                pd.DataFrame({
+                    "Loan No": [book["id"][i] for i in order],
+                    "Lender": [lenders[book["id"][i]] for i in order],
+                    "Rate (%)": book["rate"][order].round(2),
+                    "Balance (₹)": book["balance"][order].round().astype(int),
+                    "Extra While Targeted (₹)": allocation[order].round().astype(int),
+                    "Close By": [projected_close_date(int(close_month[i])) for i in order],
+                }),
+                use_container_width=True,
+                hide_index=True,
+            )
+            st.caption(
+                "The extra goes to one loan at a time; each closed loan's EMI "
+                "rolls into the next one."
+            )
+
     # =====================================================
     # ✅ MARK / UNDO EMI PAID (ONCE PER MONTH)
     # =====================================================
@@ -345,46 +444,47 @@ def render_loans(loans=None):
     for l in emi_loans:
         col1, col2, col3 = st.columns([4, 2, 2])
 
-        col1.markdown(f"**{l['lender']}**  \nLoan No: `{l['id']}`")
-        col2.markdown(f"EMIs Paid: **{l['months_paid']}/{l['total_months']}**")
+        col1.markdown(f"**{l.lender}**  \nLoan No: `{l.id}`")
+        col2.markdown(f"EMIs Paid: **{l.months_paid}/{l.total_months}**")
 
         # Completed loan
-        if l["months_paid"] >= l["total_months"]:
+        if l.months_paid >= l.total_months:
             col3.button(
                 "Completed",
                 disabled=True,
-                key=f"done_{l['id']}_completed",
+                key=f"done_{l.id}_completed",
                 use_container_width=True,
             )
             continue
 
         # If already paid this month -> show Undo
-        if l.get("last_paid_month") == current_month:
+        if l.last_paid_month == current_month:
             if col3.button(
                 "Undo EMI Paid",
-                key=f"undo_{l['id']}_{current_month}",
+                key=f"undo_{l.id}_{current_month}",
                 use_container_width=True,
             ):
-                for loan in loans:
-                    if loan["id"] == l["id"] and loan["months_paid"] > 0:
-                        loan["months_paid"] -= 1
-                        loan["last_paid_month"] = ""
-                        break
-                save_loans(loans)
-                st.warning(f"EMI payment undone for {l['lender']}")
+                if l.months_paid > 0:
+                    l.months_paid -= 1
+                    l.last_paid_month = ""
+                try:
+                    update_loan(l, "months_paid", "last_paid_month")
+                except LoanConflictError as e:
+                    flash_conflict(e)
+                st.warning(f"EMI payment undone for {l.lender}")
                 st.rerun()
         else:
             # Mark paid for current month
             if col3.button(
                 "Mark EMI Paid",
-                key=f"pay_{l['id']}_{current_month}",
+                key=f"pay_{l.id}_{current_month}",
                 use_container_width=True,
             ):
-                for loan in loans:
-                    if loan["id"] == l["id"]:
-                        loan["months_paid"] += 1
-                        loan["last_paid_month"] = current_month
-                        break
-                save_loans(loans)
-                st.success(f"EMI marked paid for {l['lender']}")
+                l.months_paid += 1
+                l.last_paid_month = current_month
+                try:
+                    update_loan(l, "months_paid", "last_paid_month")
+                except LoanConflictError as e:
+                    flash_conflict(e)
+                st.success(f"EMI marked paid for {l.lender}")
                 st.rerun()
\ No newline at end of file
@@ -1,34 +1,28 @@
 import streamlit as st
 from datetime import datetime
 
-from lifeos.utils.calculations import load_loans, save_loans
+from lifeos.pages.loans import flash_conflict, show_conflict
+from lifeos.utils.calculations import (
+    LoanConflictError, archive_loan, insert_loan, load_loans, loan_no_exists,
+    restore_loan, update_loan,
+)
+from lifeos.utils.models import Loan
+from lifeos.utils.rates import (
+    add_rate_change, delete_rate_change, load_rate_changes, rate_segments,
+)
 
 
 # =====================================================
 # HELPERS
 # =====================================================
 
-def normalize_loan_no(val: str) -> str:
-    return val.strip().lower()
-
-
-def loan_no_exists(loans, loan_no, exclude_id=None):
-    loan_no_norm = normalize_loan_no(loan_no)
-    for l in loans:
-        if exclude_id and l.get("id") == exclude_id:
-            continue
-        if normalize_loan_no(str(l.get("loan_no", l.get("id")))) == loan_no_norm:
-            return True
-    return False
-
-
-def validate_emi_fields(loans, loan_no, lender, principal, total_months, emi, exclude_id=None):
+def validate_emi_fields(loan_no, lender, principal, total_months, emi, exclude_id=None, months_paid=0):
     errors = []
 
     if not loan_no.strip():
         errors.append("Loan No is required")
 
-    if loan_no_exists(loans, loan_no, exclude_id=exclude_id):
+    if loan_no.strip() and loan_no_exists(loan_no, exclude_id=exclude_id):
         errors.append("Loan No already exists")
 
     if not lender.strip():
@@ -39,6 +33,8 @@ def validate_emi_fields(loans, loan_no, lender, principal, total_months, emi, ex
 
     if total_months <= 0:
         errors.append("Total months must be greater than 0")
+    elif total_months < months_paid:
+        errors.append(f"Total months can't be less than the {months_paid} EMIs already paid")
 
     if emi <= 0:
         errors.append("Monthly EMI must be greater than 0")
@@ -46,12 +42,6 @@ def validate_emi_fields(loans, loan_no, lender, principal, total_months, emi, ex
     return errors
 
 
-def emi_progress(months_paid, total_months):
-    if total_months <= 0:
-        return 0.0
-    return min(months_paid / total_months, 1.0)
-
-
 # =====================================================
 # MAIN PAGE
 # =====================================================
@@ -59,20 +49,10 @@ def emi_progress(months_paid, total_months):
 def render_manage_loans():
     st.subheader("✏️ Manage EMI Loans")
     st.caption("EMI-only · Unique Loan No · Progress tracking")
+    show_conflict()
 
     loans = load_loans()
 
-    # Normalize data
-    for l in loans:
-        l.setdefault("archived", False)
-        l.setdefault("months_paid", 0)
-        l.setdefault("extra_paid", 0)
-        l.setdefault("interest_only", False)
-        l.setdefault("last_paid_month", "")
-
-        if l.get("status") == "CLOSED":
-            l["archived"] = True
-
     # Session state
     st.session_state.setdefault("edit_id", None)
 
@@ -89,35 +69,37 @@ def render_manage_loans():
     )
     total_months = st.number_input("Total Months", min_value=0, key="add_months")
     emi = st.number_input("Monthly EMI (₹)", min_value=0, key="add_emi")
+    emi_date = st.number_input(
+        "EMI Date (day of month, 0 = unknown)", min_value=0, max_value=31, key="add_emi_date"
+    )
     interest_only = st.checkbox("Interest-only loan", key="add_interest_only")
 
     if st.button("Add EMI Loan"):
         errors = validate_emi_fields(
-            loans, loan_no, lender, principal, total_months, emi
+            loan_no, lender, principal, total_months, emi
         )
 
         if errors:
             for e in errors:
                 st.error(e)
         else:
-            loans.append({
-                "id": loan_no.strip(),
-                "loan_no": loan_no.strip(),
-                "lender": lender.strip(),
-                "type": "EMI",
-                "status": "ACTIVE",
-                "principal": principal,
-                "interest_rate": interest_rate,
-                "total_months": total_months,
-                "months_paid": 0,
-                "emi": emi,
-                "extra_paid": 0,
-                "interest_only": interest_only,
-                "archived": False,
-                "created_at": datetime.now().isoformat(),
-            })
-
-            save_loans(loans)
+            insert_loan(Loan(
+                id=loan_no.strip(),
+                loan_no=loan_no.strip(),
+                lender=lender.strip(),
+                type="EMI",
+                status="ACTIVE",
+                principal=principal,
+                interest_rate=interest_rate,
+                total_months=total_months,
+                months_paid=0,
+                emi=emi,
+                emi_date=emi_date,
+                extra_paid=0,
+                interest_only=interest_only,
+                archived=False,
+                created_at=datetime.now().isoformat(),
+            ))
             st.success("EMI loan added")
             st.rerun()
 
@@ -127,12 +109,7 @@ def render_manage_loans():
     st.markdown("---")
     st.markdown("## 📋 Active EMI Loans")
 
-    active_loans = [
-        l for l in loans
-        if l.get("type") == "EMI"
-        and l.get("status") == "ACTIVE"
-        and not l.get("archived")
-    ]
+    active_loans = [l for l in loans if l.is_active_emi]
 
     if not active_loans:
         st.info("No active EMI loans")
@@ -144,36 +121,32 @@ def render_manage_loans():
                 # Summary
                 c1.markdown(
                     f"""
-                    **{loan['lender']}**  
-                    Loan No: `{loan.get('loan_no', loan.get('id'))}`  
-                    EMI: ₹{loan['emi']:,}  
-                    Principal: ₹{loan['principal']:,}  
-                    Interest: {loan['interest_rate']}%  
+                    **{loan.lender}**  
+                    Loan No: `{loan.loan_no}`  
+                    EMI: ₹{loan.emi:,}  
+                    Principal: ₹{loan.principal:,}  
+                    Interest: {loan.interest_rate}%  
                     """
                 )
 
                 # EMI Progress
-                progress = emi_progress(
-                    loan.get("months_paid", 0),
-                    loan.get("total_months", 0)
-                )
-
                 c1.markdown(
-                    f"**EMI Progress:** {loan['months_paid']} / {loan['total_months']} months"
+                    f"**EMI Progress:** {loan.months_paid} / {loan.total_months} months"
                 )
-                c1.progress(progress)
+                c1.progress(loan.progress)
 
-                if loan.get("interest_only"):
+                if loan.interest_only:
                     c1.caption("Interest-only loan")
 
                 # Actions
-                if c2.button("✏️ Edit", key=f"edit_{loan['id']}"):
-                    st.session_state.edit_id = loan["id"]
-
-                if c2.button("🗄️ Archive", key=f"archive_{loan['id']}"):
-                    loan["archived"] = True
-                    loan["archived_at"] = datetime.now().isoformat()
-                    save_loans(loans)
+                if c2.button("✏️ Edit", key=f"edit_{loan.id}"):
+                    st.session_state.edit_id = loan.id
+
+                if c2.button("🗄️ Archive", key=f"archive_{loan.id}"):
+                    try:
+                        archive_loan(loan)
+                    except LoanConflictError as e:
+                        flash_conflict(e)
                     st.rerun()
 
     # =====================================================
@@ -183,12 +156,7 @@ def render_manage_loans():
     show_archived = st.toggle("Show archived EMI loans")
 
     if show_archived:
-        archived_loans = [
-            l for l in loans
-            if l.get("type") == "EMI"
-            and l.get("archived")
-            and l.get("status") == "ACTIVE"
-        ]
+        archived_loans = [l for l in load_loans(archive=True) if l.is_active_emi]
 
         if not archived_loans:
             st.info("No archived EMI loans")
@@ -199,53 +167,58 @@ def render_manage_loans():
 
                     c1.markdown(
                         f"""
-                        **{loan['lender']}**  
-                        Loan No: `{loan.get('loan_no', loan.get('id'))}`  
-                        EMI ₹{loan['emi']:,}  
+                        **{loan.lender}**  
+                        Loan No: `{loan.loan_no}`  
+                        EMI ₹{loan.emi:,}  
                         ⚪ ARCHIVED
                         """
                     )
 
-                    if c2.button("♻️ Restore", key=f"restore_{loan['id']}"):
-                        loan["archived"] = False
-                        loan["restored_at"] = datetime.now().isoformat()
-                        save_loans(loans)
+                    if c2.button("♻️ Restore", key=f"restore_{loan.id}"):
+                        try:
+                            restore_loan(loan)
+                        except LoanConflictError as e:
+                            flash_conflict(e)
                         st.rerun()
 
     # =====================================================
     # ✏️ EDIT EMI LOAN
     # =====================================================
     if st.session_state.edit_id:
-        loan = next(l for l in loans if l["id"] == st.session_state.edit_id)
+        loan = next(l for l in loans if l.id == st.session_state.edit_id)
 
         st.markdown("---")
         st.markdown("## ✏️ Edit EMI Loan")
 
         loan_no = st.text_input(
             "Loan No *",
-            value=loan.get("loan_no", loan.get("id")),
+            value=str(loan.loan_no),
             key="edit_loan_no"
         )
-        lender = st.text_input("Lender *", value=loan["lender"], key="edit_lender")
+        lender = st.text_input("Lender *", value=loan.lender, key="edit_lender")
         principal = st.number_input(
             "Principal (₹)", min_value=0,
-            value=int(loan["principal"]), key="edit_principal"
+            value=int(loan.principal), key="edit_principal"
         )
         interest_rate = st.number_input(
             "Interest Rate (%)", min_value=0.0, step=0.1,
-            value=float(loan["interest_rate"]), key="edit_rate"
+            value=float(loan.interest_rate), key="edit_rate"
         )
         total_months = st.number_input(
             "Total Months", min_value=0,
-            value=int(loan["total_months"]), key="edit_months"
+            value=int(loan.total_months), key="edit_months"
         )
         emi = st.number_input(
             "Monthly EMI (₹)", min_value=0,
-            value=int(loan["emi"]), key="edit_emi"
+            value=int(loan.emi), key="edit_emi"
+        )
+        emi_date = st.number_input(
+            "EMI Date (day of month, 0 = unknown)", min_value=0, max_value=31,
+            value=int(loan.emi_date), key="edit_emi_date"
         )
         interest_only = st.checkbox(
             "Interest-only loan",
-            value=loan.get("interest_only", False),
+            value=loan.interest_only,
             key="edit_interest_only"
         )
 
@@ -253,30 +226,75 @@ def render_manage_loans():
 
         if c1.button("💾 Save Changes"):
             errors = validate_emi_fields(
-                loans, loan_no, lender, principal, total_months, emi,
-                exclude_id=loan["id"]
+                loan_no, lender, principal, total_months, emi,
+                exclude_id=loan.id, months_paid=loan.months_paid,
             )
 
             if errors:
                 for e in errors:
                     st.error(e)
             else:
-                loan.update({
-                    "id": loan_no.strip(),
-                    "loan_no": loan_no.strip(),
-                    "lender": lender.strip(),
-                    "principal": principal,
-                    "interest_rate": interest_rate,
-                    "total_months": total_months,
-                    "emi": emi,
-                    "interest_only": interest_only,
-                })
-
-                save_loans(loans)
+                original_id = loan.id
+                loan.id = loan_no.strip()
+                loan.loan_no = loan_no.strip()
+                loan.lender = lender.strip()
+                loan.principal = principal
+                loan.interest_rate = interest_rate
+                loan.total_months = total_months
+                loan.emi = emi
+                loan.interest_only = interest_only
+                loan.emi_date = emi_date
+
                 st.session_state.edit_id = None
+                try:
+                    update_loan(
+                        loan, "id", "loan_no", "lender", "principal",
+                        "interest_rate", "total_months", "emi", "interest_only", "emi_date",
+                        match_id=original_id,
+                    )
+                except LoanConflictError as e:
+                    flash_conflict(e)
                 st.success("EMI loan updated")
                 st.rerun()
 
         if c2.button("Cancel"):
             st.session_state.edit_id = None
             st.rerun()
+
+        # =====================================================
+        # 📈 RATE CHANGES (FLOATING RATE)
+        # =====================================================
+        st.markdown("### 📈 Rate Changes")
+
+        changes = load_rate_changes(loan.id).get(str(loan.id), ())
+
+        for seg in rate_segments(loan, changes):
+            st.caption(
+                f"EMI {seg['from_month']}–{seg['to_month']} · "
+                f"{seg['rate']}% · EMI ₹{seg['emi']:,} · "
+                f"opening balance ₹{seg['opening_balance']:,}"
+            )
+
+        for month, rate in changes:
+            r1, r2 = st.columns([7, 3])
+            r1.markdown(f"From EMI **#{month}** → **{rate}%**")
+            if r2.button("🗑️ Remove", key=f"rate_del_{loan.id}_{month}"):
+                delete_rate_change(loan.id, month)
+                st.rerun()
+
+        r1, r2 = st.columns(2)
+        effective_month = r1.number_input(
+            "Effective from EMI #", min_value=1,
+            max_value=max(int(loan.total_months), 1),
+            value=min(int(loan.months_paid) + 1, max(int(loan.total_months), 1)),
+            key="rate_effective_month"
+        )
+        new_rate = r2.number_input(
+            "New Rate (%)", min_value=0.0, step=0.05,
+            value=float(loan.interest_rate), key="rate_new_rate"
+        )
+
+        if st.button("➕ Add Rate Change"):
+            add_rate_change(loan.id, effective_month, new_rate)
+            st.success("Rate change recorded")
+            st.rerun()
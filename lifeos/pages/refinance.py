@@ -0,0 +1,137 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+
+from lifeos.utils.calculations import active_emis, load_loans
+from lifeos.utils.rates import load_rate_changes
+from lifeos.utils.refinance import consolidation_plans, pairings, refinance_book
+
+DEFAULT_OFFERS = pd.DataFrame({
+    "Offer": ["Balance transfer"],
+    "Rate (%)": [10.5],
+    "Tenure (months)": [60],
+    "Fee (%)": [1.0],
+    "Max Amount (₹)": [2_000_000],
+})
+
+OFFER_COLUMN_CONFIG = {
+    "Rate (%)": st.column_config.NumberColumn(min_value=0.0, step=0.05, format="%.2f"),
+    "Tenure (months)": st.column_config.NumberColumn(min_value=1, step=1),
+    "Fee (%)": st.column_config.NumberColumn(min_value=0.0, step=0.1, format="%.2f"),
+    "Max Amount (₹)": st.column_config.NumberColumn(min_value=0, step=10_000, format="localized"),
+}
+
+
+def offer_arrays(df):
+    """Complete offer rows as the arrays the evaluator takes."""
+    df = df.dropna(subset=["Rate (%)", "Tenure (months)", "Max Amount (₹)"])
+    df = df[(df["Tenure (months)"] >= 1) & (df["Max Amount (₹)"] > 0)]
+    names = df["Offer"].fillna("").astype(str).str.strip()
+    return {
+        "name": [n or f"Offer {i + 1}" for i, n in enumerate(names)],
+        "rate": df["Rate (%)"].to_numpy(float),
+        "tenure": df["Tenure (months)"].to_numpy(float).round(),
+        "fee_pct": df["Fee (%)"].fillna(0).to_numpy(float),
+        "max_amount": df["Max Amount (₹)"].to_numpy(float),
+    }
+
+
+# =====================================================
+# 🔁 REFINANCE / BALANCE TRANSFER
+# =====================================================
+
+def render_refinance():
+    st.subheader("🔁 Refinance – Balance Transfer Offers")
+    st.caption(
+        "Every offer is scored against every loan; the best set of loans to move "
+        "into each offer is found within its max amount. Savings are net of the fee."
+    )
+
+    book = refinance_book(active_emis(load_loans()), load_rate_changes())
+    if not len(book["id"]):
+        st.info("No active EMI loans to refinance")
+        return
+
+    edited = st.data_editor(
+        DEFAULT_OFFERS,
+        key="refinance_offers",
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        column_config=OFFER_COLUMN_CONFIG,
+    )
+    offers = offer_arrays(edited)
+    if not len(offers["name"]):
+        st.info("Enter an offer's rate, tenure and max amount")
+        return
+
+    plans = consolidation_plans(book, offers)
+
+    # =====================================================
+    # 🏆 BEST CONSOLIDATION PLAN
+    # =====================================================
+
+    st.markdown("## 🏆 Best Consolidation Plan")
+    if not plans:
+        st.warning("None of these offers saves interest on any loan")
+    else:
+        best = plans[0]
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Offer", best["offer"])
+        c2.metric("Net Interest Saved", f"₹{best['interest_saved']:,.0f}")
+        c3.metric(
+            "New EMI", f"₹{best['new_emi']:,.0f}",
+            delta=f"₹{best['new_emi'] - best['emi_before']:,.0f}",
+            delta_color="inverse",
+        )
+        c4.metric("Processing Fee", f"₹{best['fee']:,.0f}")
+
+        moved = np.array([book["id"].index(i) for i in best["loans"]])
+        st.dataframe(
+            pd.DataFrame({
+                "Loan No": best["loans"],
+                "Lender": [book["lender"][i] for i in moved],
+                "Balance (₹)": book["balance"][moved].round().astype(int),
+                "Rate (%)": book["rate"][moved].round(2),
+                "EMI (₹)": book["emi"][moved].round().astype(int),
+                "Months Left": book["months_left"][moved].astype(int),
+            }),
+            use_container_width=True,
+            hide_index=True,
+        )
+
+        if len(plans) > 1:
+            st.markdown("### Every offer's best plan")
+            st.dataframe(
+                pd.DataFrame({
+                    "Offer": [p["offer"] for p in plans],
+                    "Loans Moved": [len(p["loans"]) for p in plans],
+                    "Amount (₹)": [round(p["amount"]) for p in plans],
+                    "Net Interest Saved (₹)": [round(p["interest_saved"]) for p in plans],
+                    "EMI Change (₹)": [round(p["new_emi"] - p["emi_before"]) for p in plans],
+                }),
+                use_container_width=True,
+                hide_index=True,
+            )
+
+    # =====================================================
+    # 🔍 OFFER × LOAN PAIRINGS
+    # =====================================================
+
+    with st.expander("🔍 Every offer × loan pairing"):
+        matrix = pairings(book, offers)
+        n_offers, n_loans = matrix["saving"].shape
+        o, l = np.divmod(np.arange(n_offers * n_loans), n_loans)
+        df = pd.DataFrame({
+            "Offer": np.asarray(offers["name"], dtype=object)[o],
+            "Loan No": np.asarray(book["id"], dtype=object)[l],
+            "Net Interest Saved (₹)": matrix["saving"].ravel().round().astype(int),
+            "New EMI (₹)": matrix["new_emi"].ravel().round().astype(int),
+            "EMI Change (₹)": matrix["emi_change"].ravel().round().astype(int),
+            "Within Max": matrix["fits"].ravel(),
+        })
+        st.dataframe(
+            df.sort_values("Net Interest Saved (₹)", ascending=False),
+            use_container_width=True,
+            hide_index=True,
+        )
@@ -0,0 +1,204 @@
+import streamlit as st
+import pandas as pd
+from dataclasses import replace
+
+from lifeos.utils.calculations import load_loans
+from lifeos.utils.models import Expense, Loan
+from lifeos.utils.scenarios import (
+    METRICS, create_scenario, delete_scenario, diff_expenses, diff_loans,
+    evaluate_scenarios, list_scenarios, save_overlay, scenario_expenses, scenario_loans,
+)
+
+LOAN_EDIT_FIELDS = (
+    "id", "lender", "type", "principal", "emi", "total_months", "months_paid", "interest_rate",
+)
+SCENARIO_LOAN_COLUMNS = {
+    "id": st.column_config.TextColumn("Loan No", required=True),
+    "lender": st.column_config.TextColumn("Lender"),
+    "type": st.column_config.SelectboxColumn("Type", options=["EMI", "SETTLEMENT"], default="EMI"),
+    "principal": st.column_config.NumberColumn("Principal (₹)", min_value=0, format="localized"),
+    "emi": st.column_config.NumberColumn("EMI (₹)", min_value=0, format="localized"),
+    "total_months": st.column_config.NumberColumn("Total Months", min_value=0),
+    "months_paid": st.column_config.NumberColumn("Months Paid", min_value=0),
+    "interest_rate": st.column_config.NumberColumn("Rate (%)", min_value=0.0, format="%.2f"),
+}
+SCENARIO_EXPENSE_COLUMNS = {
+    "type": st.column_config.SelectboxColumn(
+        "Type", options=["fixed", "variable"], default="fixed", required=True
+    ),
+    "name": st.column_config.TextColumn("Expense", required=True),
+    "amount": st.column_config.NumberColumn("Amount (₹)", min_value=0, format="localized"),
+    "category": st.column_config.TextColumn("Category"),
+}
+
+METRIC_LABELS = {
+    "income": "Income (₹)",
+    "expenses": "Expenses (₹)",
+    "total_emi": "Monthly EMI (₹)",
+    "surplus": "Surplus (₹)",
+    "free_cash_after_emi": "Free Cash After EMI (₹)",
+    "living_cost_ratio": "Expenses / Income (%)",
+    "debt_pressure_ratio": "EMI / Income (%)",
+    "savings_capacity_ratio": "Surplus / Income (%)",
+    "active_emis": "Active EMIs",
+    "balance": "EMI Balance (₹)",
+    "debt_free_months": "Months to Debt-Free",
+}
+
+
+def editor_frame(rows, columns):
+    return pd.DataFrame(rows, columns=columns)
+
+
+def records(df):
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def edited_loans(df, resolved):
+    """Editor rows back to Loans; untouched fields come from the loan as
+    the scenario already sees it."""
+    by_id = {str(l.id): l for l in resolved}
+    loans = []
+    for row in records(df):
+        loan_id = str(row.get("id") or "").strip()
+        if not loan_id:
+            continue
+        values = {
+            "lender": row.get("lender") or "",
+            "type": row.get("type") or "EMI",
+            "principal": int(row.get("principal") or 0),
+            "emi": int(row.get("emi") or 0),
+            "total_months": int(row.get("total_months") or 0),
+            "months_paid": int(row.get("months_paid") or 0),
+            "interest_rate": float(row.get("interest_rate") or 0),
+        }
+        current = by_id.get(loan_id)
+        loans.append(replace(current, **values) if current else Loan(id=loan_id, **values))
+    return loans
+
+
+def edited_expenses(df):
+    return [
+        Expense.from_row({**row, "amount": int(row.get("amount") or 0)})
+        for row in records(df)
+        if str(row.get("name") or "").strip()
+    ]
+
+
+def comparison_table(results, names):
+    table = pd.DataFrame(
+        {names.get(i, "Live"): [results[i][m] for m in METRICS] for i in results},
+        index=[METRIC_LABELS[m] for m in METRICS],
+    )
+    ratios = [METRIC_LABELS[m] for m in METRICS if m.endswith("_ratio")]
+    table.loc[ratios] = table.loc[ratios] * 100
+    return table.astype(float).round(1)
+
+
+# =====================================================
+# 🧪 WHAT-IF SCENARIOS
+# =====================================================
+
+def render_scenarios():
+    st.subheader("🧪 What-If Scenarios")
+    st.caption(
+        "A scenario stores only the loans and expenses it changes, adds or removes. "
+        "Your real data is never touched, and edits to it show through every scenario."
+    )
+
+    c1, c2 = st.columns([3, 1])
+    name = c1.text_input("New scenario", key="new_scenario", placeholder="e.g. Close Mama loans early")
+    if c2.button("➕ Create", use_container_width=True):
+        try:
+            create_scenario(name)
+            st.rerun()
+        except ValueError as e:
+            st.error(str(e))
+
+    scenarios = list_scenarios()
+    if not scenarios:
+        st.info("Create a scenario to try changes without editing your real loans")
+        return
+    names = dict(scenarios)
+    selected = st.selectbox("Scenario", list(names), format_func=names.get)
+
+    # =====================================================
+    # ✏️ EDIT SCENARIO
+    # =====================================================
+
+    base_loans = load_loans()
+    base_expenses = scenario_expenses()
+    resolved = scenario_loans(selected)
+
+    st.markdown("## 💳 Loans in this scenario")
+    st.caption("Change any value, delete a row to pay a loan off, or add a row for a new loan")
+    loan_df = st.data_editor(
+        editor_frame(
+            [{f: getattr(l, f) for f in LOAN_EDIT_FIELDS} for l in resolved], LOAN_EDIT_FIELDS
+        ),
+        key=f"scenario_loans_{selected}",
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        column_config=SCENARIO_LOAN_COLUMNS,
+    )
+
+    st.markdown("## 🧾 Recurring expenses in this scenario")
+    expense_df = st.data_editor(
+        editor_frame(
+            [
+                {"type": e.type, "name": e.name, "amount": e.amount, "category": e.category}
+                for e in scenario_expenses(selected)
+            ],
+            list(SCENARIO_EXPENSE_COLUMNS),
+        ),
+        key=f"scenario_expenses_{selected}",
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        column_config=SCENARIO_EXPENSE_COLUMNS,
+    )
+
+    loan_rows = diff_loans(base_loans, edited_loans(loan_df, resolved))
+    expense_rows = diff_expenses(base_expenses, edited_expenses(expense_df))
+    st.caption(
+        f"{len(loan_rows)} loan and {len(expense_rows)} expense differences from your real data"
+    )
+
+    b1, b2 = st.columns(2)
+    if b1.button("💾 Save Scenario", use_container_width=True):
+        save_overlay(selected, loan_rows, expense_rows)
+        st.success("Scenario saved ✅")
+    if b2.button("🗑️ Delete Scenario", use_container_width=True):
+        delete_scenario(selected)
+        st.rerun()
+
+    # =====================================================
+    # 📊 COMPARISON
+    # =====================================================
+
+    results = evaluate_scenarios(list(names))
+    live, chosen = results[None], results[selected]
+
+    st.markdown(f"## 📊 {names[selected]} vs Live")
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric(
+        "Monthly EMI", f"₹{chosen['total_emi']:,}",
+        delta=f"₹{chosen['total_emi'] - live['total_emi']:,}", delta_color="inverse",
+    )
+    m2.metric(
+        "Free Cash After EMI", f"₹{chosen['free_cash_after_emi']:,}",
+        delta=f"₹{chosen['free_cash_after_emi'] - live['free_cash_after_emi']:,}",
+    )
+    m3.metric(
+        "EMI / Income", f"{chosen['debt_pressure_ratio'] * 100:.1f}%",
+        delta=f"{(chosen['debt_pressure_ratio'] - live['debt_pressure_ratio']) * 100:.1f} pts",
+        delta_color="inverse",
+    )
+    m4.metric(
+        "Months to Debt-Free", chosen["debt_free_months"],
+        delta=chosen["debt_free_months"] - live["debt_free_months"], delta_color="inverse",
+    )
+
+    st.markdown("### Every scenario side by side")
+    st.dataframe(comparison_table(results, names), use_container_width=True)
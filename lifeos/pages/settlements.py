@@ -0,0 +1,111 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+
+from lifeos.utils.settlements import (
+    BENCHMARK_PCT,
+    closed_settlement_stats,
+    load_settlement_columns,
+    settlement_metrics,
+)
+
+
+# =====================================================
+# 🎨 TABLE FORMAT
+# =====================================================
+
+def benchmark_status(vs_benchmark):
+    """🟢 below the benchmark, 🔴 above, ⚪ on it, — without an offer."""
+    return np.select(
+        [np.isnan(vs_benchmark), vs_benchmark < 0, vs_benchmark > 0],
+        ["—", "🟢", "🔴"],
+        "⚪",
+    )
+
+
+VS_BENCHMARK = f"vs {BENCHMARK_PCT:.0f}% (pp)"
+SETTLEMENT_COLUMN_CONFIG = {
+    "Status": st.column_config.TextColumn("", width="small"),
+    "Offer (%)": st.column_config.NumberColumn(format="%.1f"),
+    VS_BENCHMARK: st.column_config.NumberColumn(format="%+.1f"),
+    **{
+        c: st.column_config.NumberColumn(format="localized")
+        for c in ("Principal (₹)", "Latest Offer (₹)", f"{BENCHMARK_PCT:.0f}% Target (₹)", "Savings (₹)")
+    },
+}
+
+
+# =====================================================
+# 🤝 SETTLEMENTS PAGE
+# =====================================================
+
+def render_settlements():
+    st.subheader("🤝 Settlements – 31% Benchmark")
+    st.caption(
+        f"Offers at or below {BENCHMARK_PCT:.0f}% of principal beat the benchmark"
+    )
+
+    cols = load_settlement_columns("ACTIVE")
+    metrics = settlement_metrics(cols)
+
+    # =====================================================
+    # 📌 ACTIVE SETTLEMENTS
+    # =====================================================
+
+    st.markdown("## 📌 Active Settlements")
+
+    if not len(cols["id"]):
+        st.info("No active settlements")
+    else:
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Active Settlements", len(cols["id"]))
+        c2.metric("Principal", f"₹{int(cols['principal'].sum()):,}")
+        c3.metric("Savings vs Full Payoff", f"₹{int(metrics['savings'].sum()):,}")
+
+        df = pd.DataFrame({
+            "Status": benchmark_status(metrics["vs_benchmark"]),
+            "Loan No": cols["id"],
+            "Lender": cols["lender"],
+            "Principal (₹)": cols["principal"],
+            "Latest Offer (₹)": cols["latest_offer"],
+            "Offer (%)": metrics["offer_pct"],
+            VS_BENCHMARK: metrics["vs_benchmark"],
+            f"{BENCHMARK_PCT:.0f}% Target (₹)": metrics["benchmark_amount"],
+            "Savings (₹)": metrics["savings"],
+        })
+
+        st.dataframe(
+            df,
+            use_container_width=True,
+            hide_index=True,
+            column_config=SETTLEMENT_COLUMN_CONFIG,
+        )
+
+    # =====================================================
+    # ✅ CLOSED LOAN ANALYSIS
+    # =====================================================
+
+    st.markdown("## ✅ Closed Loan Analysis")
+    stats = closed_settlement_stats()
+
+    if not stats["count"]:
+        st.info("No closed settlements yet")
+        return
+
+    # settled amounts (and so savings) are only known where an offer was
+    # recorded
+    recorded = stats["with_offer"] > 0
+    s1, s2, s3, s4, s5 = st.columns(5)
+    s1.metric("Closed", stats["count"])
+    s2.metric("Principal", f"₹{stats['principal']:,}")
+    s3.metric("Settled For", f"₹{stats['settled']:,}" if recorded else "—")
+    s4.metric("Saved", f"₹{stats['saved']:,}" if recorded else "—")
+    s5.metric("Avg Settlement", f"{stats['avg_pct']}%" if recorded else "—")
+
+    if recorded:
+        st.caption(
+            f"{stats['within_benchmark']} of {stats['with_offer']} closed settlements "
+            f"with a settled amount landed at or below the {BENCHMARK_PCT:.0f}% benchmark"
+        )
+    else:
+        st.caption("No settled amounts recorded for closed settlements yet")
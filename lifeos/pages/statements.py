@@ -0,0 +1,70 @@
+import streamlit as st
+import pandas as pd
+
+from lifeos.utils.calculations import active_emis, load_loans
+from lifeos.utils.statements import (
+    DATE_WINDOW_DAYS, iter_statement, match_transactions, post_payments,
+)
+
+
+# =====================================================
+# 🏦 BANK STATEMENT RECONCILIATION
+# =====================================================
+
+def render_statements():
+    st.subheader("🏦 Bank Statements – Auto-reconcile EMIs")
+    st.caption(
+        "Debits are matched to active EMI loans by amount, lender name / loan no "
+        "and EMI date. Importing the same statement twice posts nothing new."
+    )
+
+    uploaded = st.file_uploader(
+        "Statement (CSV or OFX)", type=["csv", "ofx", "qfx"], key="statement_file"
+    )
+    window = st.slider(
+        "EMI date window (± days)", min_value=0, max_value=10, value=DATE_WINDOW_DAYS
+    )
+
+    if uploaded is None:
+        st.info("Upload a bank statement to find EMI payments")
+        return
+
+    emi_loans = active_emis(load_loans())
+    if not emi_loans:
+        st.info("No active EMI loans to reconcile")
+        return
+
+    matches, ambiguous = match_transactions(
+        iter_statement(uploaded, uploaded.name), emi_loans, window
+    )
+
+    c1, c2 = st.columns(2)
+    c1.metric("Matched EMI Debits", len(matches))
+    c2.metric("Ambiguous", ambiguous)
+
+    if not matches:
+        st.warning("No EMI payments found in this statement")
+        return
+
+    st.dataframe(
+        pd.DataFrame({
+            "Date": [m.transaction.date for m in matches],
+            "Amount (₹)": [m.transaction.amount for m in matches],
+            "Description": [m.transaction.description for m in matches],
+            "Loan No": [str(m.loan.id) for m in matches],
+            "Lender": [m.loan.lender for m in matches],
+            "Confidence": ["High" if m.score >= 3 else "Medium" for m in matches],
+        }),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+    if st.button(f"✅ Post {len(matches)} payments"):
+        posted = post_payments(matches)
+        if posted:
+            st.success(
+                "Posted "
+                + ", ".join(f"{n} EMI(s) to `{loan_id}`" for loan_id, n in posted.items())
+            )
+        else:
+            st.info("These payments were already posted")
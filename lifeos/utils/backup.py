@@ -0,0 +1,187 @@
+import gzip
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+from lifeos.utils.db import DATA_DIR, active_profile, get_connection, init_db
+
+# -------------------------------------------------
+# SETTINGS
+# -------------------------------------------------
+BACKUP_DIR = DATA_DIR / "backups"
+SNAPSHOT_INTERVAL = 60 * 60  # seconds between automatic snapshots
+KEEP_LATEST = 12  # always kept
+KEEP_DAILY = 30  # plus the newest snapshot of each of the last N days
+STAMP_FORMAT = "%Y%m%dT%H%M%S-%f"
+SNAPSHOT_PAGES = 256  # pages copied per backup step
+SNAPSHOT_PAUSE = 0.005  # seconds between steps, with the source unlocked
+
+_lock = threading.Lock()
+_running = set()  # profiles with a snapshot in progress
+_last_snapshot = {}  # profile -> time.time() of the last one
+
+
+# -------------------------------------------------
+# SNAPSHOTS
+# -------------------------------------------------
+# A snapshot is a gzip of a consistent copy made with SQLite's online
+# backup API. The source is only read (WAL readers never block writers),
+# and the copy is written to a temp file before being compressed, so the
+# live database is never touched. The copy goes SNAPSHOT_PAGES at a time
+# with a pause between steps: the source is only locked during a step, so
+# writers (and the in-memory mode, whose RAM copy has a single lock) get
+# a turn between batches instead of waiting out the whole copy.
+def snapshot_dir(profile=None):
+    return BACKUP_DIR / (profile or active_profile())
+
+
+def list_snapshots(profile=None):
+    """[(datetime, path)] oldest first."""
+    folder = snapshot_dir(profile)
+    if not folder.exists():
+        return []
+    snapshots = []
+    for path in folder.glob("*.db.gz"):
+        try:
+            taken = datetime.strptime(path.name.split(".")[0], STAMP_FORMAT)
+            snapshots.append((taken, path))
+        except ValueError:
+            continue
+    return sorted(snapshots)
+
+
+def create_snapshot(profile=None, pause=time.sleep):
+    """Snapshot the profile's database; pause(seconds) runs between backup
+    steps."""
+    profile = profile or active_profile()
+    init_db(profile)
+
+    folder = snapshot_dir(profile)
+    folder.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime(STAMP_FORMAT)
+    target = folder / f"{stamp}.db.gz"
+    copy = folder / f"{stamp}.db.tmp"
+
+    src = get_connection(profile)
+    dst = sqlite3.connect(copy)
+    try:
+        src.backup(
+            dst, pages=SNAPSHOT_PAGES,
+            progress=lambda status, remaining, total: pause(SNAPSHOT_PAUSE),
+        )
+    finally:
+        dst.close()
+        src.close()
+
+    with open(copy, "rb") as raw, gzip.open(target, "wb", compresslevel=6) as gz:
+        shutil.copyfileobj(raw, gz, 1024 * 1024)
+    copy.unlink()
+
+    _last_snapshot[profile] = time.time()
+    prune_snapshots(profile)
+    return target
+
+
+def prune_snapshots(profile=None, now=None):
+    """Keep the newest KEEP_LATEST snapshots and the newest one of each of
+    the last KEEP_DAILY days; delete the rest."""
+    now = now or datetime.now()
+    oldest_day = (now - timedelta(days=KEEP_DAILY)).date()
+
+    keep, days = set(), set()
+    for i, (taken, path) in enumerate(reversed(list_snapshots(profile))):
+        day = taken.date()
+        if i < KEEP_LATEST or (day > oldest_day and day not in days):
+            keep.add(path)
+        days.add(day)
+
+    removed = 0
+    for _, path in list_snapshots(profile):
+        if path not in keep:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+def snapshot_in_background(profile=None, force=False):
+    """Start a snapshot on a worker thread if the last one is older than
+    SNAPSHOT_INTERVAL. Returns immediately; safe to call on every rerun."""
+    profile = profile or active_profile()
+
+    with _lock:
+        if profile in _running:
+            return False
+        if profile not in _last_snapshot:
+            snapshots = list_snapshots(profile)
+            _last_snapshot[profile] = snapshots[-1][0].timestamp() if snapshots else 0
+        if not force and time.time() - _last_snapshot[profile] < SNAPSHOT_INTERVAL:
+            return False
+        _running.add(profile)
+
+    def run():
+        try:
+            create_snapshot(profile)
+        finally:
+            with _lock:
+                _running.discard(profile)
+
+    threading.Thread(target=run, name=f"snapshot-{profile}", daemon=True).start()
+    return True
+
+
+def snapshot_running(profile=None):
+    return (profile or active_profile()) in _running
+
+
+# -------------------------------------------------
+# RESTORE
+# -------------------------------------------------
+def snapshot_at(when, profile=None):
+    """Newest snapshot taken at or before ``when`` (None if there is none)."""
+    snapshots = list_snapshots(profile)
+    i = bisect_right([taken for taken, _ in snapshots], when)
+    return snapshots[i - 1] if i else None
+
+
+def restore_snapshot(path, profile=None):
+    """Replace the live database with a snapshot.
+
+    The current state is snapshotted first, so a restore can be undone.
+    The snapshot is copied in through the backup API as well, so open
+    connections simply see the restored pages on their next read.
+    """
+    profile = profile or active_profile()
+    copy = path.with_suffix(".restore")
+    with gzip.open(path, "rb") as gz, open(copy, "wb") as raw:
+        shutil.copyfileobj(gz, raw, 1024 * 1024)
+
+    create_snapshot(profile)
+
+    live = get_connection(profile)
+    versions = dict(live.execute("SELECT name, version FROM data_versions"))
+    src = sqlite3.connect(copy)
+    try:
+        src.backup(live)
+    finally:
+        src.close()
+        live.close()
+        copy.unlink()
+
+    # an older snapshot may predate some migrations
+    init_db(profile, force=True)
+
+    # change counters only move forward, so results cached against the
+    # pre-restore versions can never match again; a snapshot of an earlier
+    # incarnation of the file brings its identity along, so it gets a new one
+    conn = get_connection(profile)
+    conn.executemany(
+        "UPDATE data_versions SET version = MAX(version, ?) + 1 WHERE name = ?",
+        [(version, name) for name, version in versions.items()],
+    )
+    conn.execute("UPDATE db_meta SET identity = ?", (uuid.uuid4().hex,))
+    conn.commit()
+    conn.close()
@@ -0,0 +1,247 @@
+import argparse
+import atexit
+import hashlib
+import pickle
+import sqlite3
+import threading
+import time
+
+from lifeos.utils.db import DATA_DIR, data_version, db_identity, db_path
+
+# -------------------------------------------------
+# SETTINGS
+# -------------------------------------------------
+# Results of expensive loan-book computations (payoff goal seek, EMI
+# schedules) live in their own SQLite file, so every session and every
+# server process reads what any one of them computed, and a restart
+# starts warm. It is disposable: deleting cache.db only costs recomputes.
+CACHE_PATH = DATA_DIR / "cache.db"
+MAX_BYTES = 64 * 1024 * 1024  # least recently used results go first
+TOUCH_INTERVAL = 60  # seconds; last_used is refreshed at most this often
+FLUSH_INTERVAL = 30  # seconds between hit/miss counter writes
+
+# tables whose change counters (see db._version_triggers) make up the
+# loan-book version
+BOOK_TABLES = ("loans", "rate_changes")
+
+_lock = threading.Lock()
+_ready = set()
+# name -> [hits, misses]: since this process started / not yet on disk
+_counters = {}
+_pending = {}
+_last_flush = [time.monotonic()]
+
+
+def _connect():
+    CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(CACHE_PATH, timeout=1, check_same_thread=False)
+    if CACHE_PATH not in _ready:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS results (
+            key TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            value BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            last_used REAL NOT NULL
+        )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_results_last_used ON results (last_used)")
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS counters (
+            name TEXT PRIMARY KEY,
+            hits INTEGER NOT NULL DEFAULT 0,
+            misses INTEGER NOT NULL DEFAULT 0
+        )
+        """)
+        conn.commit()
+        _ready.add(CACHE_PATH)
+    return conn
+
+
+# -------------------------------------------------
+# KEYS
+# -------------------------------------------------
+def book_version(profile=None):
+    return tuple(data_version(table, profile) for table in BOOK_TABLES)
+
+
+def cache_key(name, params, profile=None):
+    """sha256 of the computation name, its parameters, and the identity
+    and loan-book version of the profile's database. The identity tells a
+    recreated file apart, whose version counters start over."""
+    raw = repr((
+        name, params, str(db_path(profile)), db_identity(profile), book_version(profile),
+    ))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+# -------------------------------------------------
+# COUNTERS
+# -------------------------------------------------
+def _count(name, hit):
+    with _lock:
+        for counters in (_counters, _pending):
+            counters.setdefault(name, [0, 0])[0 if hit else 1] += 1
+
+
+def _flush(conn, force=False):
+    with _lock:
+        if not _pending or (not force and time.monotonic() - _last_flush[0] < FLUSH_INTERVAL):
+            return
+        pending = dict(_pending)
+        _pending.clear()
+        _last_flush[0] = time.monotonic()
+
+    with conn:
+        conn.executemany(
+            "INSERT INTO counters (name, hits, misses) VALUES (?, ?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET "
+            "hits = hits + excluded.hits, misses = misses + excluded.misses",
+            [(name, hits, misses) for name, (hits, misses) in pending.items()],
+        )
+
+
+def _try_flush(conn, force=False):
+    try:
+        _flush(conn, force)
+    except sqlite3.OperationalError:
+        pass
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        conn = _connect()
+    except sqlite3.Error:
+        return
+    _try_flush(conn, force=True)
+    conn.close()
+
+
+def cache_stats():
+    """Entries and bytes on disk, plus hits/misses per computation: this
+    process since it started, and all processes (flushed periodically)."""
+    conn = _connect()
+    try:
+        _try_flush(conn, force=True)
+        entries, size = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()
+        total = {name: (hits, misses) for name, hits, misses in conn.execute(
+            "SELECT name, hits, misses FROM counters ORDER BY name"
+        )}
+    finally:
+        conn.close()
+    with _lock:
+        process = {name: tuple(c) for name, c in _counters.items()}
+    return {"entries": entries, "bytes": size, "process": process, "total": total}
+
+
+# -------------------------------------------------
+# CACHE
+# -------------------------------------------------
+def cached(name, params, compute, profile=None):
+    """compute() once per (name, params, loan-book version); later calls,
+    from any session or process, unpickle the stored result.
+
+    The cache is best effort: if cache.db is locked or unreadable the
+    result is simply computed.
+    """
+    key = cache_key(name, params, profile)
+    now = time.time()
+
+    try:
+        conn = _connect()
+    except sqlite3.Error:
+        _count(name, hit=False)
+        return compute()
+
+    try:
+        try:
+            row = conn.execute(
+                "SELECT value, last_used FROM results WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            row = None
+
+        if row is not None:
+            try:
+                value = pickle.loads(row[0])
+            except Exception:
+                row = None
+        if row is not None:
+            _count(name, hit=True)
+            if now - row[1] > TOUCH_INTERVAL:
+                try:
+                    with conn:
+                        conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (now, key))
+                except sqlite3.OperationalError:
+                    pass
+            _try_flush(conn)
+            return value
+
+        _count(name, hit=False)
+        value = compute()
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO results (key, name, value, size, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, name, blob, len(blob), now),
+                )
+                _evict(conn)
+        except sqlite3.OperationalError:
+            pass
+        _try_flush(conn)
+        return value
+    finally:
+        conn.close()
+
+
+def _evict(conn, max_bytes=None):
+    # keep the most recently used results that fit in max_bytes
+    return conn.execute("""
+    DELETE FROM results WHERE key IN (
+        SELECT key FROM (
+            SELECT key, SUM(size) OVER (ORDER BY last_used DESC, key) AS running
+            FROM results
+        ) WHERE running > ?
+    )
+    """, (MAX_BYTES if max_bytes is None else max_bytes,)).rowcount
+
+
+def clear_cache():
+    conn = _connect()
+    with conn:
+        removed = conn.execute("DELETE FROM results").rowcount
+        conn.execute("DELETE FROM counters")
+    conn.close()
+    with _lock:
+        _counters.clear()
+        _pending.clear()
+    return removed
+
+
+# -------------------------------------------------
+# COMMAND LINE
+# -------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Result cache statistics")
+    parser.add_argument("--clear", action="store_true", help="drop every cached result")
+    args = parser.parse_args(argv)
+
+    if args.clear:
+        print(f"removed {clear_cache()} cached results")
+        return
+
+    stats = cache_stats()
+    print(f"{stats['entries']} results, {stats['bytes'] / 1024:.0f} KB of {MAX_BYTES // 1024 // 1024} MB")
+    for name, (hits, misses) in stats["total"].items():
+        rate = hits / (hits + misses) * 100 if hits + misses else 0
+        print(f"  {name:<28} hits {hits:>7}  misses {misses:>7}  ({rate:.0f}% hit)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 import json
+from datetime import datetime
 from pathlib import Path
 
+import numpy as np
+
 # -------------------------------------------------
 # DATA FILE PATH
 # -------------------------------------------------
@@ -10,74 +13,277 @@ DATA_PATH = Path(__file__).resolve().parents[1] / "data" / "loans.json"
 # -------------------------------------------------
 # LOAD / SAVE
 # -------------------------------------------------
-from lifeos.utils.db import get_connection, init_db
+from lifeos.utils.db import COLD_LOANS, get_connection, init_db, write_transaction
+from lifeos.utils.income import (
+    INCOME_FIELDS, income_projection, load_income_streams, project_income,
+)
+from lifeos.utils.models import Expense, Loan
 
-def load_loans():
-    init_db()  # ensure tables exist
+def load_loans(profile=None, archive=False):
+    """Live loans, or with archive=True the closed and archived ones."""
+    init_db(profile)  # ensure tables exist
+    table = "loans_archive" if archive else "loans"
 
-    conn = get_connection()
+    conn = get_connection(profile)
     cur = conn.cursor()
 
-    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='loans'")
+    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,))
     if not cur.fetchone():
         conn.close()
         return []
 
-    cur.execute("SELECT * FROM loans")
+    cur.execute(f"SELECT * FROM {table}")
     cols = [c[0] for c in cur.description]
-    loans = [dict(zip(cols, row)) for row in cur.fetchall()]
+    loans = [Loan.from_row(dict(zip(cols, row))) for row in cur.fetchall()]
 
     conn.close()
     return loans
 
 
-def save_loans(loans):
-    conn = get_connection()
-    cur = conn.cursor()
+# Loan fields that have a column in the loans table
+LOAN_DB_FIELDS = (
+    "id", "lender", "type", "status", "principal", "emi",
+    "total_months", "months_paid", "interest_rate",
+    "extra_paid", "latest_offer", "last_paid_month", "version", "emi_date",
+    "loan_no", "interest_only", "archived", "created_at", "archived_at", "restored_at",
+)
+
+
+class LoanConflictError(Exception):
+    """A loan was changed by another session since it was loaded."""
+
+    def __init__(self, loan_ids):
+        self.loan_ids = list(loan_ids)
+        super().__init__(
+            "Loan "
+            + ", ".join(f"`{i}`" for i in self.loan_ids)
+            + " was changed in another session. Reloaded the latest values — please retry."
+        )
+
+
+def save_loans(loans, profile=None):
+    # Bulk rewrite, for imports and seeding only. Interactive edits go through
+    # insert_loan/update_loan so concurrent sessions don't overwrite each other.
+    # Upsert rather than delete-all, so rate changes and posted payments of
+    # loans that are kept stay with them. Foreign keys are off (archived
+    # loans' history points at loans_archive), so dropped loans' history is
+    # deleted by hand.
+    columns = ", ".join(LOAN_DB_FIELDS)
+    placeholders = ", ".join("?" for _ in LOAN_DB_FIELDS)
+    updates = ", ".join(f"{f} = excluded.{f}" for f in LOAN_DB_FIELDS if f != "id")
+    kept = "(SELECT value FROM json_each(?))"
+    ids = (json.dumps([str(l.id) for l in loans]),)
+
+    with write_transaction(profile, foreign_keys=False) as conn:
+        for child in ("rate_changes", "statement_payments"):
+            conn.execute(f"DELETE FROM {child} WHERE loan_id NOT IN {kept}", ids)
+        conn.execute(f"DELETE FROM loans WHERE id NOT IN {kept}", ids)
+        # everything goes through the hot table and is re-sorted below
+        conn.execute("DELETE FROM loans_archive")
+        conn.executemany(
+            f"INSERT INTO loans ({columns}) VALUES ({placeholders}) "
+            f"ON CONFLICT (id) DO UPDATE SET {updates}",
+            [tuple(getattr(l, f) for f in LOAN_DB_FIELDS) for l in loans]
+        )
+        _move_loans(conn, "loans", "loans_archive", COLD_LOANS)
+
+
+# -------------------------------------------------
+# HOT / COLD
+# -------------------------------------------------
+# Closed and archived loans live in loans_archive, so the loans table every
+# page reads holds only live ones. Moves run with foreign keys off: rate
+# changes and posted payments keep pointing at the loan id wherever the
+# loan is (ON DELETE CASCADE would remove them) and are there again on
+# restore.
+def _move_loans(conn, source, target, where, params=()):
+    conn.execute(f"INSERT INTO {target} SELECT * FROM {source} WHERE {where}", params)
+    return conn.execute(f"DELETE FROM {source} WHERE {where}", params).rowcount
+
+
+def archive_cold_loans(profile=None):
+    """Move every closed or archived loan still in the hot table."""
+    init_db(profile)
+    with write_transaction(profile, foreign_keys=False) as conn:
+        return _move_loans(conn, "loans", "loans_archive", COLD_LOANS)
+
+
+def archive_loan(loan, profile=None):
+    """Mark archived (compare-and-swap like update_loan) and move it out."""
+    loan.archived = True
+    loan.archived_at = datetime.now().isoformat()
+    with write_transaction(profile, foreign_keys=False) as conn:
+        _compare_and_swap(conn, "loans", loan, ("archived", "archived_at"), loan.id)
+        _move_loans(conn, "loans", "loans_archive", "id = ?", (loan.id,))
+    loan.version += 1
+
+
+def restore_loan(loan, profile=None):
+    """Unarchive a loan and move it back to the hot table."""
+    loan.archived = False
+    loan.restored_at = datetime.now().isoformat()
+    with write_transaction(profile, foreign_keys=False) as conn:
+        _compare_and_swap(conn, "loans_archive", loan, ("archived", "restored_at"), loan.id)
+        _move_loans(conn, "loans_archive", "loans", "id = ?", (loan.id,))
+    loan.version += 1
 
-    cur.execute("DELETE FROM loans")
-
-    for l in loans:
-        cur.execute("""
-        INSERT INTO loans (
-            id, lender, type, status, principal, emi,
-            total_months, months_paid, interest_rate,
-            extra_paid, latest_offer, last_paid_month
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            l["id"], l["lender"], l["type"], l["status"],
-            l["principal"], l["emi"],
-            l["total_months"], l["months_paid"],
-            l.get("interest_rate", 0),
-            l.get("extra_paid", 0),
-            l.get("latest_offer", 0),
-            l.get("last_paid_month", "")
-        ))
-
-    conn.commit()
+
+def loan_no_exists(loan_no, exclude_id=None, profile=None):
+    """Case- and whitespace-insensitive Loan No lookup (idx_loans_loan_no
+    and idx_loans_archive_loan_no)."""
+    init_db(profile)
+    key = (loan_no.strip().lower(), None if exclude_id is None else str(exclude_id))
+    conn = get_connection(profile)
+    # archived loans keep their number (they can be restored)
+    row = conn.execute(
+        "SELECT 1 FROM loans WHERE lower(trim(loan_no)) = ? AND id IS NOT ? "
+        "UNION ALL "
+        "SELECT 1 FROM loans_archive WHERE lower(trim(loan_no)) = ? AND id IS NOT ? "
+        "LIMIT 1",
+        key + key,
+    ).fetchone()
     conn.close()
+    return row is not None
+
+
+def insert_loan(loan, profile=None):
+    columns = ", ".join(LOAN_DB_FIELDS)
+    placeholders = ", ".join("?" for _ in LOAN_DB_FIELDS)
+
+    with write_transaction(profile) as conn:
+        conn.execute(
+            f"INSERT INTO loans ({columns}) VALUES ({placeholders})",
+            tuple(getattr(loan, f) for f in LOAN_DB_FIELDS)
+        )
+
+
+def update_loan(loan, *fields, match_id=None, profile=None):
+    """Compare-and-swap update of the given fields.
+
+    Succeeds only if the row still has the version this loan was loaded
+    with; otherwise raises LoanConflictError and nothing is written.
+    match_id is the id the row was loaded under, when the id itself changes
+    (rate changes and posted payments follow through ON UPDATE CASCADE).
+    """
+    match_id = loan.id if match_id is None else match_id
+    with write_transaction(profile) as conn:
+        _compare_and_swap(conn, "loans", loan, fields, match_id)
+
+    loan.version += 1
+
+
+def _compare_and_swap(conn, table, loan, fields, match_id):
+    fields = [f for f in fields if f in LOAN_DB_FIELDS and f != "version"]
+    assignments = "".join(f"{f} = ?, " for f in fields)
+    cur = conn.execute(
+        f"UPDATE {table} SET {assignments}version = version + 1 "
+        "WHERE id = ? AND version = ?",
+        (*(getattr(loan, f) for f in fields), match_id, loan.version)
+    )
+    if cur.rowcount == 0:
+        raise LoanConflictError([match_id])
+
+
+def update_extra_paid(changes, versions, profile=None):
+    """Persist {loan_id: extra_paid} for only the loans that changed,
+    all-or-nothing against the versions they were loaded with."""
+    if not changes:
+        return
+
+    with write_transaction(profile) as conn:
+        conflicts = [
+            loan_id
+            for loan_id, value in changes.items()
+            if conn.execute(
+                "UPDATE loans SET extra_paid = ?, version = version + 1 "
+                "WHERE id = ? AND version = ?",
+                (int(value), loan_id, int(versions[loan_id]))
+            ).rowcount == 0
+        ]
+        if conflicts:
+            raise LoanConflictError(conflicts)
+
+
+# -------------------------------------------------
+# COLUMNAR SNAPSHOT
+# -------------------------------------------------
+# One NumPy array per field, filled straight from the cursor so
+# DataFrames can be built without a dict per loan.
+LOAN_COLUMNS = {
+    "id": (object, ""),
+    "lender": (object, ""),
+    "type": (object, ""),
+    "status": (object, ""),
+    "principal": (np.int64, 0),
+    "emi": (np.int64, 0),
+    "total_months": (np.int64, 0),
+    "months_paid": (np.int64, 0),
+    "interest_rate": (np.float64, 0.0),
+    "extra_paid": (np.int64, 0),
+    "latest_offer": (np.int64, 0),
+    "last_paid_month": (object, ""),
+    "emi_date": (np.int64, 0),
+    "loan_no": (object, ""),
+    "interest_only": (np.bool_, 0),
+    "archived": (np.bool_, 0),
+    "version": (np.int64, 0),
+}
+
+
+def load_loan_columns(where="", params=(), order_by="", profile=None, table="loans"):
+    init_db(profile)
+
+    conn = get_connection(profile)
+    present = {r[1] for r in conn.execute(f"PRAGMA table_info({table})")}
+
+    select = ", ".join(
+        f"COALESCE({name}, {default!r}) AS {name}" if name in present
+        else f"{default!r} AS {name}"
+        for name, (_, default) in LOAN_COLUMNS.items()
+    )
+    sql = f"SELECT {select} FROM {table}"
+    if where:
+        sql += f" WHERE {where}"
+    if order_by:
+        sql += f" ORDER BY {order_by}"
+
+    rows = conn.execute(sql, params).fetchall()
+    conn.close()
+
+    n = len(rows)
+    fields = zip(*rows) if n else ([] for _ in LOAN_COLUMNS)
+    return {
+        name: np.fromiter(values, dtype=dtype, count=n)
+        for (name, (dtype, _)), values in zip(LOAN_COLUMNS.items(), fields)
+    }
+
+
+def load_active_emi_columns(profile=None):
+    # closest to completion first, ties in insertion order
+    return load_loan_columns(
+        where="type = 'EMI' AND status = 'ACTIVE'",
+        order_by="(total_months - months_paid), rowid",
+        profile=profile,
+    )
 
 # -------------------------------------------------
 # FILTERS
 # -------------------------------------------------
 def active_emis(loans):
-    return [
-        l for l in loans
-        if l.get("type") == "EMI" and l.get("status") == "ACTIVE"
-    ]
+    return [l for l in loans if l.is_active_emi]
 
 
 def active_settlements(loans):
     return [
         l for l in loans
-        if l.get("type") == "SETTLEMENT" and l.get("status") == "ACTIVE"
+        if l.type == "SETTLEMENT" and l.status == "ACTIVE"
     ]
 
 
 def closed_settlements(loans):
     return [
         l for l in loans
-        if l.get("type") == "SETTLEMENT" and l.get("status") == "CLOSED"
+        if l.type == "SETTLEMENT" and l.status == "CLOSED"
     ]
 
 
@@ -85,22 +291,103 @@ def closed_settlements(loans):
 # METRICS
 # -------------------------------------------------
 def total_monthly_emi(loans):
-    return sum(l["emi"] for l in active_emis(loans))
+    return sum(l.emi for l in active_emis(loans))
 
 
 def emi_progress(loan):
-    if not loan.get("total_months"):
+    if not loan.total_months:
         return 0
-    return round((loan["months_paid"] / loan["total_months"]) * 100, 1)
-
-
-def load_cashflow():
-    data_file = Path(__file__).parents[1] / "data" / "cashflow.json"
-    if not data_file.exists():
-        return {
-            "monthly_income": 0,
-            "fixed_expenses": [],
-            "variable_expenses": []
-        }
-    with open(data_file, "r") as f:
-        return json.load(f)
+    return round((loan.months_paid / loan.total_months) * 100, 1)
+
+
+# -------------------------------------------------
+# CASHFLOW
+# -------------------------------------------------
+EXPENSE_FIELDS = ("type", "name", "amount", "category", "spent_on", "tags")
+
+
+def load_monthly_income(profile=None):
+    """This month's income, projected from the income streams."""
+    return int(income_projection(profile)[0])
+
+
+def load_cashflow(profile=None):
+    init_db(profile)
+
+    conn = get_connection(profile)
+    cur = conn.cursor()
+
+    cur.execute("SELECT monthly_income FROM cashflow WHERE id=1")
+    row = cur.fetchone()
+
+    cur.execute(f"SELECT {', '.join(EXPENSE_FIELDS)} FROM expenses ORDER BY id")
+    expenses = [Expense.from_row(dict(zip(EXPENSE_FIELDS, r))) for r in cur.fetchall()]
+
+    conn.close()
+
+    return {
+        "monthly_income": row[0] if row else 0,
+        "income_streams": load_income_streams(profile),
+        "fixed_expenses": [e for e in expenses if e.type == "fixed"],
+        "variable_expenses": [e for e in expenses if e.type == "variable"],
+    }
+
+
+def save_cashflow(data, profile=None):
+    with write_transaction(profile) as conn:
+        # monthly_income keeps this month's total for readers of the old column
+        conn.execute("DELETE FROM cashflow")
+        conn.execute("INSERT INTO cashflow (id, monthly_income) VALUES (1, ?)",
+                     (int(project_income(data["income_streams"], 1)[0]),))
+
+        conn.execute("DELETE FROM income_streams")
+        conn.executemany(
+            f"INSERT INTO income_streams ({', '.join(INCOME_FIELDS)}) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [tuple(getattr(s, f) for f in INCOME_FIELDS) for s in data["income_streams"]],
+        )
+
+        _sync_expenses(conn, data["fixed_expenses"] + data["variable_expenses"])
+
+
+def _sync_expenses(conn, expenses):
+    # Only what changed is written: stored rows equal to a wanted expense
+    # stay as they are, rows with the same type, name and date are updated
+    # in place, and the rest are deleted or inserted. Untouched rows keep
+    # their id and their search index entries.
+    columns = (*EXPENSE_FIELDS, "month")
+    wanted = [(*(getattr(e, f) for f in EXPENSE_FIELDS), e.month) for e in expenses]
+
+    unmatched = {}
+    stored = conn.execute(f"SELECT id, {', '.join(columns)} FROM expenses ORDER BY id")
+    for row_id, *row in stored:
+        unmatched.setdefault(tuple(row), []).append(row_id)
+    added = []
+    for row in wanted:
+        if unmatched.get(row):
+            unmatched[row].pop(0)
+        else:
+            added.append(row)
+
+    # (type, name, spent_on) -> ids of stored rows nothing matched
+    stale = {}
+    for row, ids in unmatched.items():
+        stale.setdefault((row[0], row[1], row[4]), []).extend(ids)
+    updates, inserts = [], []
+    for row in added:
+        ids = stale.get((row[0], row[1], row[4]))
+        if ids:
+            updates.append((*row, ids.pop(0)))
+        else:
+            inserts.append(row)
+
+    conn.executemany(
+        "DELETE FROM expenses WHERE id = ?", [(i,) for ids in stale.values() for i in ids]
+    )
+    conn.executemany(
+        f"UPDATE expenses SET {', '.join(f'{c} = ?' for c in columns)} WHERE id = ?", updates
+    )
+    conn.executemany(
+        f"INSERT INTO expenses ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+        inserts,
+    )
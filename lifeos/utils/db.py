@@ -1,16 +1,635 @@
+import atexit
+import json
+import os
+import re
 import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
+from urllib.parse import quote
 
-DB_PATH = Path(__file__).parents[1] / "data" / "viveka.db"
+DATA_DIR = Path(__file__).parents[1] / "data"
+DB_PATH = DATA_DIR / "viveka.db"
+CASHFLOW_JSON = DATA_DIR / "cashflow.json"
+PROFILES_DIR = DATA_DIR / "profiles"
 
-def get_connection():
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    return sqlite3.connect(DB_PATH, check_same_thread=False)
+# -------------------------------------------------
+# PROFILES
+# -------------------------------------------------
+# Every household member gets their own SQLite file. The default profile
+# keeps using viveka.db. The active profile is a context variable, so each
+# Streamlit session (script thread) selects its own without leaking into
+# other sessions.
+DEFAULT_PROFILE = "default"
+PROFILE_NAME_RE = re.compile(r"^[a-z0-9_-]{1,32}$")
 
-def init_db():
-    conn = get_connection()
+_active_profile = ContextVar("viveka_profile", default=DEFAULT_PROFILE)
+_initialized = set()
+
+
+def active_profile():
+    return _active_profile.get()
+
+
+def set_active_profile(profile):
+    _active_profile.set(profile or DEFAULT_PROFILE)
+
+
+def db_path(profile=None):
+    profile = profile or active_profile()
+    if profile == DEFAULT_PROFILE:
+        return DB_PATH
+    return PROFILES_DIR / f"{profile}.db"
+
+
+def list_profiles():
+    others = sorted(p.stem for p in PROFILES_DIR.glob("*.db")) if PROFILES_DIR.exists() else []
+    return [DEFAULT_PROFILE] + [p for p in others if p != DEFAULT_PROFILE]
+
+
+def create_profile(name):
+    name = name.strip().lower()
+    if not PROFILE_NAME_RE.match(name):
+        raise ValueError("Profile names use a-z, 0-9, '-' or '_' (max 32)")
+    if name in list_profiles():
+        raise ValueError("Profile already exists")
+    init_db(name)
+    return name
+
+
+# -------------------------------------------------
+# CONNECTIONS
+# -------------------------------------------------
+BUSY_TIMEOUT = 10  # seconds a writer waits for the lock
+
+# time spent waiting for the write lock in this process (for load tests)
+_lock_waits = {"count": 0, "waited": 0.0, "max": 0.0}
+_lock_waits_guard = threading.Lock()
+LOCK_WAIT_THRESHOLD = 0.005  # seconds; quicker BEGINs count as uncontended
+
+
+def get_connection(profile=None):
+    path = db_path(profile)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if IN_MEMORY:
+        _load_into_memory(path)
+        conn = sqlite3.connect(
+            _memory_uri(path), uri=True, timeout=BUSY_TIMEOUT, check_same_thread=False
+        )
+    else:
+        conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+@contextmanager
+def write_transaction(profile=None, foreign_keys=True):
+    """Short BEGIN IMMEDIATE transaction: takes the write lock up front so
+    concurrent sessions queue on the busy timeout instead of failing midway.
+    foreign_keys=False skips cascades (moving loans to and from the archive)."""
+    conn = get_connection(profile)
+    if not foreign_keys:
+        conn.execute("PRAGMA foreign_keys=OFF")
+    conn.isolation_level = None
+    start = time.perf_counter()
+    conn.execute("BEGIN IMMEDIATE")
+    waited = time.perf_counter() - start
+    if waited >= LOCK_WAIT_THRESHOLD:
+        with _lock_waits_guard:
+            _lock_waits["count"] += 1
+            _lock_waits["waited"] += waited
+            _lock_waits["max"] = max(_lock_waits["max"], waited)
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    else:
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+
+def lock_wait_stats(reset=False):
+    with _lock_waits_guard:
+        stats = dict(_lock_waits)
+        if reset:
+            _lock_waits.update(count=0, waited=0.0, max=0.0)
+    return stats
+
+
+# -------------------------------------------------
+# IN-MEMORY MODE (WRITE-BEHIND)
+# -------------------------------------------------
+# With VIVEKA_IN_MEMORY=1 each database file is copied into RAM the first
+# time it is opened, and every connection of this process uses the RAM
+# copy. It is a named memdb database rather than a shared-cache
+# :memory: one: memdb takes ordinary file locks, so sessions wait on the
+# busy timeout instead of failing with "table is locked".
+#
+# A background thread writes the RAM copy back to the file at most
+# FLUSH_DELAY seconds after a change, and once more at exit. Each flush is
+# a single transaction on the file, so a crash leaves the previous flush
+# intact and loses at most the last FLUSH_DELAY seconds of edits. Only
+# one process may serve a database in this mode.
+IN_MEMORY = os.environ.get("VIVEKA_IN_MEMORY", "") not in ("", "0")
+FLUSH_DELAY = 2  # seconds
+
+# path -> {"anchor": connection keeping the RAM copy alive, "version": its
+# PRAGMA data_version at the last flush, "lock": one flush at a time}
+_memory = {}
+_memory_lock = threading.Lock()
+_flusher = None
+
+
+def _memory_uri(path):
+    return f"file:/viveka-memory{quote(str(path))}?vfs=memdb"
+
+
+def _load_into_memory(path):
+    global _flusher
+    with _memory_lock:
+        if path in _memory:
+            return
+        anchor = sqlite3.connect(
+            _memory_uri(path), uri=True, timeout=BUSY_TIMEOUT, check_same_thread=False
+        )
+        if path.exists() and path.stat().st_size:
+            disk = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+            copy = sqlite3.connect(":memory:")
+            try:
+                # memdb can't open a WAL-format file: header bytes 18-19
+                # say which journal the file expects, 1 = rollback
+                image = bytearray(disk.serialize())
+                image[18:20] = b"\x01\x01"
+                copy.deserialize(bytes(image))
+                copy.backup(anchor)
+            finally:
+                copy.close()
+                disk.close()
+        _memory[path] = {
+            "anchor": anchor,
+            "version": anchor.execute("PRAGMA data_version").fetchone()[0],
+            "lock": threading.Lock(),
+        }
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name="memory-flush", daemon=True)
+            _flusher.start()
+            atexit.register(flush_memory)
+
+
+def _flush_path(path, state):
+    anchor = state["anchor"]
+    # a read transaction keeps writers from committing while the image
+    # is copied out; the slow part (writing the file) runs after it ends
+    anchor.execute("BEGIN")
+    try:
+        anchor.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        version = anchor.execute("PRAGMA data_version").fetchone()[0]
+        if version == state["version"]:
+            return False
+        image = anchor.serialize()
+    finally:
+        anchor.execute("COMMIT")
+
+    copy = sqlite3.connect(":memory:")
+    disk = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+    try:
+        copy.deserialize(image)
+        disk.execute("PRAGMA journal_mode=WAL")
+        copy.backup(disk)
+        disk.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        disk.close()
+        copy.close()
+    state["version"] = version
+    return True
+
+
+def flush_memory(profile=None):
+    """Write changed in-memory databases (or just this profile's) back to
+    their files now. Returns how many were written."""
+    with _memory_lock:
+        targets = [
+            (path, state) for path, state in _memory.items()
+            if profile is None or path == db_path(profile)
+        ]
+    flushed = 0
+    for path, state in targets:
+        with state["lock"]:
+            flushed += _flush_path(path, state)
+    return flushed
+
+
+def _flush_loop():
+    while True:
+        time.sleep(FLUSH_DELAY)
+        try:
+            flush_memory()
+        except sqlite3.Error:
+            pass  # retried on the next tick
+
+
+# -------------------------------------------------
+# MIGRATIONS
+# -------------------------------------------------
+# PRAGMA user_version records how many of these have run.
+# Each migration gets the cursor and the database file path.
+def _add_column(cur, table, column, decl):
+    present = {r[1] for r in cur.execute(f"PRAGMA table_info({table})")}
+    if column not in present:
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+def _version_triggers(cur, table):
+    # data_versions[table] bumps on every write, so readers can cache
+    # derived results until the table actually changes
+    cur.execute(
+        "INSERT OR IGNORE INTO data_versions (name, version) VALUES (?, 0)", (table,)
+    )
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_version
+        AFTER {event} ON {table}
+        BEGIN
+            UPDATE data_versions SET version = version + 1 WHERE name = '{table}';
+        END
+        """)
+
+
+def _loan_version(cur, path):
+    # optimistic concurrency: every write bumps the row version
+    _add_column(cur, "loans", "version", "INTEGER NOT NULL DEFAULT 0")
+
+
+def _loan_emi_date(cur, path):
+    # day of month the EMI is debited (0 = unknown)
+    _add_column(cur, "loans", "emi_date", "INTEGER NOT NULL DEFAULT 0")
+
+
+def _legacy_cashflow_json(cur, path):
+    # the default profile used to read cashflow.json; import it once
+    if path != DB_PATH or not CASHFLOW_JSON.exists():
+        return
+    if cur.execute("SELECT 1 FROM cashflow UNION ALL SELECT 1 FROM expenses").fetchone():
+        return
+
+    with open(CASHFLOW_JSON, "r") as f:
+        data = json.load(f)
+
+    cur.execute(
+        "INSERT INTO cashflow (id, monthly_income) VALUES (1, ?)",
+        (data.get("monthly_income", 0),),
+    )
+    for kind in ("fixed", "variable"):
+        cur.executemany(
+            "INSERT INTO expenses (type, name, amount) VALUES (?, ?, ?)",
+            [(kind, e.get("name", ""), e.get("amount", 0)) for e in data.get(f"{kind}_expenses", [])],
+        )
+
+
+def _expense_categories(cur, path):
+    # transaction-level expenses: category, date (and its month) and tags
+    _add_column(cur, "expenses", "category", "TEXT NOT NULL DEFAULT 'Uncategorized'")
+    _add_column(cur, "expenses", "spent_on", "TEXT")
+    _add_column(cur, "expenses", "month", "TEXT")
+    _add_column(cur, "expenses", "tags", "TEXT NOT NULL DEFAULT ''")
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_expenses_category_month ON expenses (category, month)"
+    )
+    _version_triggers(cur, "expenses")
+
+
+def _loan_constraints(cur, path):
+    # SQLite can't add constraints to an existing table, so rebuild loans
+    # (text ids, CHECKs, every Loan field) and give the child tables foreign
+    # keys. Values the new CHECKs would reject are clamped on the way over;
+    # orphaned child rows are copied as-is for the integrity scan to report.
+    cur.execute("""
+    CREATE TABLE loans_new (
+        id TEXT PRIMARY KEY NOT NULL CHECK (trim(id) <> ''),
+        lender TEXT NOT NULL DEFAULT '',
+        type TEXT NOT NULL DEFAULT 'EMI' CHECK (type IN ('EMI', 'SETTLEMENT')),
+        status TEXT NOT NULL DEFAULT 'ACTIVE' CHECK (status IN ('ACTIVE', 'CLOSED')),
+        principal INTEGER NOT NULL DEFAULT 0 CHECK (principal >= 0),
+        emi INTEGER NOT NULL DEFAULT 0 CHECK (emi >= 0),
+        total_months INTEGER NOT NULL DEFAULT 0 CHECK (total_months >= 0),
+        months_paid INTEGER NOT NULL DEFAULT 0
+            CHECK (months_paid >= 0 AND months_paid <= total_months),
+        interest_rate REAL NOT NULL DEFAULT 0 CHECK (interest_rate >= 0),
+        extra_paid INTEGER NOT NULL DEFAULT 0 CHECK (extra_paid >= 0),
+        latest_offer INTEGER NOT NULL DEFAULT 0 CHECK (latest_offer >= 0),
+        last_paid_month TEXT NOT NULL DEFAULT '',
+        emi_date INTEGER NOT NULL DEFAULT 0 CHECK (emi_date BETWEEN 0 AND 31),
+        loan_no TEXT NOT NULL DEFAULT '',
+        interest_only INTEGER NOT NULL DEFAULT 0 CHECK (interest_only IN (0, 1)),
+        archived INTEGER NOT NULL DEFAULT 0 CHECK (archived IN (0, 1)),
+        created_at TEXT NOT NULL DEFAULT '',
+        archived_at TEXT NOT NULL DEFAULT '',
+        restored_at TEXT NOT NULL DEFAULT '',
+        version INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    cur.execute("""
+    INSERT INTO loans_new (
+        id, lender, type, status, principal, emi, total_months, months_paid,
+        interest_rate, extra_paid, latest_offer, last_paid_month, emi_date,
+        loan_no, archived, version
+    )
+    SELECT
+        CASE WHEN trim(COALESCE(id, '')) = '' THEN 'loan-' || rowid ELSE CAST(id AS TEXT) END,
+        COALESCE(lender, ''),
+        CASE WHEN upper(type) = 'SETTLEMENT' THEN 'SETTLEMENT' ELSE 'EMI' END,
+        CASE WHEN upper(status) = 'CLOSED' THEN 'CLOSED' ELSE 'ACTIVE' END,
+        MAX(COALESCE(principal, 0), 0),
+        MAX(COALESCE(emi, 0), 0),
+        MAX(COALESCE(total_months, 0), 0),
+        MIN(MAX(COALESCE(months_paid, 0), 0), MAX(COALESCE(total_months, 0), 0)),
+        MAX(COALESCE(interest_rate, 0), 0),
+        MAX(COALESCE(extra_paid, 0), 0),
+        MAX(COALESCE(latest_offer, 0), 0),
+        COALESCE(last_paid_month, ''),
+        CASE WHEN emi_date BETWEEN 0 AND 31 THEN emi_date ELSE 0 END,
+        CAST(id AS TEXT),
+        upper(status) = 'CLOSED',
+        version
+    FROM loans
+    """)
+    cur.execute("DROP TABLE loans")
+    cur.execute("ALTER TABLE loans_new RENAME TO loans")
+    cur.execute("CREATE INDEX idx_loans_type_status ON loans (type, status)")
+    # Loan No is unique per profile, case- and whitespace-insensitively
+    cur.execute("CREATE INDEX idx_loans_loan_no ON loans (lower(trim(loan_no)))")
+
+    cur.execute("""
+    CREATE TABLE rate_changes_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        loan_id TEXT NOT NULL
+            REFERENCES loans (id) ON UPDATE CASCADE ON DELETE CASCADE,
+        effective_month INTEGER NOT NULL CHECK (effective_month >= 1),
+        rate REAL NOT NULL CHECK (rate >= 0),
+        UNIQUE (loan_id, effective_month)
+    )
+    """)
+    cur.execute("""
+    INSERT INTO rate_changes_new (id, loan_id, effective_month, rate)
+    SELECT id, loan_id, MAX(effective_month, 1), MAX(rate, 0) FROM rate_changes
+    """)
+    cur.execute("DROP TABLE rate_changes")
+    cur.execute("ALTER TABLE rate_changes_new RENAME TO rate_changes")
+
+    cur.execute("""
+    CREATE TABLE statement_payments_new (
+        fingerprint TEXT PRIMARY KEY,
+        loan_id TEXT NOT NULL
+            REFERENCES loans (id) ON UPDATE CASCADE ON DELETE CASCADE,
+        txn_date TEXT NOT NULL,
+        amount REAL NOT NULL,
+        description TEXT
+    )
+    """)
+    cur.execute("INSERT INTO statement_payments_new SELECT * FROM statement_payments")
+    cur.execute("DROP TABLE statement_payments")
+    cur.execute("ALTER TABLE statement_payments_new RENAME TO statement_payments")
+    cur.execute(
+        "CREATE INDEX idx_statement_payments_loan ON statement_payments (loan_id)"
+    )
+
+
+def _loan_book_version(cur, path):
+    # data_versions['loans'] keys caches of loan-book derived results
+    _version_triggers(cur, "loans")
+
+
+def _rate_change_version(cur, path):
+    # rate history is part of the loan book (see utils/cache.py)
+    _version_triggers(cur, "rate_changes")
+
+
+def _search_index(cur, path):
+    # FTS5 indexes over loans and expenses (external content: the text
+    # stays in the source tables), kept in sync by triggers. Prefix
+    # indexes make 2-4 character prefix queries as fast as whole words.
+    for table, columns, key in (
+        ("loans", ("loan_no", "lender"), "rowid"),
+        ("expenses", ("name", "category", "tags"), "id"),
+    ):
+        fts = f"{table}_search"
+        cols = ", ".join(columns)
+        new = ", ".join(f"new.{c}" for c in columns)
+        old = ", ".join(f"old.{c}" for c in columns)
+        cur.execute(f"""
+        CREATE VIRTUAL TABLE {fts} USING fts5(
+            {cols}, content='{table}', content_rowid='{key}',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3 4'
+        )
+        """)
+        cur.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+        cur.execute(f"""
+        CREATE TRIGGER trg_{table}_search_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts} (rowid, {cols}) VALUES (new.{key}, {new});
+        END
+        """)
+        cur.execute(f"""
+        CREATE TRIGGER trg_{table}_search_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', old.{key}, {old});
+        END
+        """)
+        cur.execute(f"""
+        CREATE TRIGGER trg_{table}_search_update AFTER UPDATE OF {cols} ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', old.{key}, {old});
+            INSERT INTO {fts} (rowid, {cols}) VALUES (new.{key}, {new});
+        END
+        """)
+
+
+# Closed and archived loans (see calculations.archive_loan)
+COLD_LOANS = "archived = 1 OR status = 'CLOSED'"
+
+
+def _loan_archive(cur, path):
+    # hot/cold split: loans_archive has the loans DDL (same columns in the
+    # same order, so rows move with INSERT ... SELECT *) and takes every
+    # closed or archived loan. Their rate changes and posted payments stay
+    # where they are; foreign keys are off during migrations, so nothing
+    # cascades.
+    ddl = cur.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'loans'"
+    ).fetchone()[0]
+    cur.execute(re.sub(r'^CREATE TABLE "?loans"?', "CREATE TABLE loans_archive", ddl))
+    cur.execute("CREATE INDEX idx_loans_archive_type_status ON loans_archive (type, status)")
+    cur.execute(
+        "CREATE INDEX idx_loans_archive_loan_no ON loans_archive (lower(trim(loan_no)))"
+    )
+    cur.execute(f"INSERT INTO loans_archive SELECT * FROM loans WHERE {COLD_LOANS}")
+    cur.execute(f"DELETE FROM loans WHERE {COLD_LOANS}")
+
+
+def _installments(cur, path):
+    # materialized EMI schedules (see utils/installments.py). The due-date
+    # index carries every column the dues queries read, so they never
+    # touch the table; loan_id and installment ride along as the key.
+    cur.execute("""
+    CREATE TABLE installments (
+        loan_id TEXT NOT NULL,
+        installment INTEGER NOT NULL,
+        due_date TEXT NOT NULL,
+        emi INTEGER NOT NULL,
+        principal INTEGER NOT NULL,
+        interest INTEGER NOT NULL,
+        status TEXT NOT NULL CHECK (status IN ('DUE', 'PAID')),
+        PRIMARY KEY (loan_id, installment)
+    ) WITHOUT ROWID
+    """)
+    cur.execute("""
+    CREATE INDEX idx_installments_due
+    ON installments (due_date, status, emi, principal, interest)
+    """)
+    # fingerprint of the terms each loan's rows were generated from
+    cur.execute("""
+    CREATE TABLE installment_terms (
+        loan_id TEXT PRIMARY KEY,
+        terms TEXT NOT NULL
+    ) WITHOUT ROWID
+    """)
+
+
+def _income_streams(cur, path):
+    # income as several streams (see utils/income.py); the single monthly
+    # income becomes the first one. cashflow.monthly_income stays, holding
+    # this month's projected total as of the last save
+    cur.execute("""
+    CREATE TABLE income_streams (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL DEFAULT '',
+        kind TEXT NOT NULL DEFAULT 'salary'
+            CHECK (kind IN ('salary', 'bonus', 'rental', 'other')),
+        amount INTEGER NOT NULL DEFAULT 0 CHECK (amount >= 0),
+        frequency TEXT NOT NULL DEFAULT 'monthly'
+            CHECK (frequency IN ('monthly', 'quarterly', 'annual')),
+        start_month TEXT NOT NULL DEFAULT '',
+        end_month TEXT NOT NULL DEFAULT '',
+        growth_pct REAL NOT NULL DEFAULT 0
+    )
+    """)
+    cur.execute("""
+    INSERT INTO income_streams (name, kind, amount, frequency)
+    SELECT 'Salary', 'salary', monthly_income, 'monthly'
+    FROM cashflow WHERE id = 1 AND monthly_income > 0
+    """)
+    _version_triggers(cur, "income_streams")
+
+
+def _scenarios(cur, path):
+    # what-if scenarios are sparse overlays on the live data (see
+    # utils/scenarios.py): only the loans and expenses a scenario changes,
+    # adds or removes have a row here
+    cur.execute("""
+    CREATE TABLE scenarios (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL UNIQUE CHECK (trim(name) <> ''),
+        created_at TEXT NOT NULL DEFAULT ''
+    )
+    """)
+    # changes: JSON object of the loan fields that differ (every field for
+    # an added loan)
+    cur.execute("""
+    CREATE TABLE scenario_loans (
+        scenario_id INTEGER NOT NULL REFERENCES scenarios (id) ON DELETE CASCADE,
+        loan_id TEXT NOT NULL,
+        op TEXT NOT NULL CHECK (op IN ('set', 'add', 'remove')),
+        changes TEXT NOT NULL DEFAULT '{}' CHECK (json_valid(changes)),
+        PRIMARY KEY (scenario_id, loan_id)
+    ) WITHOUT ROWID
+    """)
+    # expenses are rewritten on every save, so they are matched by type
+    # and name rather than id
+    cur.execute("""
+    CREATE TABLE scenario_expenses (
+        scenario_id INTEGER NOT NULL REFERENCES scenarios (id) ON DELETE CASCADE,
+        type TEXT NOT NULL,
+        name TEXT NOT NULL,
+        op TEXT NOT NULL CHECK (op IN ('set', 'add', 'remove')),
+        amount INTEGER NOT NULL DEFAULT 0 CHECK (amount >= 0),
+        category TEXT NOT NULL DEFAULT 'Uncategorized',
+        PRIMARY KEY (scenario_id, type, name)
+    ) WITHOUT ROWID
+    """)
+    _version_triggers(cur, "scenario_loans")
+    _version_triggers(cur, "scenario_expenses")
+
+
+def _db_identity(cur, path):
+    # a random id written when the database is created: change counters
+    # start over in a recreated file, so caches key on this as well
+    cur.execute("""
+    CREATE TABLE db_meta (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        identity TEXT NOT NULL
+    )
+    """)
+    cur.execute("INSERT INTO db_meta (id, identity) VALUES (1, ?)", (uuid.uuid4().hex,))
+
+
+def _expense_month_index(cur, path):
+    # the monthly rollup (utils/expenses.py) reads recurring rows (month
+    # NULL) and one month's rows through this covering index, and the
+    # rare dated fixed expenses through the partial one; nothing filters
+    # on category first, so the (category, month) index goes
+    cur.execute("DROP INDEX IF EXISTS idx_expenses_category_month")
+    cur.execute("CREATE INDEX idx_expenses_month ON expenses (month, type, category, amount)")
+    cur.execute("""
+    CREATE INDEX idx_expenses_dated_fixed ON expenses (month, type, category, amount)
+    WHERE type = 'fixed' AND month IS NOT NULL
+    """)
+
+
+MIGRATIONS = [
+    _loan_version,
+    _loan_emi_date,
+    _legacy_cashflow_json,
+    _expense_categories,
+    _loan_constraints,
+    _loan_book_version,
+    _rate_change_version,
+    _search_index,
+    _loan_archive,
+    _installments,
+    _income_streams,
+    _scenarios,
+    _db_identity,
+    _expense_month_index,
+]
+
+
+def _migrate(cur, path):
+    current = cur.execute("PRAGMA user_version").fetchone()[0]
+    for version, migration in enumerate(MIGRATIONS[current:], start=current + 1):
+        migration(cur, path)
+        cur.execute(f"PRAGMA user_version = {version}")
+
+
+def init_db(profile=None, force=False):
+    path = db_path(profile)
+    if path in _initialized and path.exists() and not force:
+        return
+
+    conn = get_connection(profile)
     cur = conn.cursor()
 
+    # WAL: readers never block the (short) writer transactions
+    cur.execute("PRAGMA journal_mode=WAL")
+    # migrations rebuild tables; keep orphans for the integrity scan
+    cur.execute("PRAGMA foreign_keys=OFF")
+
+    # schema setup holds the write lock, so sessions starting together
+    # can't run the same migration twice
+    conn.isolation_level = None
+    cur.execute("BEGIN IMMEDIATE")
+
     # Cashflow
     cur.execute("""
     CREATE TABLE IF NOT EXISTS cashflow (
@@ -46,5 +665,65 @@ def init_db():
     )
     """)
 
-    conn.commit()
+    # Settlement and EMI pages filter on (type, status)
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_loans_type_status ON loans (type, status)
+    """)
+
+    # Rate history (floating-rate loans)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS rate_changes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        loan_id TEXT NOT NULL,
+        effective_month INTEGER NOT NULL,
+        rate REAL NOT NULL,
+        UNIQUE (loan_id, effective_month)
+    )
+    """)
+
+    # Bank statement debits already posted as EMI payments
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS statement_payments (
+        fingerprint TEXT PRIMARY KEY,
+        loan_id TEXT NOT NULL,
+        txn_date TEXT NOT NULL,
+        amount REAL NOT NULL,
+        description TEXT
+    )
+    """)
+
+    # Change counters for cache invalidation (see _version_triggers)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS data_versions (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+
+    _migrate(cur, path)
+
+    cur.execute("COMMIT")
+    conn.close()
+    _initialized.add(path)
+
+
+def data_version(name, profile=None):
+    """Change counter of a table, bumped by triggers on every write."""
+    init_db(profile)
+
+    conn = get_connection(profile)
+    row = conn.execute(
+        "SELECT version FROM data_versions WHERE name = ?", (name,)
+    ).fetchone()
+    conn.close()
+    return row[0] if row else 0
+
+
+def db_identity(profile=None):
+    """Random id of the database, new whenever its file is recreated."""
+    init_db(profile)
+
+    conn = get_connection(profile)
+    row = conn.execute("SELECT identity FROM db_meta WHERE id = 1").fetchone()
     conn.close()
+    return row[0]
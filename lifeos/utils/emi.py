@@ -0,0 +1,84 @@
+from functools import lru_cache
+
+import numpy as np
+
+# -------------------------------------------------
+# AMORTIZATION CORE
+# -------------------------------------------------
+# Closed-form annuity math shared by the pages, rate changes and the
+# payoff solver. Every function takes the annual rate in percent and
+# works on scalars or NumPy arrays alike. (1 + r)^n is evaluated once per
+# call as exp(n * log1p(r)), and expm1 keeps (1 + r)^n - 1 accurate for
+# tiny rates.
+
+
+def monthly_rate(annual_rate):
+    return np.asarray(annual_rate, dtype=float) / 1200
+
+
+def _growth(r, months):
+    # (1 + r)^n and (1 + r)^n - 1
+    exponent = np.asarray(months, dtype=float) * np.log1p(r)
+    return np.exp(exponent), np.expm1(exponent)
+
+
+def _result(value):
+    return float(value) if np.ndim(value) == 0 else value
+
+
+def emi_array(principal, annual_rate, months):
+    """EMI that amortizes principal over months (0 where undefined)."""
+    principal = np.asarray(principal, dtype=float)
+    months = np.asarray(months, dtype=float)
+    r = monthly_rate(annual_rate)
+    growth, growth_1 = _growth(r, months)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        emi = np.where(r > 0, principal * r * growth / growth_1, principal / months)
+    return _result(np.where((principal > 0) & (months > 0), emi, 0.0))
+
+
+@lru_cache(maxsize=4096)
+def emi_amount(principal, annual_rate, months):
+    """Scalar EMI, memoized: sliders and schedules ask for the same
+    (principal, rate, months) over and over."""
+    return emi_array(principal, annual_rate, months)
+
+
+def balance_after(balance, annual_rate, emi, payments):
+    """Outstanding balance after a number of EMI payments."""
+    balance = np.asarray(balance, dtype=float)
+    payments = np.maximum(np.asarray(payments, dtype=float), 0)
+    r = monthly_rate(annual_rate)
+    growth, growth_1 = _growth(r, payments)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        paid = np.where(r > 0, emi * growth_1 / r, emi * payments)
+    return _result(np.maximum(balance * growth - paid, 0.0))
+
+
+def remaining_interest(balance, annual_rate, emi, months_left):
+    """Interest still to be paid if the EMI runs for months_left more
+    payments (the last one trimmed to whatever balance is left)."""
+    months_left = np.maximum(np.asarray(months_left, dtype=float), 0)
+    emi = np.asarray(emi, dtype=float)
+    n = np.minimum(months_left, months_to_close(balance, annual_rate, emi))
+    last = np.maximum(n - 1, 0)
+    left = balance_after(balance, annual_rate, emi, last)
+    final = np.where(n > 0, left * (1 + monthly_rate(annual_rate)), 0.0)
+    return _result(np.maximum(emi * last + final - balance, 0.0))
+
+
+def months_to_close(balance, annual_rate, payment):
+    """Whole months until the balance reaches zero (inf if the payment
+    does not cover the interest)."""
+    balance = np.asarray(balance, dtype=float)
+    payment = np.asarray(payment, dtype=float)
+    r = monthly_rate(annual_rate)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covered = 1 - r * balance / payment
+        n = np.where(r > 0, -np.log(covered) / np.log1p(r), balance / payment)
+    n = np.where((payment > 0) & (covered > 0), n, np.inf)
+    # float noise must not push an exact payoff into the next month
+    return _result(np.where(balance > 0, np.ceil(n - 1e-9), 0.0))
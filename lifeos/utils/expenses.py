@@ -0,0 +1,69 @@
+from datetime import date
+from threading import Lock
+
+from lifeos.utils.db import data_version, db_identity, db_path, get_connection, init_db
+
+# -------------------------------------------------
+# MONTHLY ROLLUP
+# -------------------------------------------------
+# Fixed expenses and undated variable ones recur every month; dated
+# variable expenses only count in the month they were spent. Each branch
+# reads one range of an index and nothing else, so the cost follows the
+# month's rows rather than the whole history (an OR of the three scans the
+# table). The planner would otherwise read the dated fixed expenses off
+# idx_expenses_month, which means every dated row, hence INDEXED BY.
+ROLLUP_SQL = """
+    SELECT type, category, SUM(amount)
+    FROM (
+        SELECT type, category, amount FROM expenses WHERE month IS NULL
+        UNION ALL
+        SELECT type, category, amount FROM expenses WHERE month = :month
+        UNION ALL
+        SELECT type, category, amount FROM expenses INDEXED BY idx_expenses_dated_fixed
+        WHERE type = 'fixed' AND month IS NOT NULL AND month <> :month
+    )
+    GROUP BY type, category
+"""
+
+# (db path, month) -> ((db identity, expenses version), totals)
+_cache = {}
+_cache_lock = Lock()
+
+
+def current_month():
+    return date.today().strftime("%Y-%m")
+
+
+def _rollup(month, profile):
+    conn = get_connection(profile)
+    rows = conn.execute(ROLLUP_SQL, {"month": month}).fetchall()
+    conn.close()
+
+    totals = {"fixed": 0, "variable": 0, "by_category": {}}
+    for kind, category, amount in rows:
+        amount = amount or 0
+        totals["fixed" if kind == "fixed" else "variable"] += amount
+        by_category = totals["by_category"]
+        by_category[category] = by_category.get(category, 0) + amount
+    return totals
+
+
+def expense_totals(month=None, profile=None):
+    """Fixed / variable / per-category totals for a month (default: this one).
+
+    Cached per database until a trigger bumps the expenses version.
+    """
+    init_db(profile)
+    month = month or current_month()
+    key = (db_path(profile), month)
+    version = (db_identity(profile), data_version("expenses", profile))
+
+    with _cache_lock:
+        hit = _cache.get(key)
+    if hit and hit[0] == version:
+        return hit[1]
+
+    totals = _rollup(month, profile)
+    with _cache_lock:
+        _cache[key] = (version, totals)
+    return totals
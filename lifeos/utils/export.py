@@ -0,0 +1,190 @@
+import csv
+import io
+import os
+from itertools import chain, islice
+from tempfile import TemporaryFile
+
+from lifeos.utils.calculations import LOAN_DB_FIELDS
+from lifeos.utils.db import get_connection, init_db
+from lifeos.utils.models import Loan
+from lifeos.utils.rates import load_rate_changes, schedule_rows
+
+# -------------------------------------------------
+# SETTINGS
+# -------------------------------------------------
+CHUNK_ROWS = 5_000
+
+# Column types: "text", "int" or "real" (used for Parquet schemas)
+LOAN_TYPES = {
+    "interest_rate": "real",
+    "principal": "int",
+    "emi": "int",
+    "total_months": "int",
+    "months_paid": "int",
+    "extra_paid": "int",
+    "latest_offer": "int",
+    "version": "int",
+    "emi_date": "int",
+    "interest_only": "int",
+    "archived": "int",
+}
+
+
+# -------------------------------------------------
+# DATASETS
+# -------------------------------------------------
+# A dataset is (columns, types, chunks) where chunks yields lists of row
+# tuples straight off a SQLite cursor with fetchmany().
+def _query_chunks(sql, params=(), profile=None, chunk_rows=CHUNK_ROWS):
+    conn = get_connection(profile)
+    try:
+        cur = conn.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(chunk_rows)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+
+def loan_book(profile=None):
+    init_db(profile)
+    columns = list(LOAN_DB_FIELDS)
+    types = [LOAN_TYPES.get(c, "text") for c in columns]
+    select = ", ".join(
+        f"CAST({c} AS TEXT)" if t == "text" else f"COALESCE({c}, 0)"
+        for c, t in zip(columns, types)
+    )
+    # live loans, then the archive
+    chunks = chain.from_iterable(
+        _query_chunks(f"SELECT {select} FROM {table} ORDER BY rowid", profile=profile)
+        for table in ("loans", "loans_archive")
+    )
+    return columns, types, chunks
+
+
+def amortization_schedules(profile=None):
+    init_db(profile)
+    columns = ["loan_id", "lender", "installment", "rate", "emi", "interest", "principal", "balance"]
+    types = ["text", "text", "int", "real", "int", "int", "int", "int"]
+
+    def chunks():
+        changes = load_rate_changes(profile=profile)
+        loans = (
+            Loan.from_row(dict(zip(LOAN_DB_FIELDS, row)))
+            for batch in _query_chunks(
+                f"SELECT {', '.join(LOAN_DB_FIELDS)} FROM loans "
+                "WHERE type = 'EMI' ORDER BY rowid",
+                profile=profile,
+                chunk_rows=100,
+            )
+            for row in batch
+        )
+        rows = (
+            (str(loan.id), loan.lender, *row)
+            for loan in loans
+            for row in schedule_rows(loan, changes.get(str(loan.id), ()))
+        )
+        while True:
+            chunk = list(islice(rows, CHUNK_ROWS))
+            if not chunk:
+                break
+            yield chunk
+
+    return columns, types, chunks()
+
+
+def current_cashflow(profile=None):
+    # what is stored now: income streams and expenses (dated expenses carry
+    # their month; edits overwrite rows, so there is no older history)
+    init_db(profile)
+    columns = ["kind", "name", "amount", "category", "month"]
+    types = ["text", "text", "int", "text", "text"]
+    sql = """
+        SELECT 'income', name, amount, kind, '' FROM income_streams
+        UNION ALL
+        SELECT COALESCE(type, ''), COALESCE(name, ''), COALESCE(amount, 0),
+               COALESCE(category, ''), COALESCE(month, '')
+        FROM expenses
+    """
+    return columns, types, _query_chunks(sql, profile=profile)
+
+
+# -------------------------------------------------
+# WRITERS
+# -------------------------------------------------
+def write_csv(columns, types, chunks, out):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    for rows in chunks:
+        writer.writerows(rows)
+        out.write(buf.getvalue().encode("utf-8"))
+        buf.seek(0)
+        buf.truncate()
+    out.write(buf.getvalue().encode("utf-8"))
+
+
+def write_parquet(columns, types, chunks, out):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrow_types = {"text": pa.string(), "int": pa.int64(), "real": pa.float64()}
+    schema = pa.schema([(c, arrow_types[t]) for c, t in zip(columns, types)])
+
+    with pq.ParquetWriter(out, schema) as writer:
+        for rows in chunks:
+            # one row group per chunk
+            arrays = [pa.array(col, type=f.type) for col, f in zip(zip(*rows), schema)]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+
+
+def write_excel(columns, types, chunks, out):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(columns)
+    for rows in chunks:
+        for row in rows:
+            ws.append(row)
+    wb.save(out)
+
+
+def excel_available():
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+FORMATS = {
+    "CSV": (write_csv, "csv", "text/csv"),
+    "Parquet": (write_parquet, "parquet", "application/vnd.apache.parquet"),
+    "Excel": (write_excel, "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+DATASETS = {
+    "loans": loan_book,
+    "schedules": amortization_schedules,
+    "cashflow": current_cashflow,
+}
+
+
+def export_file(dataset, fmt, profile=None):
+    """Stream a dataset into a temporary file, chunk by chunk, and return
+    it open for reading (st.download_button takes a binary file object).
+    The rows are never all in memory at once."""
+    writer, _, _ = FORMATS[fmt]
+    columns, types, chunks = DATASETS[dataset](profile)
+
+    # the file has no name on disk (or is deleted on close); the reader
+    # keeps it alive until it is closed
+    with TemporaryFile() as out:
+        writer(columns, types, chunks, out)
+        out.flush()
+        data = open(os.dup(out.fileno()), "rb")
+    data.seek(0)
+    return data
@@ -0,0 +1,93 @@
+from datetime import date
+from threading import Lock
+
+import numpy as np
+import pandas as pd
+
+from lifeos.utils.cache import cached
+from lifeos.utils.calculations import load_active_emi_columns
+from lifeos.utils.db import data_version, db_identity, db_path
+from lifeos.utils.income import income_projection
+
+# -------------------------------------------------
+# EMI PRESSURE TIMELINE
+# -------------------------------------------------
+# A loan with k EMIs left pays in months 1..k, so the EMI load of month m
+# is the sum over loans with k >= m: a bincount of EMIs by k, summed from
+# the far end (reverse cumsum). No loop over months or loans.
+
+# (db path, this month) -> ((db identity, loans version), schedule); misses fall back to
+# the on-disk cache shared with other sessions and processes
+_cache = {}
+_cache_lock = Lock()
+
+
+def _emi_schedule(profile):
+    cols = load_active_emi_columns(profile)
+    months_left = np.maximum(cols["total_months"] - cols["months_paid"], 0)
+    running = months_left > 0
+    months_left = months_left[running]
+    emi = cols["emi"][running]
+    ids = cols["id"][running]
+
+    horizon = int(months_left.max()) if len(months_left) else 0
+    ending = np.bincount(months_left, weights=emi, minlength=horizon + 1)
+    total_emi = np.cumsum(ending[::-1])[::-1][1:]
+    closing = np.bincount(months_left, minlength=horizon + 1)[1:]
+
+    # loan ids grouped by the month of their last EMI
+    order = np.argsort(months_left, kind="stable")
+    bounds = np.searchsorted(months_left[order], np.arange(1, horizon + 2))
+    closes = [
+        ", ".join(map(str, ids[order][start:end]))
+        for start, end in zip(bounds[:-1], bounds[1:])
+    ]
+
+    return {
+        "total_emi": total_emi.astype(np.int64),
+        "closing": closing,
+        "closes": closes,
+    }
+
+
+def emi_schedule(profile=None):
+    """EMI load per future month, cached until the loan book changes."""
+    key = (db_path(profile), date.today().strftime("%Y-%m"))
+    version = (db_identity(profile), data_version("loans", profile))
+
+    with _cache_lock:
+        hit = _cache.get(key)
+    if hit and hit[0] == version:
+        return hit[1]
+
+    schedule = cached("forecast.emi_schedule", key[1], lambda: _emi_schedule(profile), profile)
+    with _cache_lock:
+        _cache[key] = (version, schedule)
+    return schedule
+
+
+def pressure_timeline(expenses, profile=None):
+    """One row per month until debt-free: projected income, total EMI,
+    EMI / income, free cash after expenses and EMIs, and the loans whose
+    last EMI it is."""
+    schedule = emi_schedule(profile)
+    total_emi = schedule["total_emi"]
+
+    # the timeline starts next month; past the projection's horizon the
+    # last projected month carries on
+    income = income_projection(profile)[1:len(total_emi) + 1]
+    if len(income) < len(total_emi):
+        income = np.pad(income, (0, len(total_emi) - len(income)), mode="edge")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        emi_ratio = np.where(income > 0, total_emi / income * 100, 0.0).round(1)
+
+    start = pd.Period(date.today(), freq="M") + 1
+    return pd.DataFrame({
+        "Month": pd.period_range(start, periods=len(total_emi), freq="M").strftime("%b %Y"),
+        "Income (₹)": income,
+        "Total EMI (₹)": total_emi,
+        "EMI / Income (%)": emi_ratio,
+        "Free Cash (₹)": income - expenses - total_emi,
+        "Loans Closing": schedule["closing"],
+        "Closes": schedule["closes"],
+    })
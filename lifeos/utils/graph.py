@@ -0,0 +1,82 @@
+from collections import deque
+
+# -------------------------------------------------
+# DEPENDENCY GRAPH
+# -------------------------------------------------
+# Inputs (income, expense totals, each loan) and derived metrics are named
+# nodes. A metric declares the nodes it reads; setting an input to a new
+# value marks only the metrics downstream of it dirty, and a dirty metric
+# is recomputed the next time it is read. The graph lives in session state,
+# so unchanged metrics survive reruns.
+_MISSING = object()
+
+
+class MetricGraph:
+    def __init__(self):
+        self._inputs = {}
+        self._rules = {}  # name -> (deps, fn)
+        self._dependents = {}  # name -> names that read it
+        self._values = {}
+        self.computed = 0  # recompute counter, for diagnostics
+
+    # ---------------- definition ----------------
+    def set_input(self, name, value):
+        """Store an input; returns True when it changed."""
+        if self._inputs.get(name, _MISSING) == value:
+            return False
+        self._inputs[name] = value
+        self._invalidate(name)
+        return True
+
+    def rule(self, name, deps, fn):
+        """Declare (or redeclare) a metric computed as fn(*deps)."""
+        deps = tuple(deps)
+        current = self._rules.get(name)
+        if current is not None and current[0] == deps and current[1].__code__ is fn.__code__:
+            return
+
+        if current is not None:
+            for dep in current[0]:
+                self._dependents.get(dep, set()).discard(name)
+        for dep in deps:
+            self._dependents.setdefault(dep, set()).add(name)
+        self._rules[name] = (deps, fn)
+        self._invalidate(name)
+
+    def discard(self, names):
+        """Drop nodes that no longer exist (e.g. a deleted loan)."""
+        for name in names:
+            self._invalidate(name)
+            self._inputs.pop(name, None)
+            rule = self._rules.pop(name, None)
+            if rule is not None:
+                for dep in rule[0]:
+                    self._dependents.get(dep, set()).discard(name)
+
+    def nodes(self, prefix=""):
+        return [n for n in (*self._inputs, *self._rules) if n.startswith(prefix)]
+
+    # ---------------- evaluation ----------------
+    def get(self, name):
+        if name in self._inputs:
+            return self._inputs[name]
+
+        value = self._values.get(name, _MISSING)
+        if value is _MISSING:
+            deps, fn = self._rules[name]
+            value = fn(*(self.get(d) for d in deps))
+            self._values[name] = value
+            self.computed += 1
+        return value
+
+    def _invalidate(self, name):
+        queue = deque([name])
+        seen = set()
+        while queue:
+            node = queue.popleft()
+            for dependent in self._dependents.get(node, ()):
+                if dependent not in seen:
+                    seen.add(dependent)
+                    self._values.pop(dependent, None)
+                    queue.append(dependent)
+        self._values.pop(name, None)
@@ -0,0 +1,44 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from lifeos.utils.calculations import active_emis, load_loans, load_monthly_income
+from lifeos.utils.db import list_profiles
+from lifeos.utils.expenses import expense_totals
+
+
+# -------------------------------------------------
+# PER-PROFILE SUMMARY
+# -------------------------------------------------
+def profile_summary(profile):
+    totals = expense_totals(profile=profile)
+    emi_loans = active_emis(load_loans(profile))
+
+    income = load_monthly_income(profile)
+    expenses = totals["fixed"] + totals["variable"]
+    total_emi = sum(l.emi for l in emi_loans)
+
+    return {
+        "profile": profile,
+        "income": income,
+        "expenses": expenses,
+        "active_emis": len(emi_loans),
+        "monthly_emi": total_emi,
+        "balance": sum(l.balance for l in emi_loans),
+        "free_cash": income - expenses - total_emi,
+    }
+
+
+# -------------------------------------------------
+# HOUSEHOLD
+# -------------------------------------------------
+# Each profile is a separate SQLite file, so the summaries share nothing
+# and can be loaded side by side.
+def household_summary(profiles=None, max_workers=8):
+    profiles = profiles or list_profiles()
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(profiles))) as pool:
+        rows = list(pool.map(profile_summary, profiles))
+
+    totals = {
+        key: sum(r[key] for r in rows)
+        for key in ("income", "expenses", "active_emis", "monthly_emi", "balance", "free_cash")
+    }
+    return rows, totals
@@ -0,0 +1,89 @@
+from datetime import date
+from threading import Lock
+
+import numpy as np
+
+from lifeos.utils.db import data_version, db_identity, db_path, get_connection, init_db
+from lifeos.utils.models import IncomeStream
+
+# -------------------------------------------------
+# INCOME STREAMS
+# -------------------------------------------------
+INCOME_FIELDS = (
+    "name", "kind", "amount", "frequency", "start_month", "end_month", "growth_pct",
+)
+INCOME_KINDS = ("salary", "bonus", "rental", "other")
+FREQUENCY_MONTHS = {"monthly": 1, "quarterly": 3, "annual": 12}
+HORIZON = 360  # months projected by default (covers the longest loans)
+
+
+def load_income_streams(profile=None):
+    init_db(profile)
+
+    conn = get_connection(profile)
+    rows = conn.execute(
+        f"SELECT {', '.join(INCOME_FIELDS)} FROM income_streams ORDER BY id"
+    ).fetchall()
+    conn.close()
+    return [IncomeStream.from_row(dict(zip(INCOME_FIELDS, r))) for r in rows]
+
+
+# -------------------------------------------------
+# PROJECTION
+# -------------------------------------------------
+# Months are counted as year * 12 + month - 1, so a stream pays in month m
+# when m is within [start, end] and a whole number of periods after its
+# start. A stream with no start month is anchored on January, which puts
+# quarterly payouts in Jan/Apr/Jul/Oct and annual ones in January. Amounts
+# are today's; each stream's growth compounds on every anniversary of the
+# first projected month. Everything is a (streams x months) array op.
+def month_index(month):
+    year, mon = map(int, month.split("-"))
+    return year * 12 + mon - 1
+
+
+def project_income(streams, months=HORIZON, start=None):
+    """Total income of each of `months` months from `start` (YYYY-MM,
+    default this month)."""
+    start = month_index(start or date.today().strftime("%Y-%m"))
+    if not streams:
+        return np.zeros(months, dtype=np.int64)
+
+    amount = np.array([s.amount for s in streams], dtype=float)
+    period = np.array([FREQUENCY_MONTHS.get(s.frequency, 1) for s in streams])
+    first = np.array([month_index(s.start_month) if s.start_month else 0 for s in streams])
+    last = np.array([
+        month_index(s.end_month) if s.end_month else np.iinfo(np.int64).max for s in streams
+    ])
+    growth = np.array([s.growth_pct for s in streams], dtype=float) / 100
+
+    month = start + np.arange(months)
+    since = month[None, :] - first[:, None]
+    paid = (since >= 0) & (month[None, :] <= last[:, None]) & (since % period[:, None] == 0)
+    level = (1 + growth[:, None]) ** (np.arange(months) // 12)[None, :]
+
+    return np.rint((amount[:, None] * level * paid).sum(axis=0)).astype(np.int64)
+
+
+# (db path, this month) -> ((db identity, income streams version), projection)
+_cache = {}
+_cache_lock = Lock()
+
+
+def income_projection(profile=None):
+    """Projected income per month for HORIZON months from this month,
+    cached until the income streams (or the month) change."""
+    init_db(profile)
+    key = (db_path(profile), date.today().strftime("%Y-%m"))
+    version = (db_identity(profile), data_version("income_streams", profile))
+
+    with _cache_lock:
+        hit = _cache.get(key)
+    if hit and hit[0] == version:
+        return hit[1]
+
+    projection = project_income(load_income_streams(profile), HORIZON, key[1])
+    projection.flags.writeable = False
+    with _cache_lock:
+        _cache[key] = (version, projection)
+    return projection
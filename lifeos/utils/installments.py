@@ -0,0 +1,166 @@
+import calendar
+import hashlib
+from datetime import date, datetime, timedelta
+from threading import Lock
+
+from lifeos.utils.calculations import active_emis, load_loans
+from lifeos.utils.db import (
+    data_version, db_identity, db_path, get_connection, init_db, write_transaction,
+)
+from lifeos.utils.rates import load_rate_changes, schedule_rows
+
+# -------------------------------------------------
+# SCHEDULE TABLE
+# -------------------------------------------------
+# Every installment of every active EMI loan is a row in `installments`
+# with its due date. The next unpaid installment (months_paid + 1) falls
+# in the month after last_paid_month, or this month if nothing has been
+# marked paid; earlier and later ones step a month at a time. The day is
+# the loan's emi_date (the 1st when unknown), capped at the month's end.
+#
+# Rows are regenerated only for loans whose terms fingerprint changed, and
+# the whole check is skipped until the loan book (or the month) changes.
+
+# db path -> (db identity, loans version, rate changes version, this month)
+_synced = {}
+_sync_lock = Lock()
+
+
+def _add_months(year, month, n):
+    index = year * 12 + month - 1 + n
+    return index // 12, index % 12 + 1
+
+
+def due_dates(loan, today=None):
+    """Due date of each installment 1..total_months."""
+    today = today or date.today()
+    year, month = today.year, today.month
+    if loan.last_paid_month:
+        try:
+            paid = datetime.strptime(loan.last_paid_month, "%Y-%m")
+            year, month = _add_months(paid.year, paid.month, 1)
+        except ValueError:
+            pass  # reported by the integrity scan (bad_last_paid_month)
+
+    first = _add_months(year, month, -loan.months_paid)
+    dates = []
+    for n in range(loan.total_months):
+        y, m = _add_months(*first, n)
+        day = min(loan.emi_date or 1, calendar.monthrange(y, m)[1])
+        dates.append(date(y, m, day).isoformat())
+    return dates
+
+
+def _fingerprint(loan, changes, today):
+    terms = (
+        loan.principal, loan.interest_rate, loan.total_months, loan.months_paid,
+        loan.emi, loan.emi_date, loan.interest_only, loan.last_paid_month,
+        "" if loan.last_paid_month else today.strftime("%Y-%m"), changes,
+    )
+    return hashlib.sha1(repr(terms).encode()).hexdigest()
+
+
+def _rows(loan, changes, today):
+    for (installment, _, emi, interest, principal, _), due in zip(
+        schedule_rows(loan, changes), due_dates(loan, today)
+    ):
+        status = "PAID" if installment <= loan.months_paid else "DUE"
+        yield str(loan.id), installment, due, emi, principal, interest, status
+
+
+def sync_installments(profile=None, today=None):
+    """Bring `installments` up to date; returns how many loans were
+    regenerated (0 when nothing changed)."""
+    init_db(profile)
+    today = today or date.today()
+    state = (
+        db_identity(profile),
+        data_version("loans", profile),
+        data_version("rate_changes", profile),
+        today.strftime("%Y-%m"),
+    )
+    key = db_path(profile)
+    with _sync_lock:
+        if _synced.get(key) == state:
+            return 0
+
+    loans = {str(l.id): l for l in active_emis(load_loans(profile))}
+    changes = load_rate_changes(profile=profile)
+    wanted = {
+        loan_id: _fingerprint(loan, changes.get(loan_id, ()), today)
+        for loan_id, loan in loans.items()
+    }
+
+    with write_transaction(profile) as conn:
+        stored = dict(conn.execute("SELECT loan_id, terms FROM installment_terms"))
+        stale = [i for i in stored if i not in wanted or stored[i] != wanted[i]]
+        fresh = [i for i in wanted if stored.get(i) != wanted[i]]
+
+        conn.executemany("DELETE FROM installments WHERE loan_id = ?", [(i,) for i in stale])
+        conn.executemany("DELETE FROM installment_terms WHERE loan_id = ?", [(i,) for i in stale])
+        conn.executemany(
+            "INSERT INTO installments "
+            "(loan_id, installment, due_date, emi, principal, interest, status) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                row
+                for i in fresh
+                for row in _rows(loans[i], changes.get(i, ()), today)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO installment_terms (loan_id, terms) VALUES (?, ?)",
+            [(i, wanted[i]) for i in fresh],
+        )
+
+    with _sync_lock:
+        _synced[key] = state
+    return len(fresh)
+
+
+# -------------------------------------------------
+# DUES (INDEXED RANGE QUERIES)
+# -------------------------------------------------
+def upcoming_dues(days=30, profile=None, today=None):
+    """[(due_date, loan_id, lender, emi, principal, interest)] for unpaid
+    installments due from today through today + days."""
+    today = today or date.today()
+    sync_installments(profile, today)
+
+    conn = get_connection(profile)
+    rows = conn.execute(
+        """
+        SELECT i.due_date, i.loan_id, l.lender, i.emi, i.principal, i.interest
+        FROM installments i JOIN loans l ON l.id = i.loan_id
+        WHERE i.due_date BETWEEN ? AND ? AND i.status = 'DUE'
+        ORDER BY i.due_date, i.loan_id
+        """,
+        (today.isoformat(), (today + timedelta(days=days)).isoformat()),
+    ).fetchall()
+    conn.close()
+    return rows
+
+
+def _due_totals(conn, start, end):
+    return conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(emi), 0) FROM installments "
+        "WHERE due_date BETWEEN ? AND ? AND status = 'DUE'",
+        (start.isoformat(), end.isoformat()),
+    ).fetchone()
+
+
+def dues_summary(days=30, profile=None, today=None):
+    """(count, EMI total) of unpaid installments due in the next `days`,
+    in the rest of this month, and before today (overdue)."""
+    today = today or date.today()
+    sync_installments(profile, today)
+    month_end = today.replace(day=calendar.monthrange(today.year, today.month)[1])
+
+    conn = get_connection(profile)
+    summary = {
+        "upcoming": _due_totals(conn, today, today + timedelta(days=days)),
+        "month_end": _due_totals(conn, today, month_end),
+        "overdue": _due_totals(conn, date.min, today - timedelta(days=1)),
+    }
+    conn.close()
+    return summary
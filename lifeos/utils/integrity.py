@@ -0,0 +1,238 @@
+import argparse
+from collections import namedtuple
+from datetime import datetime
+
+from lifeos.utils.db import (
+    COLD_LOANS, get_connection, init_db, list_profiles, write_transaction,
+)
+
+# -------------------------------------------------
+# RULES
+# -------------------------------------------------
+# where: SQL predicate matching bad rows.
+# fix:   SET clause, "DELETE", "ARCHIVE" (move to loans_archive), or None
+#        when a person has to decide.
+#
+# Values the loans CHECK constraints reject (see db._loan_constraints:
+# negative amounts, more EMIs paid than the tenure, an unknown type or
+# status, an EMI date outside 0-31) can't be stored, so there are no rules
+# for them. Row rules run on both loans and loans_archive: the archive has
+# the same DDL and the same ways of going wrong.
+Rule = namedtuple("Rule", "name table key description where fix")
+
+LOAN_TABLES = ("loans", "loans_archive")
+LOAN_FIX_VERSION = ", version = version + 1"  # repairs are writes like any other
+ALL_LOANS = (
+    "SELECT id, loan_no, total_months FROM loans UNION ALL "
+    "SELECT id, loan_no, total_months FROM loans_archive"
+)
+
+
+def loan_rules(name, description, where, fix):
+    """The same row rule for the hot table and the archive."""
+    return [Rule(name, table, "id", description, where, fix) for table in LOAN_TABLES]
+
+
+RULES = [
+    Rule(
+        "cold_loan_not_archived", "loans", "id",
+        "Closed or archived loan still in the live table",
+        f"({COLD_LOANS}) AND id NOT IN (SELECT id FROM loans_archive)",
+        "ARCHIVE",
+    ),
+    *loan_rules(
+        "bad_last_paid_month",
+        "Last paid month is not YYYY-MM",
+        "last_paid_month <> '' AND last_paid_month NOT GLOB '[0-9][0-9][0-9][0-9]-[01][0-9]'",
+        "last_paid_month = ''" + LOAN_FIX_VERSION,
+    ),
+    *loan_rules(
+        "blank_loan_no",
+        "Loan No is blank",
+        "trim(loan_no) = ''",
+        "loan_no = id" + LOAN_FIX_VERSION,
+    ),
+    *loan_rules(
+        "duplicate_loan_no",
+        "Loan No used by more than one loan (live or archived)",
+        "lower(trim(loan_no)) IN ("
+        f"SELECT lower(trim(loan_no)) FROM ({ALL_LOANS}) GROUP BY 1 HAVING COUNT(*) > 1)",
+        None,
+    ),
+    *loan_rules(
+        "emi_missing_terms",
+        "EMI loan without an EMI amount or tenure",
+        "type = 'EMI' AND (emi = 0 OR total_months = 0)",
+        None,
+    ),
+    *loan_rules(
+        "completed_still_active",
+        "EMI loan fully paid but still active",
+        "type = 'EMI' AND status = 'ACTIVE' AND total_months > 0"
+        " AND months_paid >= total_months",
+        None,
+    ),
+    Rule(
+        "archived_loan_is_live", "loans", "id",
+        "Loan is both live and in the archive",
+        "id IN (SELECT id FROM loans_archive)",
+        None,
+    ),
+    Rule(
+        "orphan_rate_changes", "rate_changes", "loan_id",
+        "Rate change for a loan that no longer exists",
+        "loan_id NOT IN (SELECT id FROM loans UNION ALL SELECT id FROM loans_archive)",
+        "DELETE",
+    ),
+    Rule(
+        "rate_change_outside_tenure", "rate_changes", "loan_id",
+        "Rate change after the last installment",
+        f"effective_month > (SELECT total_months FROM ({ALL_LOANS}) l WHERE l.id = loan_id)",
+        "DELETE",
+    ),
+    Rule(
+        "orphan_statement_payments", "statement_payments", "loan_id",
+        "Posted bank debit for a loan that no longer exists",
+        "loan_id NOT IN (SELECT id FROM loans UNION ALL SELECT id FROM loans_archive)",
+        "DELETE",
+    ),
+]
+
+REPAIR_BATCH = 5_000
+SAMPLE_SIZE = 5
+
+
+# -------------------------------------------------
+# SCAN
+# -------------------------------------------------
+def scan(profile=None, sample=SAMPLE_SIZE):
+    """One pass per table: every rule is a SUM() over the same scan, and
+    only rules that matched something are queried again for examples."""
+    init_db(profile)
+
+    conn = get_connection(profile)
+    findings = []
+
+    quick = [r[0] for r in conn.execute("PRAGMA quick_check")]
+    if quick != ["ok"]:
+        findings.append({
+            "rule": "quick_check", "table": "", "description": "SQLite file corruption",
+            "count": len(quick), "sample": quick[:sample], "fixable": False,
+        })
+
+    tables = {}
+    for rule in RULES:
+        tables.setdefault(rule.table, []).append(rule)
+
+    for table, rules in tables.items():
+        sums = ", ".join(f"COALESCE(SUM({r.where}), 0)" for r in rules)
+        counts = conn.execute(f"SELECT {sums} FROM {table}").fetchone()
+
+        for rule, count in zip(rules, counts):
+            if not count:
+                continue
+            keys = conn.execute(
+                f"SELECT {rule.key} FROM {table} WHERE {rule.where} LIMIT ?", (sample,)
+            ).fetchall()
+            findings.append({
+                "rule": rule.name,
+                "table": table,
+                "description": rule.description,
+                "count": count,
+                "sample": [k[0] for k in keys],
+                "fixable": rule.fix is not None,
+            })
+
+    conn.close()
+    return findings
+
+
+# -------------------------------------------------
+# REPAIR (BATCHED)
+# -------------------------------------------------
+def _archive_batch(conn, rule, batch_size):
+    # what archive_loan does, for a batch: mark archived, then move the
+    # rows out of the hot table in the same transaction
+    ids = [r[0] for r in conn.execute(
+        f"SELECT id FROM loans WHERE {rule.where} LIMIT ?", (batch_size,)
+    )]
+    marks = ", ".join("?" for _ in ids)
+    conn.execute(
+        "UPDATE loans SET archived = 1, archived_at = CASE WHEN archived_at = '' THEN ? "
+        f"ELSE archived_at END{LOAN_FIX_VERSION} WHERE id IN ({marks})",
+        (datetime.now().isoformat(), *ids),
+    )
+    conn.execute(f"INSERT INTO loans_archive SELECT * FROM loans WHERE id IN ({marks})", ids)
+    return conn.execute(f"DELETE FROM loans WHERE id IN ({marks})", ids).rowcount
+
+
+def _repair_batch(conn, rule, batch_size):
+    if rule.fix == "ARCHIVE":
+        return _archive_batch(conn, rule, batch_size)
+    if rule.fix == "DELETE":
+        action = f"DELETE FROM {rule.table}"
+    else:
+        action = f"UPDATE {rule.table} SET {rule.fix}"
+    return conn.execute(
+        f"{action} WHERE rowid IN "
+        f"(SELECT rowid FROM {rule.table} WHERE {rule.where} LIMIT ?)",
+        (batch_size,),
+    ).rowcount
+
+
+def _repair_rule(rule, profile, batch_size):
+    # short transactions, so the app can keep writing between batches;
+    # moves run with foreign keys off like every hot/cold move, so child
+    # rows keep pointing at the loan id
+    repaired = 0
+    while True:
+        with write_transaction(profile, foreign_keys=rule.fix != "ARCHIVE") as conn:
+            changed = _repair_batch(conn, rule, batch_size)
+        repaired += changed
+        if changed < batch_size:
+            return repaired
+
+
+def repair(profile=None, batch_size=REPAIR_BATCH, findings=None):
+    """Fix every fixable finding; returns {rule: rows repaired} (a loan
+    rule counts its rows in both tables)."""
+    findings = scan(profile) if findings is None else findings
+    rules = {(r.name, r.table): r for r in RULES}
+    repaired = {}
+    for f in findings:
+        if f["fixable"]:
+            n = _repair_rule(rules[f["rule"], f["table"]], profile, batch_size)
+            repaired[f["rule"]] = repaired.get(f["rule"], 0) + n
+    return repaired
+
+
+# -------------------------------------------------
+# CLI
+# -------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check (and repair) Viveka databases")
+    parser.add_argument("--profile", help="profile to check (default: all)")
+    parser.add_argument("--repair", action="store_true", help="fix what can be fixed")
+    parser.add_argument("--batch", type=int, default=REPAIR_BATCH, help="rows per repair transaction")
+    args = parser.parse_args(argv)
+
+    problems = 0
+    for profile in [args.profile] if args.profile else list_profiles():
+        findings = scan(profile)
+        print(f"[{profile}] {'OK' if not findings else f'{len(findings)} problem(s)'}")
+        for f in findings:
+            fix = "fixable" if f["fixable"] else "manual"
+            print(f"  {f['rule']}: {f['count']} row(s) in {f['table']} ({fix}) – {f['description']}")
+            print(f"    e.g. {', '.join(map(str, f['sample']))}")
+
+        if args.repair and findings:
+            for rule, n in repair(profile, args.batch, findings).items():
+                print(f"  repaired {rule}: {n} row(s)")
+            findings = scan(profile)
+        problems += sum(f["count"] for f in findings)
+
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,68 @@
+from dataclasses import replace
+
+from lifeos.utils.graph import MetricGraph
+
+# -------------------------------------------------
+# DASHBOARD METRICS
+# -------------------------------------------------
+# Rules for MetricGraph. Each one only reads its declared dependencies.
+def _ratio(part, income):
+    return (part / income) if income else 0
+
+
+def _loan_metrics(loan):
+    return {
+        "months_left": loan.months_left,
+        "progress": loan.progress,
+        "payable": loan.payable,
+        "paid": loan.paid,
+        "balance": loan.balance,
+    }
+
+
+def loan_node(loan_id):
+    return f"loan:{loan_id}"
+
+
+def sync_metrics(graph, income, expenses, emi_loans):
+    """Feed the current inputs into the graph and (re)declare the rules.
+
+    Loans are copied in, so editing a loaded Loan in place does not
+    silently change the graph's copy.
+    """
+    graph.set_input("income", income)
+    graph.set_input("expenses", expenses)
+
+    nodes = []
+    for loan in emi_loans:
+        node = loan_node(loan.id)
+        graph.set_input(node, replace(loan))
+        graph.rule(f"{node}:metrics", [node], _loan_metrics)
+        nodes.append(node)
+
+    stale = set(graph.nodes("loan:")) - set(nodes) - {f"{n}:metrics" for n in nodes}
+    graph.discard(stale)
+
+    graph.rule("emi_loans", nodes, lambda *loans: list(loans))
+    _totals(graph)
+    return graph
+
+
+def snapshot_metrics(income, expenses, emi_loans):
+    """A throwaway graph over fixed inputs, for one-off evaluations (what-if
+    scenarios): same rules, without a node per loan."""
+    graph = MetricGraph()
+    graph.set_input("income", income)
+    graph.set_input("expenses", expenses)
+    graph.set_input("emi_loans", list(emi_loans))
+    _totals(graph)
+    return graph
+
+
+def _totals(graph):
+    graph.rule("total_emi", ["emi_loans"], lambda loans: sum(l.emi for l in loans))
+    graph.rule("surplus", ["income", "expenses"], lambda i, e: i - e)
+    graph.rule("free_cash_after_emi", ["surplus", "total_emi"], lambda s, t: s - t)
+    graph.rule("living_cost_ratio", ["expenses", "income"], _ratio)
+    graph.rule("debt_pressure_ratio", ["total_emi", "income"], _ratio)
+    graph.rule("savings_capacity_ratio", ["surplus", "income"], _ratio)
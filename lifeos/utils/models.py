@@ -0,0 +1,179 @@
+from dataclasses import dataclass, field, fields
+
+
+# -------------------------------------------------
+# HELPERS
+# -------------------------------------------------
+def _from_row(cls, row):
+    # Defaults are applied here, once, instead of setdefault() on every rerun.
+    values = {}
+    for f in fields(cls):
+        if not f.init:
+            continue
+        value = row.get(f.name)
+        if value is not None:
+            values[f.name] = value
+    return cls(**values)
+
+
+def _to_row(obj):
+    return {f.name: getattr(obj, f.name) for f in fields(obj) if f.init}
+
+
+# -------------------------------------------------
+# LOAN
+# -------------------------------------------------
+@dataclass(slots=True)
+class Loan:
+    id: object
+    lender: str = ""
+    type: str = "EMI"
+    status: str = "ACTIVE"
+    principal: int = 0
+    emi: int = 0
+    total_months: int = 0
+    months_paid: int = 0
+    interest_rate: float = 0.0
+    extra_paid: int = 0
+    latest_offer: int = 0
+    last_paid_month: str = ""
+    emi_date: int = 0
+    loan_no: str = ""
+    interest_only: bool = False
+    archived: bool = False
+    created_at: str = ""
+    archived_at: str = ""
+    restored_at: str = ""
+    version: int = 0
+
+    # lazily computed derived values, dropped whenever a field changes
+    _derived: dict = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.interest_only = bool(self.interest_only)
+        self.archived = bool(self.archived) or self.status == "CLOSED"
+        if not self.loan_no:
+            self.loan_no = str(self.id)
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name != "_derived":
+            object.__setattr__(self, "_derived", None)
+
+    @classmethod
+    def from_row(cls, row):
+        return _from_row(cls, row)
+
+    def to_row(self):
+        return _to_row(self)
+
+    def _cached(self, key, compute):
+        derived = self._derived
+        if derived is None:
+            derived = {}
+            object.__setattr__(self, "_derived", derived)
+        if key not in derived:
+            derived[key] = compute()
+        return derived[key]
+
+    # ---------------- status ----------------
+    @property
+    def is_active_emi(self):
+        return self.type == "EMI" and self.status == "ACTIVE"
+
+    # ---------------- derived ----------------
+    @property
+    def months_left(self):
+        return self._cached("months_left", lambda: self.total_months - self.months_paid)
+
+    @property
+    def progress(self):
+        def compute():
+            if self.total_months <= 0:
+                return 0.0
+            return min(self.months_paid / self.total_months, 1.0)
+
+        return self._cached("progress", compute)
+
+    @property
+    def payable(self):
+        def compute():
+            if self.interest_only:
+                return self.principal + self.emi * self.total_months
+            return self.emi * self.total_months
+
+        return self._cached("payable", compute)
+
+    @property
+    def interest(self):
+        return self._cached("interest", lambda: self.payable - self.principal)
+
+    @property
+    def paid(self):
+        return self._cached("paid", lambda: self.emi * self.months_paid + self.extra_paid)
+
+    @property
+    def balance(self):
+        def compute():
+            if self.interest_only:
+                return self.principal
+            return max(self.payable - self.paid, 0)
+
+        return self._cached("balance", compute)
+
+
+# -------------------------------------------------
+# EXPENSE
+# -------------------------------------------------
+@dataclass(slots=True)
+class Expense:
+    name: str = ""
+    amount: int = 0
+    type: str = "variable"
+    category: str = "Uncategorized"
+    spent_on: str = ""  # ISO date; blank for recurring monthly amounts
+    tags: str = ""  # comma separated
+
+    def __post_init__(self):
+        self.spent_on = str(self.spent_on or "")[:10]
+        self.category = (self.category or "").strip() or "Uncategorized"
+
+    @property
+    def month(self):
+        return self.spent_on[:7] or None
+
+    @classmethod
+    def from_row(cls, row):
+        return _from_row(cls, row)
+
+    def to_row(self):
+        return _to_row(self)
+
+
+def total_amount(expenses):
+    return sum(e.amount for e in expenses)
+
+
+# -------------------------------------------------
+# INCOME STREAM
+# -------------------------------------------------
+@dataclass(slots=True)
+class IncomeStream:
+    name: str = ""
+    kind: str = "salary"  # salary / bonus / rental / other
+    amount: int = 0  # per payout, at today's level
+    frequency: str = "monthly"  # monthly / quarterly / annual
+    start_month: str = ""  # YYYY-MM of the first payout; blank = already paying
+    end_month: str = ""  # YYYY-MM of the last payout; blank = open-ended
+    growth_pct: float = 0.0  # yearly raise, from today
+
+    def __post_init__(self):
+        self.start_month = str(self.start_month or "")[:7]
+        self.end_month = str(self.end_month or "")[:7]
+
+    @classmethod
+    def from_row(cls, row):
+        return _from_row(cls, row)
+
+    def to_row(self):
+        return _to_row(self)
@@ -0,0 +1,132 @@
+import numpy as np
+
+from lifeos.utils.emi import balance_after, months_to_close
+from lifeos.utils.rates import current_terms
+
+# -------------------------------------------------
+# SETTINGS
+# -------------------------------------------------
+# Which loan the extra payment (plus every EMI freed by a closed loan)
+# goes to first.
+STRATEGIES = {
+    "Avalanche": "highest interest rate first",
+    "Snowball": "smallest balance first",
+}
+
+
+# -------------------------------------------------
+# BOOK
+# -------------------------------------------------
+def payoff_book(loans, changes_by_loan=None):
+    """Outstanding balance, annual rate and EMI of each open loan."""
+    changes_by_loan = changes_by_loan or {}
+    ids, balance, rate, emi = [], [], [], []
+    for loan in loans:
+        terms = current_terms(loan, changes_by_loan.get(str(loan.id), ()))
+        if loan.months_left <= 0 or terms["balance"] <= 0:
+            continue
+        ids.append(loan.id)
+        balance.append(terms["balance"])
+        rate.append(terms["rate"])
+        emi.append(terms["emi"])
+
+    return {
+        "id": ids,
+        "balance": np.array(balance, dtype=float),
+        "rate": np.array(rate, dtype=float),
+        "emi": np.array(emi, dtype=float),
+    }
+
+
+def payoff_order(book, strategy="Avalanche"):
+    if strategy == "Snowball":
+        return np.lexsort((-book["rate"], book["balance"]))
+    return np.lexsort((book["balance"], -book["rate"]))
+
+
+# -------------------------------------------------
+# SIMULATION
+# -------------------------------------------------
+def simulate_payoff(book, extra, strategy="Avalanche"):
+    """Event-driven payoff with a fixed monthly extra payment.
+
+    Between two loan closures every balance follows the closed-form
+    annuity curve, so the book is advanced one closure at a time instead
+    of month by month. Returns (debt-free month, close month per loan,
+    extra each loan received while it was the target).
+    """
+    balance = book["balance"].copy()
+    rate = book["rate"]
+    emi = book["emi"]
+    size = len(balance)
+
+    close_month = np.zeros(size)
+    allocation = np.zeros(size)
+    open_ = balance > 0
+    pool = float(extra)
+    month = 0
+
+    for target in payoff_order(book, strategy):
+        if not open_[target]:
+            continue
+
+        # the target stays first in line until it closes
+        while open_[target]:
+            payment = emi.copy()
+            payment[target] += pool
+            allocation[target] = max(allocation[target], pool)
+
+            n = np.where(open_, months_to_close(balance, rate, payment), np.inf)
+            step = n.min()
+            if not np.isfinite(step):
+                return np.inf, close_month, allocation
+
+            closed = open_ & (n <= step)
+            balance = np.where(closed, 0.0, balance_after(balance, rate, payment, step))
+            balance[~open_] = 0.0
+            month += step
+
+            close_month[closed] = month
+            open_ &= ~closed
+            pool += emi[closed].sum()
+
+    return month, close_month, allocation
+
+
+# -------------------------------------------------
+# GOAL SEEK
+# -------------------------------------------------
+def minimum_extra(book, target_months, strategy="Avalanche"):
+    """Smallest whole-rupee monthly extra that clears the book within
+    target_months, found by bisection (debt-free month never increases
+    as the extra grows). Returns None when no extra can reach it."""
+    if len(book["balance"]) == 0:
+        return 0
+
+    month, _, _ = simulate_payoff(book, 0, strategy)
+    if month <= target_months:
+        return 0
+
+    # beyond the whole outstanding balance more extra changes nothing
+    hi = int(np.ceil(book["balance"].sum()))
+    if simulate_payoff(book, hi, strategy)[0] > target_months:
+        return None
+
+    lo = 0
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if simulate_payoff(book, mid, strategy)[0] <= target_months:
+            hi = mid
+        else:
+            lo = mid
+    return hi
+
+
+def goal_plan(book, target_months, strategy="Avalanche"):
+    """minimum_extra plus the payoff it buys: (extra, debt-free month,
+    close month per loan, extra per loan). The last three are None when
+    no extra is needed or none is enough."""
+    extra = minimum_extra(book, target_months, strategy)
+    if not extra:
+        return extra, None, None, None
+    return (extra, *simulate_payoff(book, extra, strategy))
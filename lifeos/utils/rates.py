@@ -0,0 +1,163 @@
+from functools import lru_cache
+
+from lifeos.utils.db import get_connection, init_db, write_transaction
+from lifeos.utils.emi import balance_after, emi_amount
+
+
+# -------------------------------------------------
+# LOAD / SAVE
+# -------------------------------------------------
+# effective_month is the installment number (1-based) from which the
+# new annual rate applies.
+def load_rate_changes(loan_id=None, profile=None):
+    init_db(profile)
+
+    conn = get_connection(profile)
+    sql = "SELECT loan_id, effective_month, rate FROM rate_changes"
+    params = ()
+    if loan_id is not None:
+        sql += " WHERE loan_id = ?"
+        params = (str(loan_id),)
+    rows = conn.execute(sql + " ORDER BY loan_id, effective_month", params).fetchall()
+    conn.close()
+
+    changes = {}
+    for lid, month, rate in rows:
+        changes.setdefault(lid, []).append((int(month), float(rate)))
+    return {lid: tuple(c) for lid, c in changes.items()}
+
+
+def add_rate_change(loan_id, effective_month, rate, profile=None):
+    with write_transaction(profile) as conn:
+        conn.execute(
+            """
+            INSERT INTO rate_changes (loan_id, effective_month, rate)
+            VALUES (?, ?, ?)
+            ON CONFLICT (loan_id, effective_month) DO UPDATE SET rate = excluded.rate
+            """,
+            (str(loan_id), int(effective_month), float(rate)),
+        )
+
+
+def delete_rate_change(loan_id, effective_month, profile=None):
+    with write_transaction(profile) as conn:
+        conn.execute(
+            "DELETE FROM rate_changes WHERE loan_id = ? AND effective_month = ?",
+            (str(loan_id), int(effective_month)),
+        )
+
+
+# -------------------------------------------------
+# AMORTIZATION
+# -------------------------------------------------
+def _valid_changes(total_months, changes):
+    # one rate per month, later entries win, months outside the tenure dropped
+    by_month = {m: r for m, r in changes if 1 <= m <= total_months}
+    return tuple(sorted(by_month.items()))
+
+
+@lru_cache(maxsize=8192)
+def _checkpoint(principal, total_months, base_rate, changes):
+    """(start month, opening balance, rate, emi) of the last rate segment.
+
+    Each prefix of ``changes`` is its own cache entry, so appending a new
+    change only re-derives the segment after the last unchanged one.
+    """
+    if not changes:
+        return 1, float(principal), base_rate, emi_amount(principal, base_rate, total_months)
+
+    start, balance, rate, emi = _checkpoint(principal, total_months, base_rate, changes[:-1])
+    month, new_rate = changes[-1]
+
+    balance = balance_after(balance, rate, emi, month - start)
+    remaining = total_months - month + 1
+    return month, balance, new_rate, emi_amount(balance, new_rate, remaining)
+
+
+def rate_segments(loan, changes=()):
+    changes = _valid_changes(loan.total_months, changes)
+    segments = []
+    for i in range(len(changes) + 1):
+        start, balance, rate, emi = _checkpoint(
+            loan.principal, loan.total_months, loan.interest_rate, changes[:i]
+        )
+        end = changes[i][0] - 1 if i < len(changes) else loan.total_months
+        if end < start:
+            continue
+        segments.append({
+            "from_month": start,
+            "to_month": end,
+            "rate": rate,
+            "emi": round(emi),
+            "opening_balance": round(balance),
+        })
+    return segments
+
+
+def _interest_only_emi(loan, rate):
+    # interest-only EMIs move in proportion to the rate
+    if loan.interest_rate > 0:
+        return round(loan.emi * rate / loan.interest_rate)
+    return round(loan.principal * rate / 1200)
+
+
+def current_terms(loan, changes=()):
+    """Outstanding balance, rate and EMI for the next installment."""
+    next_month = loan.months_paid + 1
+    applied = tuple(
+        c for c in _valid_changes(loan.total_months, changes) if c[0] <= next_month
+    )
+
+    if loan.interest_only:
+        rate = applied[-1][1] if applied else loan.interest_rate
+        return {
+            "balance": loan.principal,
+            "rate": rate,
+            "emi": _interest_only_emi(loan, rate),
+        }
+
+    start, balance, rate, emi = _checkpoint(
+        loan.principal, loan.total_months, loan.interest_rate, applied
+    )
+    balance = balance_after(balance, rate, emi, next_month - start)
+    return {"balance": round(balance), "rate": rate, "emi": round(emi)}
+
+
+def schedule_rows(loan, changes=()):
+    """Yield (installment, rate, emi, interest, principal, balance) for
+    every installment, re-amortizing at each rate change."""
+    rates = dict(_valid_changes(loan.total_months, changes))
+    rate = loan.interest_rate
+    balance = float(loan.principal)
+
+    if loan.interest_only:
+        for month in range(1, loan.total_months + 1):
+            rate = rates.get(month, rate)
+            emi = _interest_only_emi(loan, rate)
+            yield month, rate, emi, emi, 0, loan.principal
+        return
+
+    emi = emi_amount(balance, rate, loan.total_months)
+    for month in range(1, loan.total_months + 1):
+        if month in rates:
+            rate = rates[month]
+            emi = emi_amount(balance, rate, loan.total_months - month + 1)
+        interest = balance * rate / 1200
+        principal = min(emi - interest, balance)
+        balance = max(balance - principal, 0.0)
+        yield month, rate, round(emi), round(interest), round(principal), round(balance)
+
+
+def apply_rate_shock(loans, changes_by_loan, delta_pct):
+    """Re-derive current terms for every loan if rates move by delta_pct
+    from the next installment onward."""
+    results = {}
+    for loan in loans:
+        changes = changes_by_loan.get(str(loan.id), ())
+        before = current_terms(loan, changes)
+        shocked = changes + ((loan.months_paid + 1, max(before["rate"] + delta_pct, 0.0)),)
+        results[loan.id] = {
+            "before": before,
+            "after": current_terms(loan, shocked),
+        }
+    return results
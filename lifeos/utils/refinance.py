@@ -0,0 +1,150 @@
+import numpy as np
+
+from lifeos.utils.emi import emi_array, remaining_interest
+from lifeos.utils.rates import current_terms
+
+# -------------------------------------------------
+# SETTINGS
+# -------------------------------------------------
+# The frontier of (amount moved, interest saved) combinations is thinned
+# to one point per amount bucket past this size, which bounds the work on
+# very large books at a tiny loss of precision.
+MAX_FRONTIER = 20_000
+
+
+# -------------------------------------------------
+# BOOK
+# -------------------------------------------------
+def refinance_book(loans, changes_by_loan=None):
+    """Outstanding balance, rate, EMI, months left and the interest still
+    to pay on each open loan if it is kept."""
+    changes_by_loan = changes_by_loan or {}
+    ids, lenders, balance, rate, emi, months_left = [], [], [], [], [], []
+    for loan in loans:
+        terms = current_terms(loan, changes_by_loan.get(str(loan.id), ()))
+        if loan.months_left <= 0 or terms["balance"] <= 0:
+            continue
+        ids.append(loan.id)
+        lenders.append(loan.lender)
+        balance.append(terms["balance"])
+        rate.append(terms["rate"])
+        emi.append(terms["emi"])
+        months_left.append(loan.months_left)
+
+    book = {
+        "id": ids,
+        "lender": lenders,
+        "balance": np.array(balance, dtype=float),
+        "rate": np.array(rate, dtype=float),
+        "emi": np.array(emi, dtype=float),
+        "months_left": np.array(months_left, dtype=float),
+    }
+    book["interest"] = np.asarray(
+        remaining_interest(book["balance"], book["rate"], book["emi"], book["months_left"]),
+        dtype=float,
+    )
+    return book
+
+
+# -------------------------------------------------
+# PAIRINGS (OFFER x LOAN)
+# -------------------------------------------------
+# A new loan's EMI is linear in the amount moved (amount * EMI per rupee),
+# and so are its interest and fee. Moving a set of loans therefore saves
+# the sum of what each loan saves on its own:
+#     saving_i = interest_i - amount_i * (emi_per_rupee * tenure - 1 + fee)
+# which makes every (offer, loan) pair one cell of a matrix.
+def pairings(book, offers):
+    """offers: {"name", "rate", "tenure", "fee_pct", "max_amount"} arrays.
+    Returns offers x loans matrices: net interest saved, new EMI and EMI
+    change, plus whether the loan fits under the offer's max amount."""
+    per_rupee = np.atleast_1d(emi_array(1.0, offers["rate"], offers["tenure"]))
+    cost = per_rupee * offers["tenure"] - 1 + offers["fee_pct"] / 100
+
+    balance = book["balance"][None, :]
+    new_emi = per_rupee[:, None] * balance
+    return {
+        "cost_per_rupee": cost,
+        "emi_per_rupee": per_rupee,
+        "saving": book["interest"][None, :] - cost[:, None] * balance,
+        "new_emi": new_emi,
+        "emi_change": new_emi - book["emi"][None, :],
+        "fits": balance <= offers["max_amount"][:, None],
+    }
+
+
+# -------------------------------------------------
+# BEST COMBINATION (PARETO FRONTIER)
+# -------------------------------------------------
+def best_combination(amount, saving, cap):
+    """Indices of the loans whose combined amount fits in cap and whose
+    total saving is largest (0/1 knapsack).
+
+    Keeps only Pareto-optimal combinations: adding a loan to every kept
+    combination at once, then dropping any combination that moves more
+    money for no more saving, or does not fit.
+    """
+    f_amount = np.zeros(1)
+    f_saving = np.zeros(1)
+    steps = []
+
+    for a, s in zip(amount, saving):
+        size = len(f_amount)
+        cand_amount = np.concatenate([f_amount, f_amount + a])
+        cand_saving = np.concatenate([f_saving, f_saving + s])
+        origin = np.tile(np.arange(size), 2)
+        took = np.repeat([False, True], size)
+
+        fits = cand_amount <= cap
+        cand_amount, cand_saving = cand_amount[fits], cand_saving[fits]
+        origin, took = origin[fits], took[fits]
+
+        order = np.lexsort((-cand_saving, cand_amount))
+        best_before = np.maximum.accumulate(cand_saving[order])
+        keep = order[np.concatenate([[True], cand_saving[order][1:] > best_before[:-1]])]
+
+        if len(keep) > MAX_FRONTIER:
+            bucket = cand_amount[keep] // (cap / MAX_FRONTIER)
+            keep = keep[np.concatenate([bucket[1:] != bucket[:-1], [True]])]
+
+        f_amount, f_saving = cand_amount[keep], cand_saving[keep]
+        steps.append((origin[keep], took[keep]))
+
+    # walk the choices back from the best final combination
+    j = int(np.argmax(f_saving))
+    chosen = []
+    for i in range(len(steps) - 1, -1, -1):
+        origin, took = steps[i]
+        if took[j]:
+            chosen.append(i)
+        j = origin[j]
+    return chosen[::-1]
+
+
+def consolidation_plans(book, offers):
+    """Best set of loans to move into each offer, best plan first:
+    [{"offer", "loans", "amount", "fee", "emi_before", "new_emi",
+    "interest_saved"}]. Loans that would cost more under an offer, or
+    exceed its max amount alone, are never considered for it."""
+    matrix = pairings(book, offers)
+    plans = []
+    for o, name in enumerate(offers["name"]):
+        candidates = np.flatnonzero((matrix["saving"][o] > 0) & matrix["fits"][o])
+        if not len(candidates):
+            continue
+        picked = candidates[best_combination(
+            book["balance"][candidates], matrix["saving"][o][candidates], offers["max_amount"][o]
+        )]
+        if not len(picked):
+            continue
+        amount = book["balance"][picked].sum()
+        plans.append({
+            "offer": name,
+            "loans": [book["id"][i] for i in picked],
+            "amount": amount,
+            "fee": amount * offers["fee_pct"][o] / 100,
+            "emi_before": book["emi"][picked].sum(),
+            "new_emi": amount * matrix["emi_per_rupee"][o],
+            "interest_saved": matrix["saving"][o][picked].sum(),
+        })
+    return sorted(plans, key=lambda p: -p["interest_saved"])
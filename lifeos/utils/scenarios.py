@@ -0,0 +1,318 @@
+import json
+import multiprocessing
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from threading import Lock
+
+from lifeos.utils import db
+from lifeos.utils.cache import cache_key, cached
+from lifeos.utils.calculations import LOAN_DB_FIELDS, active_emis, load_monthly_income
+from lifeos.utils.db import (
+    active_profile, data_version, db_path, get_connection, init_db, write_transaction,
+)
+from lifeos.utils.expenses import current_month
+from lifeos.utils.metrics import snapshot_metrics
+from lifeos.utils.models import Expense, Loan
+
+# -------------------------------------------------
+# SETTINGS
+# -------------------------------------------------
+# A process pool costs about a second to start (each worker imports numpy
+# and pandas) while one evaluation costs ~20us per loan, so the pool only
+# pays off past this many loan evaluations (scenarios x loans) and with
+# more than one CPU to spread them over (see benchmarks/scenarios.py).
+PARALLEL_MIN_WORK = 100_000
+MAX_WORKERS = 4
+
+# dashboard metrics compared per scenario, in display order
+METRICS = (
+    "income", "expenses", "total_emi", "surplus", "free_cash_after_emi",
+    "living_cost_ratio", "debt_pressure_ratio", "savings_capacity_ratio",
+    "active_emis", "balance", "debt_free_months",
+)
+# changes to these fields are what a loan overlay can record
+LOAN_OVERLAY_FIELDS = tuple(
+    f for f in LOAN_DB_FIELDS
+    if f not in ("id", "version", "created_at", "archived_at", "restored_at")
+)
+
+
+# -------------------------------------------------
+# SCENARIOS
+# -------------------------------------------------
+def list_scenarios(profile=None):
+    """[(id, name)] oldest first."""
+    init_db(profile)
+
+    conn = get_connection(profile)
+    rows = conn.execute("SELECT id, name FROM scenarios ORDER BY id").fetchall()
+    conn.close()
+    return rows
+
+
+def create_scenario(name, profile=None):
+    name = name.strip()
+    if not name:
+        raise ValueError("Give the scenario a name")
+    init_db(profile)
+    try:
+        with write_transaction(profile) as conn:
+            cur = conn.execute(
+                "INSERT INTO scenarios (name, created_at) VALUES (?, ?)",
+                (name, datetime.now().isoformat(timespec="seconds")),
+            )
+    except sqlite3.IntegrityError:
+        raise ValueError("A scenario with this name already exists") from None
+    return cur.lastrowid
+
+
+def delete_scenario(scenario_id, profile=None):
+    with write_transaction(profile) as conn:
+        conn.execute("DELETE FROM scenarios WHERE id = ?", (scenario_id,))
+
+
+# -------------------------------------------------
+# OVERLAYS (COPY-ON-WRITE)
+# -------------------------------------------------
+# A scenario stores only what differs from the live data: a 'set' row with
+# the changed fields, a 'remove' row, or an 'add' row with a whole new loan
+# or expense. Nothing is copied; the live rows show through everywhere
+# else, including later edits to them.
+def diff_loans(base, edited):
+    """Overlay rows [(loan_id, op, changes)] turning the base loans into
+    the edited ones."""
+    edited = {str(l.id): l for l in edited}
+    rows = []
+    for loan in base:
+        new = edited.pop(str(loan.id), None)
+        if new is None:
+            rows.append((str(loan.id), "remove", {}))
+            continue
+        changes = {
+            f: getattr(new, f) for f in LOAN_OVERLAY_FIELDS
+            if getattr(new, f) != getattr(loan, f)
+        }
+        if changes:
+            rows.append((str(loan.id), "set", changes))
+    for loan_id, loan in edited.items():
+        rows.append((loan_id, "add", {f: getattr(loan, f) for f in LOAN_OVERLAY_FIELDS}))
+    return rows
+
+
+def diff_expenses(base, edited):
+    """Overlay rows [(type, name, op, amount, category)] turning the base
+    expenses into the edited ones, matched on (type, name)."""
+    edited = {(e.type, e.name): e for e in edited}
+    rows = []
+    for e in base:
+        new = edited.pop((e.type, e.name), None)
+        if new is None:
+            rows.append((e.type, e.name, "remove", 0, e.category))
+        elif (new.amount, new.category) != (e.amount, e.category):
+            rows.append((e.type, e.name, "set", new.amount, new.category))
+    for (kind, name), e in edited.items():
+        rows.append((kind, name, "add", e.amount, e.category))
+    return rows
+
+
+def save_overlay(scenario_id, loan_rows, expense_rows, profile=None):
+    """Replace the scenario's overlay rows (see diff_loans / diff_expenses)."""
+    with write_transaction(profile) as conn:
+        conn.execute("DELETE FROM scenario_loans WHERE scenario_id = ?", (scenario_id,))
+        conn.execute("DELETE FROM scenario_expenses WHERE scenario_id = ?", (scenario_id,))
+        conn.executemany(
+            "INSERT INTO scenario_loans (scenario_id, loan_id, op, changes) VALUES (?, ?, ?, ?)",
+            [(scenario_id, i, op, json.dumps(changes)) for i, op, changes in loan_rows],
+        )
+        conn.executemany(
+            "INSERT INTO scenario_expenses (scenario_id, type, name, op, amount, category) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(scenario_id, *row) for row in expense_rows],
+        )
+
+
+# -------------------------------------------------
+# RESOLVING
+# -------------------------------------------------
+# The overlay is applied by the query that reads the data: live rows LEFT
+# JOIN their overlay row, removed ones filtered out, added ones appended.
+# scenario_id NULL joins nothing, which reads the live data unchanged.
+def _resolved_loans_sql():
+    columns = ", ".join(
+        f"COALESCE(json_extract(o.changes, '$.{f}'), l.{f}) AS {f}"
+        if f in LOAN_OVERLAY_FIELDS else f"l.{f}"
+        for f in LOAN_DB_FIELDS
+    )
+    added = ", ".join(
+        f"json_extract(changes, '$.{f}')" if f in LOAN_OVERLAY_FIELDS
+        else "loan_id" if f == "id" else "NULL"
+        for f in LOAN_DB_FIELDS
+    )
+    return f"""
+        SELECT {columns}
+        FROM loans l
+        LEFT JOIN scenario_loans o ON o.scenario_id = :scenario AND o.loan_id = l.id
+        WHERE o.op IS NULL OR o.op = 'set'
+        UNION ALL
+        SELECT {added}
+        FROM scenario_loans WHERE scenario_id = :scenario AND op = 'add'
+    """
+
+
+RESOLVED_EXPENSES = """
+    SELECT e.type, e.name, COALESCE(o.amount, e.amount) AS amount,
+           COALESCE(o.category, e.category) AS category, e.month
+    FROM expenses e
+    LEFT JOIN scenario_expenses o
+        ON o.scenario_id = :scenario AND o.type = e.type AND o.name = e.name
+    WHERE o.op IS NULL OR o.op = 'set'
+    UNION ALL
+    SELECT type, name, amount, category, NULL
+    FROM scenario_expenses WHERE scenario_id = :scenario AND op = 'add'
+"""
+
+
+def scenario_loans(scenario_id=None, profile=None):
+    """Live loans as the scenario sees them."""
+    init_db(profile)
+
+    conn = get_connection(profile)
+    rows = conn.execute(_resolved_loans_sql(), {"scenario": scenario_id}).fetchall()
+    conn.close()
+    return [Loan.from_row(dict(zip(LOAN_DB_FIELDS, r))) for r in rows]
+
+
+def scenario_expenses(scenario_id=None, profile=None):
+    """Recurring expenses (fixed and undated variable ones) as the scenario
+    sees them; dated expenses are never overlaid."""
+    init_db(profile)
+
+    conn = get_connection(profile)
+    rows = conn.execute(
+        f"SELECT type, name, amount, category FROM ({RESOLVED_EXPENSES}) "
+        "WHERE type = 'fixed' OR month IS NULL",
+        {"scenario": scenario_id},
+    ).fetchall()
+    conn.close()
+    return [
+        Expense.from_row(dict(zip(("type", "name", "amount", "category"), r))) for r in rows
+    ]
+
+
+def _expense_total(scenario_id, month, profile):
+    # the monthly total of utils/expenses.py, over the resolved rows
+    conn = get_connection(profile)
+    total = conn.execute(
+        f"SELECT COALESCE(SUM(amount), 0) FROM ({RESOLVED_EXPENSES}) "
+        "WHERE type = 'fixed' OR month IS NULL OR month = :month",
+        {"scenario": scenario_id, "month": month},
+    ).fetchone()[0]
+    conn.close()
+    return total
+
+
+# -------------------------------------------------
+# METRICS
+# -------------------------------------------------
+def scenario_metrics(scenario_id=None, profile=None, month=None):
+    """The dashboard's metrics with the scenario applied (None: live data)."""
+    month = month or current_month()
+    emi_loans = active_emis(scenario_loans(scenario_id, profile))
+    income = load_monthly_income(profile)
+    expenses = _expense_total(scenario_id, month, profile)
+
+    graph = snapshot_metrics(income, expenses, emi_loans)
+    metrics = {name: graph.get(name) for name in METRICS[:8]}
+    metrics["active_emis"] = len(emi_loans)
+    metrics["balance"] = sum(l.balance for l in emi_loans)
+    metrics["debt_free_months"] = max((l.months_left for l in emi_loans), default=0)
+    return metrics
+
+
+def _params(scenario_id, profile):
+    # cached() already keys on the loan book; the other inputs go here
+    return (
+        scenario_id, current_month(),
+        *(data_version(t, profile) for t in (
+            "expenses", "income_streams", "scenario_loans", "scenario_expenses",
+        )),
+    )
+
+
+def _cached_metrics(scenario_id, profile, params):
+    return cached(
+        "scenarios.metrics", params,
+        lambda: scenario_metrics(scenario_id, profile, params[1]), profile,
+    )
+
+
+def _worker_init():
+    # workers read the database file; the parent flushed its RAM copy
+    db.IN_MEMORY = False
+
+
+def _pool_workers(scenario_ids, profile, max_workers):
+    """Worker processes worth starting for these evaluations (0: none)."""
+    workers = min(max_workers, os.cpu_count() or 1, len(scenario_ids))
+    if workers < 2:
+        return 0
+    conn = get_connection(profile)
+    loans = conn.execute("SELECT COUNT(*) FROM loans").fetchone()[0]
+    conn.close()
+    return workers if len(scenario_ids) * loans >= PARALLEL_MIN_WORK else 0
+
+
+def _evaluate_in_pool(scenario_ids, profile, params, workers):
+    if db.IN_MEMORY:
+        db.flush_memory(profile)
+    # spawn: forking a process with live SQLite connections and server
+    # threads is not safe
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_worker_init,
+    ) as pool:
+        return list(pool.map(
+            _cached_metrics, scenario_ids, [profile] * len(scenario_ids),
+            [params[i] for i in scenario_ids],
+        ))
+
+
+# (db path, scenario id) -> (cache key, metrics) last seen by this process,
+# so a rerun with nothing changed never starts a pool
+_latest = {}
+_latest_lock = Lock()
+
+
+def evaluate_scenarios(scenario_ids, profile=None, max_workers=MAX_WORKERS):
+    """{scenario_id: metrics} with the live data under None. When the
+    scenarios still to compute add up to enough work (PARALLEL_MIN_WORK)
+    they are spread over a process pool; each worker resolves its
+    scenarios on its own connection."""
+    profile = profile or active_profile()
+    path = db_path(profile)
+    ids = [None, *scenario_ids]
+    params = {i: _params(i, profile) for i in ids}
+    keys = {i: cache_key("scenarios.metrics", params[i], profile) for i in ids}
+
+    results = {}
+    with _latest_lock:
+        for i in ids:
+            hit = _latest.get((path, i))
+            if hit and hit[0] == keys[i]:
+                results[i] = hit[1]
+    missing = [i for i in ids if i not in results]
+
+    workers = _pool_workers(missing, profile, max_workers)
+    if workers:
+        computed = _evaluate_in_pool(missing, profile, params, workers)
+    else:
+        computed = [_cached_metrics(i, profile, params[i]) for i in missing]
+
+    with _latest_lock:
+        for i, metrics in zip(missing, computed):
+            _latest[(path, i)] = (keys[i], metrics)
+            results[i] = metrics
+    return {i: results[i] for i in ids}
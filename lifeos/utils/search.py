@@ -0,0 +1,82 @@
+import re
+
+from lifeos.utils.db import get_connection, init_db, write_transaction
+
+# -------------------------------------------------
+# FULL-TEXT SEARCH
+# -------------------------------------------------
+# loans_search / expenses_search are FTS5 indexes kept in sync by triggers
+# (see db._search_index). Every word typed is a prefix and all of them must
+# match; results are ranked by bm25, with loan numbers and expense names
+# weighted above lenders, categories and tags.
+#
+# Ranking every match of a word shared by half the book ("bank") costs
+# ~100ms, so only the first CANDIDATES matches are ranked; more words
+# narrow that down to the exact rows.
+SEARCH_LIMIT = 8
+CANDIDATES = 500
+
+LOAN_SQL = """
+    SELECT l.id, l.loan_no, l.lender, l.type, l.status, m.score
+    FROM (
+        SELECT rowid, bm25(loans_search, 4.0, 1.0) AS score
+        FROM loans_search WHERE loans_search MATCH ? LIMIT ?
+    ) m
+    JOIN loans l ON l.rowid = m.rowid
+    ORDER BY m.score
+    LIMIT ?
+"""
+
+EXPENSE_SQL = """
+    SELECT e.id, e.name, e.category, e.amount, m.score
+    FROM (
+        SELECT rowid, bm25(expenses_search, 4.0, 1.0, 1.0) AS score
+        FROM expenses_search WHERE expenses_search MATCH ? LIMIT ?
+    ) m
+    JOIN expenses e ON e.id = m.rowid
+    ORDER BY m.score
+    LIMIT ?
+"""
+
+
+def match_query(text):
+    """'ICICI pl' -> '"icici"* "pl"*' (FTS5 syntax can't be injected: every
+    word is quoted, and '_' or '-' split words as the tokenizer does)."""
+    words = re.findall(r"[^\W_]+", text.lower())
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def search(text, limit=SEARCH_LIMIT, profile=None):
+    """Best matches among loans and expenses:
+    [{"kind", "id", "title", "detail"}], best first. kind is the loan
+    type (EMI / SETTLEMENT) or "expense"."""
+    query = match_query(text)
+    if not query:
+        return []
+
+    init_db(profile)
+    conn = get_connection(profile)
+    loans = conn.execute(LOAN_SQL, (query, CANDIDATES, limit)).fetchall()
+    expenses = conn.execute(EXPENSE_SQL, (query, CANDIDATES, limit)).fetchall()
+    conn.close()
+
+    hits = [
+        (score, {"kind": type_, "id": id_, "title": loan_no or id_,
+                 "detail": f"{lender} · {type_} · {status.title()}"})
+        for id_, loan_no, lender, type_, status, score in loans
+    ] + [
+        (score, {"kind": "expense", "id": id_, "title": name,
+                 "detail": f"{category} · ₹{amount or 0:,}"})
+        for id_, name, category, amount, score in expenses
+    ]
+    hits.sort(key=lambda hit: hit[0])
+    return [hit for _, hit in hits[:limit]]
+
+
+def rebuild_search_index(profile=None):
+    """Re-derive both indexes from their tables (e.g. after a VACUUM,
+    which may renumber the rowids of loans)."""
+    init_db(profile)
+    with write_transaction(profile) as conn:
+        for fts in ("loans_search", "expenses_search"):
+            conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
@@ -0,0 +1,83 @@
+import numpy as np
+
+from lifeos.utils.calculations import load_loan_columns
+from lifeos.utils.db import get_connection, init_db
+
+# -------------------------------------------------
+# 31% BENCHMARK
+# -------------------------------------------------
+# Settlement comparison baseline based on real-world outcomes:
+# an offer at or below 31% of principal is a good settlement.
+BENCHMARK_PCT = 31.0
+
+
+# -------------------------------------------------
+# ACTIVE SETTLEMENTS (VECTORIZED)
+# -------------------------------------------------
+def load_settlement_columns(status="ACTIVE"):
+    # closed settlements are in the archive
+    return load_loan_columns(
+        where="type = 'SETTLEMENT' AND status = ?",
+        params=(status,),
+        order_by="rowid",
+        table="loans_archive" if status == "CLOSED" else "loans",
+    )
+
+
+def settlement_metrics(cols):
+    principal = cols["principal"].astype(np.float64)
+    offer = cols["latest_offer"].astype(np.float64)
+    has_offer = offer > 0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        offer_pct = np.where(
+            has_offer & (principal > 0), offer / principal * 100, np.nan
+        )
+
+    return {
+        "offer_pct": np.round(offer_pct, 1),
+        "vs_benchmark": np.round(offer_pct - BENCHMARK_PCT, 1),
+        "benchmark_amount": np.round(principal * BENCHMARK_PCT / 100).astype(np.int64),
+        "savings": np.where(has_offer, principal - offer, 0).astype(np.int64),
+    }
+
+
+# -------------------------------------------------
+# CLOSED SETTLEMENTS (SQL AGGREGATE)
+# -------------------------------------------------
+def closed_settlement_stats(profile=None):
+    """Every closed settlement is counted; the settled amount, savings and
+    offer percentages come from the ones with a recorded offer."""
+    init_db(profile)
+
+    conn = get_connection(profile)
+    row = conn.execute(
+        """
+        SELECT
+            COUNT(*),
+            COALESCE(SUM(principal), 0),
+            COALESCE(SUM(has_offer), 0),
+            COALESCE(SUM(CASE WHEN has_offer THEN principal END), 0),
+            COALESCE(SUM(CASE WHEN has_offer THEN latest_offer END), 0),
+            AVG(CASE WHEN has_offer THEN latest_offer * 100.0 / principal END),
+            COALESCE(SUM(has_offer AND latest_offer * 100.0 / principal <= ?), 0)
+        FROM (
+            SELECT principal, latest_offer, latest_offer > 0 AND principal > 0 AS has_offer
+            FROM loans_archive
+            WHERE type = 'SETTLEMENT' AND status = 'CLOSED'
+        )
+        """,
+        (BENCHMARK_PCT,),
+    ).fetchone()
+    conn.close()
+
+    count, principal, with_offer, offer_principal, settled, avg_pct, within_benchmark = row
+    return {
+        "count": count,
+        "principal": principal,
+        "with_offer": with_offer,
+        "settled": settled,
+        "saved": offer_principal - settled,
+        "avg_pct": round(avg_pct, 1) if avg_pct is not None else 0.0,
+        "within_benchmark": within_benchmark,
+    }
@@ -0,0 +1,265 @@
+import csv
+import hashlib
+import io
+import re
+from collections import Counter, namedtuple
+from datetime import datetime
+
+from lifeos.utils.db import write_transaction
+
+Transaction = namedtuple("Transaction", "date amount description")
+Match = namedtuple("Match", "transaction loan score")
+
+# -------------------------------------------------
+# SETTINGS
+# -------------------------------------------------
+DATE_WINDOW_DAYS = 3
+AMOUNT_TOLERANCE = 1  # rupees either side of the EMI
+
+DATE_FORMATS = (
+    "%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d/%m/%y", "%d-%m-%y",
+    "%d-%b-%Y", "%d %b %Y", "%d-%b-%y", "%d %b %y", "%m/%d/%Y",
+)
+
+DATE_HEADERS = ("date", "txn date", "transaction date", "value date", "posting date")
+DESCRIPTION_HEADERS = ("description", "narration", "particulars", "remarks", "details")
+DEBIT_HEADERS = ("debit", "withdrawal", "withdrawal amt.", "withdrawal amount", "debit amount", "dr")
+AMOUNT_HEADERS = ("amount", "transaction amount")
+
+# words that say nothing about which lender a debit went to
+GENERIC_WORDS = {"loan", "personal", "bank", "emi", "finance", "credit", "card", "ltd", "limited"}
+
+
+# -------------------------------------------------
+# PARSING (STREAMING)
+# -------------------------------------------------
+def parse_date(value):
+    value = value.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_amount(value):
+    value = (value or "").replace(",", "").replace("₹", "").strip()
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _find_header(headers, names):
+    for i, h in enumerate(headers):
+        if h in names:
+            return i
+    return None
+
+
+def iter_csv(stream):
+    """Yield debit Transactions from a bank CSV, one line at a time."""
+    reader = csv.reader(stream)
+    date_i = desc_i = debit_i = amount_i = None
+
+    for row in reader:
+        if date_i is None:
+            # banks often put account details above the real header row
+            headers = [c.strip().lower() for c in row]
+            date_i = _find_header(headers, DATE_HEADERS)
+            desc_i = _find_header(headers, DESCRIPTION_HEADERS)
+            debit_i = _find_header(headers, DEBIT_HEADERS)
+            amount_i = _find_header(headers, AMOUNT_HEADERS)
+            if date_i is None or desc_i is None or (debit_i is None and amount_i is None):
+                date_i = None
+            continue
+
+        if len(row) <= max(i for i in (date_i, desc_i, debit_i, amount_i) if i is not None):
+            continue
+
+        txn_date = parse_date(row[date_i])
+        if txn_date is None:
+            continue
+
+        if debit_i is not None:
+            amount = parse_amount(row[debit_i])
+        else:
+            # single signed amount column: debits are negative
+            amount = parse_amount(row[amount_i])
+            amount = -amount if amount is not None and amount < 0 else None
+
+        if amount:
+            yield Transaction(txn_date, amount, row[desc_i].strip())
+
+
+OFX_TAG_RE = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<\r\n]*)")
+
+
+def iter_ofx(stream):
+    """Yield debit Transactions from an OFX/QFX file (SGML or XML flavour)."""
+    txn = None
+    for line in stream:
+        for closing, tag, value in OFX_TAG_RE.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if not closing:
+                    txn = {}
+                elif txn is not None:
+                    yield from _ofx_transaction(txn)
+                    txn = None
+            elif txn is not None and not closing:
+                txn[tag] = value.strip()
+
+
+def _ofx_transaction(txn):
+    amount = parse_amount(txn.get("TRNAMT"))
+    posted = txn.get("DTPOSTED", "")[:8]
+    if amount is None or amount >= 0 or len(posted) < 8:
+        return
+    try:
+        txn_date = datetime.strptime(posted, "%Y%m%d").date()
+    except ValueError:
+        return
+    description = " ".join(v for v in (txn.get("NAME"), txn.get("MEMO")) if v)
+    yield Transaction(txn_date, -amount, description)
+
+
+def iter_statement(file, name):
+    stream = io.TextIOWrapper(file, encoding="utf-8-sig", errors="replace", newline="")
+    if name.lower().endswith((".ofx", ".qfx")):
+        return iter_ofx(stream)
+    return iter_csv(stream)
+
+
+# -------------------------------------------------
+# MATCHING
+# -------------------------------------------------
+def lender_tokens(lender):
+    words = re.findall(r"[a-z0-9]+", lender.lower())
+    return {w for w in words if len(w) >= 3 and w not in GENERIC_WORDS}
+
+
+def build_index(loans):
+    """amount (rupees) → candidate loans, including the tolerance band."""
+    index = {}
+    for loan in loans:
+        entry = (loan, lender_tokens(loan.lender), str(loan.loan_no).lower())
+        emi = round(loan.emi)
+        for amount in range(emi - AMOUNT_TOLERANCE, emi + AMOUNT_TOLERANCE + 1):
+            index.setdefault(amount, []).append(entry)
+    return index
+
+
+def _in_window(day, emi_date, window):
+    if not emi_date:
+        return False
+    gap = abs(day - emi_date)
+    return min(gap, 31 - gap) <= window
+
+
+def match_transactions(transactions, loans, window=DATE_WINDOW_DAYS):
+    """Return (matches, ambiguous count).
+
+    A debit matches a loan when the amount fits its EMI and the
+    description names the lender or loan number; being within the
+    emi_date window adds confidence and breaks ties.
+    """
+    index = build_index(loans)
+    matches, ambiguous = [], 0
+
+    for txn in transactions:
+        candidates = index.get(round(txn.amount))
+        if not candidates:
+            continue
+
+        text = txn.description.lower()
+        scored = []
+        for loan, tokens, loan_no in candidates:
+            score = 0
+            # substring, so "icici" also finds "ICICIBANK" in ACH narrations
+            if any(t in text for t in tokens):
+                score += 2
+            if len(loan_no) >= 4 and loan_no[-4:] in text:
+                score += 2
+            if _in_window(txn.date.day, loan.emi_date, window):
+                score += 1
+            scored.append((score, loan))
+
+        scored.sort(key=lambda s: s[0], reverse=True)
+        best_score, best = scored[0]
+        tied = len(scored) > 1 and scored[1][0] == best_score
+        if best_score >= 2 and not tied:
+            matches.append(Match(txn, best, best_score))
+        else:
+            ambiguous += 1
+
+    return matches, ambiguous
+
+
+# -------------------------------------------------
+# POSTING (BATCHED)
+# -------------------------------------------------
+# Two real debits can be identical (same day, amount and narration), so
+# each is told apart by its occurrence among identical lines of the
+# statement. The first keeps the plain key, which is what statements
+# posted before the counter existed recorded.
+def fingerprint(txn, occurrence=1):
+    raw = f"{txn.date.isoformat()}|{txn.amount:.2f}|{txn.description}"
+    if occurrence > 1:
+        raw += f"|{occurrence}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def post_payments(matches, profile=None):
+    """Record matched debits and advance each loan by the number of new
+    months paid, in one transaction. Re-importing a statement is a no-op.
+    Returns {loan_id: months posted}."""
+    months_by_loan = {}
+    seen = Counter()
+    with write_transaction(profile) as conn:
+        for m in matches:
+            seen[m.transaction] += 1
+            inserted = conn.execute(
+                """
+                INSERT OR IGNORE INTO statement_payments
+                    (fingerprint, loan_id, txn_date, amount, description)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (
+                    fingerprint(m.transaction, seen[m.transaction]), str(m.loan.id),
+                    m.transaction.date.isoformat(), m.transaction.amount,
+                    m.transaction.description,
+                ),
+            ).rowcount
+            if inserted:
+                months_by_loan.setdefault(m.loan.id, set()).add(
+                    m.transaction.date.strftime("%Y-%m")
+                )
+
+        # compare against the committed last_paid_month, not the loaded one
+        updates = []
+        for loan_id, months in months_by_loan.items():
+            row = conn.execute(
+                "SELECT COALESCE(last_paid_month, '') FROM loans WHERE id = ?", (loan_id,)
+            ).fetchone()
+            if row is None:
+                continue
+            new_months = sorted(m for m in months if m > row[0])
+            if new_months:
+                updates.append((len(new_months), new_months[-1], loan_id))
+
+        conn.executemany(
+            """
+            UPDATE loans
+            SET months_paid = MIN(total_months, months_paid + ?),
+                last_paid_month = ?,
+                version = version + 1
+            WHERE id = ?
+            """,
+            updates,
+        )
+
+    return {loan_id: n for n, _, loan_id in updates}
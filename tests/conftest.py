@@ -0,0 +1,19 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lifeos.utils import cache, db  # noqa: E402
+
+
+@pytest.fixture
+def profile(tmp_path, monkeypatch):
+    """A throwaway profile whose database and result cache live in tmp_path."""
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "viveka.db")
+    monkeypatch.setattr(db, "CASHFLOW_JSON", tmp_path / "cashflow.json")
+    monkeypatch.setattr(db, "PROFILES_DIR", tmp_path / "profiles")
+    monkeypatch.setattr(cache, "CACHE_PATH", tmp_path / "cache.db")
+    db.init_db("test")
+    return "test"
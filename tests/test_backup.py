@@ -0,0 +1,43 @@
+import gzip
+import sqlite3
+
+from lifeos.utils import backup
+from lifeos.utils.calculations import insert_loan, load_loans
+from lifeos.utils.models import Loan
+
+
+def test_snapshot_copies_in_batches_and_restores(profile, tmp_path, monkeypatch):
+    monkeypatch.setattr(backup, "BACKUP_DIR", tmp_path / "backups")
+    monkeypatch.setattr(backup, "SNAPSHOT_PAGES", 1)
+    pauses = []
+
+    insert_loan(
+        Loan(id="HL1", lender="Bank", principal=900_000, emi=9_000, total_months=120), profile
+    )
+    path = backup.create_snapshot(profile, pause=pauses.append)
+
+    with gzip.open(path, "rb") as gz:
+        image = gz.read()
+    pages = len(image) // 4096
+    assert pages > 1
+    # one pause after each single-page step
+    assert len(pauses) == pages
+    assert set(pauses) == {backup.SNAPSHOT_PAUSE}
+
+    insert_loan(
+        Loan(id="PL2", lender="Bank", principal=100_000, emi=5_000, total_months=24), profile
+    )
+    backup.restore_snapshot(path, profile)
+    assert [l.id for l in load_loans(profile)] == ["HL1"]
+
+
+def test_snapshot_is_a_valid_database(profile, tmp_path, monkeypatch):
+    monkeypatch.setattr(backup, "BACKUP_DIR", tmp_path / "backups")
+    path = backup.create_snapshot(profile)
+
+    copy = tmp_path / "copy.db"
+    with gzip.open(path, "rb") as gz:
+        copy.write_bytes(gz.read())
+    conn = sqlite3.connect(copy)
+    assert conn.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+    conn.close()
@@ -0,0 +1,39 @@
+from lifeos.utils import cache, db
+from lifeos.utils.calculations import insert_loan
+from lifeos.utils.forecast import emi_schedule
+from lifeos.utils.models import Loan
+
+
+def loan(emi):
+    return Loan(id="S1", lender="Bank", principal=100_000, emi=emi,
+                total_months=12, interest_rate=10)
+
+
+def recreate(profile):
+    path = db.db_path(profile)
+    for p in (path, path.with_name(f"{path.name}-wal"), path.with_name(f"{path.name}-shm")):
+        p.unlink(missing_ok=True)
+    db.init_db(profile)
+
+
+def test_identity_is_stable_until_the_file_is_recreated(profile):
+    identity = db.db_identity(profile)
+    insert_loan(loan(9_000), profile)
+    assert db.db_identity(profile) == identity
+
+    recreate(profile)
+    insert_loan(loan(9_000), profile)
+    assert db.db_identity(profile) != identity
+
+
+def test_recreated_database_is_not_served_stale_results(profile):
+    insert_loan(loan(9_000), profile)
+    assert emi_schedule(profile)["total_emi"][0] == 9_000
+    key = cache.cache_key("forecast.emi_schedule", "2026-01", profile)
+
+    recreate(profile)
+    insert_loan(loan(5_000), profile)
+    # same path and same change counters as before the file was deleted
+    assert cache.book_version(profile) == (1, 0)
+    assert cache.cache_key("forecast.emi_schedule", "2026-01", profile) != key
+    assert emi_schedule(profile)["total_emi"][0] == 5_000
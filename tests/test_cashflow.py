@@ -0,0 +1,41 @@
+import sqlite3
+import threading
+import time
+
+from lifeos.utils import db
+from lifeos.utils.calculations import load_cashflow, save_cashflow
+from lifeos.utils.models import Expense, IncomeStream
+
+CASHFLOW = {
+    "income_streams": [IncomeStream(name="Salary", amount=100_000)],
+    "fixed_expenses": [Expense(name="Rent", amount=20_000, type="fixed")],
+    "variable_expenses": [Expense(name="Fuel", amount=3_000)],
+}
+
+
+def test_save_cashflow_round_trips(profile):
+    save_cashflow(CASHFLOW, profile)
+    data = load_cashflow(profile)
+    assert data["monthly_income"] == 100_000
+    assert [s.name for s in data["income_streams"]] == ["Salary"]
+    assert [e.name for e in data["fixed_expenses"]] == ["Rent"]
+    assert [e.name for e in data["variable_expenses"]] == ["Fuel"]
+
+
+def test_save_cashflow_queues_on_the_write_lock(profile):
+    holder = sqlite3.connect(
+        db.db_path(profile), isolation_level=None, check_same_thread=False
+    )
+    holder.execute("BEGIN IMMEDIATE")
+    release = threading.Timer(0.2, holder.execute, ("COMMIT",))
+    db.lock_wait_stats(reset=True)
+
+    release.start()
+    start = time.perf_counter()
+    save_cashflow(CASHFLOW, profile)
+    assert time.perf_counter() - start >= 0.15
+    release.join()
+    holder.close()
+
+    stats = db.lock_wait_stats(reset=True)
+    assert stats["count"] == 1 and stats["max"] >= 0.15
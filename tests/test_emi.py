@@ -0,0 +1,109 @@
+import math
+
+import numpy as np
+import pytest
+
+from lifeos.utils.emi import balance_after, emi_amount, months_to_close, remaining_interest
+
+RUPEE = 1.0
+
+
+def simulate(balance, annual_rate, emi, months=None):
+    """Month by month: interest accrues, then the EMI is paid; the last
+    payment is trimmed to what is left, and a sub-rupee residue counts as
+    paid. Stops at payoff or after `months` payments (the last of which
+    then clears the balance). Returns (payments made, interest paid,
+    balance after each payment)."""
+    r = annual_rate / 1200
+    interest = 0.0
+    balances = []
+    n = 0
+    while balance > 1e-9:
+        n += 1
+        accrued = balance * r
+        interest += accrued
+        if balance + accrued <= emi + RUPEE or n == months:
+            balance = 0.0
+        else:
+            balance = balance + accrued - emi
+        balances.append(balance)
+        if n > 10_000:
+            raise AssertionError("payment does not cover the interest")
+    return n, interest, balances
+
+
+def random_loans(count, seed):
+    rng = np.random.default_rng(seed)
+    rates = np.concatenate([
+        [0.0, 0.0, 0.01, 0.05, 0.1],  # zero and tiny rates
+        rng.uniform(0, 30, count - 5),
+    ])
+    principals = rng.integers(10_000, 5_000_000, count)
+    tenures = rng.integers(1, 361, count)
+    return list(zip(principals.tolist(), rates.tolist(), tenures.tolist()))
+
+
+LOANS = random_loans(300, seed=36)
+
+
+@pytest.mark.parametrize("principal, rate, months", LOANS)
+def test_emi_pays_off_in_exactly_the_tenure(principal, rate, months):
+    emi = emi_amount(principal, rate, months)
+    n, _, _ = simulate(principal, rate, emi)
+    assert n == months
+    # before the last installment exactly one EMI is left, to the rupee
+    assert abs(balance_after(principal, rate, emi, months - 1) * (1 + rate / 1200) - emi) <= RUPEE
+
+
+@pytest.mark.parametrize("principal, rate, months", LOANS)
+def test_balance_after_matches_simulation(principal, rate, months):
+    emi = emi_amount(principal, rate, months)
+    _, _, balances = simulate(principal, rate, emi)
+    for k in sorted({1, months // 3, months // 2, months - 1}):
+        if 0 < k <= len(balances):
+            assert balance_after(principal, rate, emi, k) == pytest.approx(balances[k - 1], abs=RUPEE)
+    assert balance_after(principal, rate, emi, 0) == pytest.approx(principal)
+
+
+@pytest.mark.parametrize("principal, rate, months", LOANS)
+def test_months_to_close_matches_simulation(principal, rate, months):
+    emi = emi_amount(principal, rate, months)
+    # an extra payment on top of the EMI closes the loan early
+    for payment in (emi, emi * 1.37, principal):
+        n, _, _ = simulate(principal, rate, payment)
+        assert months_to_close(principal, rate, payment) == n
+
+
+@pytest.mark.parametrize("principal, rate, months", LOANS)
+def test_remaining_interest_matches_simulation(principal, rate, months):
+    emi = emi_amount(principal, rate, months)
+    for months_left in sorted({1, months // 2, months, months + 12}):
+        if months_left < 1:
+            continue
+        _, interest, _ = simulate(principal, rate, emi, months_left)
+        assert remaining_interest(principal, rate, emi, months_left) == pytest.approx(
+            interest, abs=RUPEE
+        )
+
+
+def test_payment_below_interest_never_closes():
+    assert math.isinf(months_to_close(100_000, 12, 999))
+    assert months_to_close(0, 12, 1_000) == 0
+
+
+def test_vectorized_matches_scalar():
+    principal, rate, months = (np.array(c, dtype=float) for c in zip(*LOANS))
+    emi = np.array([emi_amount(*loan) for loan in LOANS])
+    half = months // 2
+    np.testing.assert_allclose(
+        balance_after(principal, rate, emi, half),
+        [balance_after(p, r, e, h) for p, r, e, h in zip(principal, rate, emi, half)],
+    )
+    np.testing.assert_array_equal(
+        months_to_close(principal, rate, emi),
+        [months_to_close(p, r, e) for p, r, e in zip(principal, rate, emi)],
+    )
+    np.testing.assert_allclose(
+        remaining_interest(principal, rate, emi, half),
+        [remaining_interest(p, r, e, h) for p, r, e, h in zip(principal, rate, emi, half)],
+    )
@@ -0,0 +1,75 @@
+from dataclasses import replace
+
+from lifeos.utils import db
+from lifeos.utils.calculations import save_cashflow
+from lifeos.utils.expenses import ROLLUP_SQL, expense_totals
+from lifeos.utils.models import Expense, IncomeStream
+from lifeos.utils.search import search
+
+INCOME = [IncomeStream(name="Salary", amount=100_000)]
+
+
+def save(profile, fixed, variable):
+    save_cashflow(
+        {"income_streams": INCOME, "fixed_expenses": fixed, "variable_expenses": variable},
+        profile,
+    )
+
+
+def stored(profile):
+    conn = db.get_connection(profile)
+    rows = conn.execute("SELECT id, name, amount FROM expenses ORDER BY id").fetchall()
+    conn.close()
+    return rows
+
+
+def test_rollup_counts_recurring_and_this_months_expenses(profile):
+    save(profile, [
+        Expense(name="Rent", amount=20_000, type="fixed", category="Home"),
+        Expense(name="Gym", amount=1_500, type="fixed", category="Health", spent_on="2026-01-10"),
+    ], [
+        Expense(name="Fuel", amount=3_000, category="Travel"),
+        Expense(name="Dinner", amount=2_000, category="Food", spent_on="2026-03-14"),
+        Expense(name="Lunch", amount=500, category="Food", spent_on="2026-03-02"),
+        Expense(name="Movie", amount=800, category="Fun", spent_on="2026-02-20"),
+    ])
+    totals = expense_totals("2026-03", profile)
+    assert totals["fixed"] == 21_500
+    assert totals["variable"] == 5_500
+    assert totals["by_category"] == {
+        "Home": 20_000, "Health": 1_500, "Travel": 3_000, "Food": 2_500,
+    }
+
+
+def test_rollup_reads_indexes_only(profile):
+    conn = db.get_connection(profile)
+    plan = [
+        r[-1] for r in conn.execute(f"EXPLAIN QUERY PLAN {ROLLUP_SQL}", {"month": "2026-03"})
+    ]
+    conn.close()
+    steps = [p for p in plan if "expenses" in p]
+    assert len(steps) == 3
+    assert all(p.startswith("SEARCH expenses USING COVERING INDEX") for p in steps)
+
+
+def test_save_cashflow_rewrites_only_changed_expenses(profile):
+    rent = Expense(name="Rent", amount=20_000, type="fixed")
+    fuel = Expense(name="Fuel", amount=3_000)
+    gym = Expense(name="Gym", amount=1_500)
+    save(profile, [rent], [fuel, gym])
+    before = {name: row_id for row_id, name, _ in stored(profile)}
+
+    save(profile, [rent], [replace(fuel, amount=3_500), Expense(name="Books", amount=900)])
+    after = stored(profile)
+    assert after == [
+        (before["Rent"], "Rent", 20_000),  # untouched
+        (before["Fuel"], "Fuel", 3_500),  # updated in place
+        (before["Gym"] + 1, "Books", 900),  # Gym deleted, Books inserted
+    ]
+    assert [h["title"] for h in search("books", profile=profile)] == ["Books"]
+    assert search("gym", profile=profile) == []
+
+    # saving the same expenses again writes nothing
+    version = db.data_version("expenses", profile)
+    save(profile, [rent], [replace(fuel, amount=3_500), Expense(name="Books", amount=900)])
+    assert db.data_version("expenses", profile) == version
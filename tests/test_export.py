@@ -0,0 +1,48 @@
+import pytest
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+from lifeos.utils.calculations import insert_loan, save_cashflow
+from lifeos.utils.export import DATASETS, FORMATS, excel_available, export_file
+from lifeos.utils.models import Expense, IncomeStream, Loan
+
+
+@pytest.fixture
+def book(profile):
+    insert_loan(Loan(id="HL1", lender="HDFC", principal=500_000, emi=12_000,
+                     total_months=48, months_paid=6, interest_rate=9.5), profile)
+    insert_loan(Loan(id="ST1", lender="Mama", type="SETTLEMENT", principal=80_000), profile)
+    save_cashflow({
+        "income_streams": [IncomeStream(name="Salary", amount=100_000)],
+        "fixed_expenses": [Expense(name="Rent", amount=20_000, type="fixed")],
+        "variable_expenses": [Expense(name="Fuel", amount=3_000)],
+    }, profile)
+    return profile
+
+
+@pytest.mark.parametrize("fmt", list(FORMATS))
+@pytest.mark.parametrize("dataset", list(DATASETS))
+def test_download_button_accepts_every_export(book, dataset, fmt):
+    if fmt == "Excel" and not excel_available():
+        pytest.skip("openpyxl is not installed")
+    with export_file(dataset, fmt, book) as data:
+        converted, _ = convert_data_to_bytes_and_infer_mime(
+            data, unsupported_error=RuntimeError("unsupported type")
+        )
+    assert len(converted) > 0
+
+
+def test_csv_export_has_every_loan(book):
+    with export_file("loans", "CSV", book) as data:
+        rows = data.read().decode().splitlines()
+    assert len(rows) == 3
+    assert any(r.startswith("HL1,") for r in rows)
+
+
+def test_cashflow_export_has_income_and_expenses(book):
+    with export_file("cashflow", "CSV", book) as data:
+        rows = data.read().decode().splitlines()
+    assert rows[0] == "kind,name,amount,category,month"
+    assert sorted(rows[1:]) == [
+        "fixed,Rent,20000,Uncategorized,", "income,Salary,100000,salary,",
+        "variable,Fuel,3000,Uncategorized,",
+    ]
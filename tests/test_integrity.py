@@ -0,0 +1,50 @@
+from lifeos.utils import db, integrity
+from lifeos.utils.calculations import LOAN_DB_FIELDS, insert_loan, load_loans
+from lifeos.utils.models import Loan
+
+
+def raw_insert(profile, table, loan):
+    # as an old build or a hand edit would have left it, bypassing the moves
+    with db.write_transaction(profile) as conn:
+        conn.execute(
+            f"INSERT INTO {table} ({', '.join(LOAN_DB_FIELDS)}) "
+            f"VALUES ({', '.join('?' for _ in LOAN_DB_FIELDS)})",
+            tuple(getattr(loan, f) for f in LOAN_DB_FIELDS),
+        )
+
+
+def findings(profile):
+    return {(f["rule"], f["table"]): f["count"] for f in integrity.scan(profile)}
+
+
+def test_closed_loan_in_the_live_table_is_moved_to_the_archive(profile):
+    insert_loan(Loan(id="HL1", lender="Bank", emi=9_000, total_months=12), profile)
+    raw_insert(profile, "loans", Loan(id="OLD", lender="Bank", status="CLOSED",
+                                      emi=5_000, total_months=12, months_paid=12))
+    assert findings(profile) == {("cold_loan_not_archived", "loans"): 1}
+
+    assert integrity.repair(profile) == {"cold_loan_not_archived": 1}
+    assert findings(profile) == {}
+    assert [l.id for l in load_loans(profile)] == ["HL1"]
+
+    conn = db.get_connection(profile)
+    row = conn.execute(
+        "SELECT archived, archived_at <> '', version FROM loans_archive WHERE id = 'OLD'"
+    ).fetchone()
+    conn.close()
+    assert row == (1, 1, 1)
+
+
+def test_loan_rules_cover_the_archive(profile):
+    insert_loan(Loan(id="HL1", loan_no="ABC-1", lender="Bank", emi=9_000, total_months=12),
+                profile)
+    raw_insert(profile, "loans_archive", Loan(id="OLD", loan_no=" abc-1", lender="Bank",
+                                              status="CLOSED", emi=5_000, total_months=12,
+                                              last_paid_month="May 2024"))
+    found = findings(profile)
+    assert found[("duplicate_loan_no", "loans")] == 1
+    assert found[("duplicate_loan_no", "loans_archive")] == 1
+    assert found[("bad_last_paid_month", "loans_archive")] == 1
+
+    assert integrity.repair(profile) == {"bad_last_paid_month": 1}
+    assert ("bad_last_paid_month", "loans_archive") not in findings(profile)
@@ -0,0 +1,19 @@
+from lifeos.utils import db
+from lifeos.utils.calculations import insert_loan
+from lifeos.utils.models import Loan
+from lifeos.utils.rates import add_rate_change, delete_rate_change, load_rate_changes
+
+
+def test_rate_changes_are_written_to_the_given_profile(profile):
+    db.init_db()  # the default profile, which must stay untouched
+    insert_loan(Loan(id="HL1", lender="Bank", principal=500_000, emi=12_000,
+                     total_months=60, interest_rate=9), profile)
+
+    add_rate_change("HL1", 13, 9.5, profile=profile)
+    add_rate_change("HL1", 13, 9.75, profile=profile)  # same month: replaced
+    add_rate_change("HL1", 25, 10, profile=profile)
+    assert load_rate_changes(profile=profile) == {"HL1": ((13, 9.75), (25, 10.0))}
+    assert load_rate_changes() == {}
+
+    delete_rate_change("HL1", 13, profile=profile)
+    assert load_rate_changes("HL1", profile=profile) == {"HL1": ((25, 10.0),)}
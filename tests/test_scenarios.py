@@ -0,0 +1,38 @@
+from lifeos.utils import scenarios
+from lifeos.utils.calculations import insert_loan
+from lifeos.utils.models import Loan
+
+
+def add_loans(profile, count):
+    for i in range(count):
+        insert_loan(Loan(id=f"L{i}", lender="Bank", principal=100_000, emi=5_000,
+                         total_months=24, interest_rate=12), profile)
+
+
+def test_small_books_are_evaluated_in_process(profile, monkeypatch):
+    monkeypatch.setattr(scenarios.os, "cpu_count", lambda: 8)
+    add_loans(profile, 5)
+    ids = list(range(20))
+    # 20 scenarios are far from enough work with 5 loans
+    assert scenarios._pool_workers(ids, profile, 4) == 0
+
+    monkeypatch.setattr(scenarios, "PARALLEL_MIN_WORK", 100)
+    assert scenarios._pool_workers(ids, profile, 4) == 4
+    assert scenarios._pool_workers(ids[:3], profile, 4) == 0  # 15 < 100
+
+
+def test_one_cpu_never_starts_a_pool(profile, monkeypatch):
+    monkeypatch.setattr(scenarios.os, "cpu_count", lambda: 1)
+    monkeypatch.setattr(scenarios, "PARALLEL_MIN_WORK", 0)
+    assert scenarios._pool_workers(list(range(20)), profile, 4) == 0
+
+
+def test_evaluate_matches_scenario_metrics(profile):
+    add_loans(profile, 3)
+    sid = scenarios.create_scenario("Close L0", profile)
+    scenarios.save_overlay(sid, [("L0", "remove", {})], [], profile)
+
+    results = scenarios.evaluate_scenarios([sid], profile)
+    assert results[None] == scenarios.scenario_metrics(None, profile)
+    assert results[sid] == scenarios.scenario_metrics(sid, profile)
+    assert results[sid]["total_emi"] == results[None]["total_emi"] - 5_000
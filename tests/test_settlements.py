@@ -0,0 +1,36 @@
+from lifeos.utils.calculations import archive_cold_loans, insert_loan
+from lifeos.utils.models import Loan
+from lifeos.utils.settlements import closed_settlement_stats
+
+
+def closed(loan_id, principal, offer=0):
+    return Loan(id=loan_id, lender="Bank", type="SETTLEMENT", status="CLOSED",
+                principal=principal, latest_offer=offer)
+
+
+def test_closed_settlements_without_an_offer_are_counted(profile):
+    for loan in (closed("S1", 100_000), closed("S2", 200_000)):
+        insert_loan(loan, profile)
+    archive_cold_loans(profile)
+
+    stats = closed_settlement_stats(profile)
+    assert stats["count"] == 2
+    assert stats["principal"] == 300_000
+    assert stats["with_offer"] == 0
+    assert stats["settled"] == stats["saved"] == 0
+
+
+def test_offer_aggregates_use_only_settlements_with_an_offer(profile):
+    for loan in (closed("S1", 100_000, 25_000), closed("S2", 200_000, 80_000),
+                 closed("S3", 300_000)):
+        insert_loan(loan, profile)
+    archive_cold_loans(profile)
+
+    stats = closed_settlement_stats(profile)
+    assert stats["count"] == 3
+    assert stats["principal"] == 600_000
+    assert stats["with_offer"] == 2
+    assert stats["settled"] == 105_000
+    assert stats["saved"] == 195_000
+    assert stats["avg_pct"] == 32.5
+    assert stats["within_benchmark"] == 1
@@ -0,0 +1,44 @@
+import io
+from datetime import date
+
+from lifeos.utils import db
+from lifeos.utils.calculations import insert_loan, load_loans
+from lifeos.utils.models import Loan
+from lifeos.utils.statements import (
+    Transaction, fingerprint, iter_statement, match_transactions, post_payments,
+)
+
+STATEMENT = b"""Date,Narration,Debit
+05/03/2026,ACH HDFC LOAN 1234,12000
+05/03/2026,ACH HDFC LOAN 1234,12000
+05/04/2026,ACH HDFC LOAN 1234,12000
+"""
+
+
+def posted(profile):
+    conn = db.get_connection(profile)
+    rows = conn.execute("SELECT txn_date, amount FROM statement_payments ORDER BY 1").fetchall()
+    conn.close()
+    return rows
+
+
+def test_identical_debits_on_the_same_day_are_both_posted(profile):
+    insert_loan(Loan(id="HL1234", lender="HDFC", emi=12_000, total_months=48,
+                     months_paid=6, emi_date=5), profile)
+    transactions = list(iter_statement(io.BytesIO(STATEMENT), "statement.csv"))
+    matches, ambiguous = match_transactions(transactions, load_loans(profile))
+    assert len(matches) == 3 and ambiguous == 0
+
+    assert post_payments(matches, profile) == {"HL1234": 2}
+    assert posted(profile) == [
+        ("2026-03-05", 12000.0), ("2026-03-05", 12000.0), ("2026-04-05", 12000.0),
+    ]
+
+    # importing the same statement again changes nothing
+    assert post_payments(matches, profile) == {}
+    assert len(posted(profile)) == 3
+
+
+def test_first_occurrence_keeps_the_plain_fingerprint():
+    txn = Transaction(date(2026, 3, 5), 12000.0, "ACH HDFC LOAN 1234")
+    assert fingerprint(txn) == fingerprint(txn, 1) != fingerprint(txn, 2)